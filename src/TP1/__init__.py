@@ -1,13 +1,12 @@
-import json
-
 from crawler import Crawler
+from result_sink import JsonlSink
 
-crawler = Crawler(
-    seed_urls=["https://web-scraping.dev/products"],
-    sleep_seconds=1
-    )
-
-results = crawler.run()
+# Chaque page est écrite dès qu'elle est parsée, au format lu par le TP2
+with JsonlSink("./outputs/products.jsonl") as sink:
+    crawler = Crawler(
+        seed_urls=["https://web-scraping.dev/products"],
+        sleep_seconds=1,
+        sink=sink,
+        )
 
-with open("./outputs/products.json", "w") as f:
-    json.dump(results, f)
\ No newline at end of file
+    crawler.run()
@@ -0,0 +1,177 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+
+from crawler import Crawler
+from html_parser import parse_html
+
+
+class AsyncCrawler(Crawler):
+    """
+    Asynchronous crawler: keeps up to `concurrency` requests in flight.
+
+    The frontier (per-host queues, deduplication, `max_pages`) is the
+    one of `Crawler`; only the fetch loop changes.
+
+    With `parser_workers`, parsing is a separate pipeline stage: fetched
+    pages go through a bounded queue (`parse_queue_size`) to a pool of
+    parser processes, so parsing scales across cores instead of stalling
+    the fetch loop. Results and links come back to the frontier on the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        seed_urls,
+        concurrency=8,
+        queue_size=None,
+        parser_workers=None,
+        parse_queue_size=None,
+        **kwargs,
+    ):
+        super().__init__(seed_urls, **kwargs)
+        self.concurrency = concurrency
+        self.queue_size = queue_size or 2 * concurrency
+        self.parser_workers = parser_workers
+        self.parse_queue_size = parse_queue_size or 2 * (parser_workers or 1)
+        self.in_flight = 0
+
+    def run(self):
+        """Lancer le Crawler (bloquant)"""
+
+        return asyncio.run(self.run_async())
+
+    async def run_async(self):
+        """Lancer le Crawler dans la boucle asyncio courante"""
+
+        # File de travail bornée entre le dispatcher et les workers
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        progress = asyncio.Event()
+
+        # Pages récupérées en attente de parsing (si parser_workers)
+        parse_queue = None
+        parser_pool = nullcontext()
+        if self.parser_workers:
+            parse_queue = asyncio.Queue(maxsize=self.parse_queue_size)
+            parser_pool = ProcessPoolExecutor(max_workers=self.parser_workers)
+
+        # urllib est bloquant : chaque worker délègue ses requêtes à un thread
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor, parser_pool:
+            workers = [
+                asyncio.create_task(self._worker(queue, progress, executor, parse_queue))
+                for _ in range(self.concurrency)
+            ]
+            if parse_queue is not None:
+                workers += [
+                    asyncio.create_task(self._parser(parse_queue, progress, parser_pool))
+                    for _ in range(self.parser_workers)
+                ]
+            await self._dispatch(queue, progress)
+            await queue.join()
+            if parse_queue is not None:
+                await parse_queue.join()
+
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        self._shutdown()
+        self.metrics.report()
+        return self.results
+
+    async def _dispatch(self, queue, progress):
+        """Alimenter la file de travail depuis la frontière"""
+
+        while self.pages_crawled < self.max_pages:
+            # Assez de pages en vol pour atteindre max_pages : on attend
+            if self.pages_crawled + self.in_flight >= self.max_pages:
+                progress.clear()
+                await progress.wait()
+                continue
+
+            url, depth, wait = self.frontier.pop()
+            self.metrics.set_gauge("frontier_size", len(self.frontier))
+            self.metrics.set_gauge("in_flight", self.in_flight)
+            self.metrics.maybe_report()
+            if url is None:
+                if wait is None and self.in_flight == 0:  # plus rien à crawler
+                    break
+                # Les pages en vol peuvent encore découvrir des liens,
+                # sinon on attend la fin du délai de politesse du prochain hôte
+                progress.clear()
+                try:
+                    await asyncio.wait_for(progress.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if url in self.visited:
+                self.queued.pop(url, None)
+                continue
+
+            # L'url reste dans `queued` tant qu'elle est en vol (déduplication)
+            self.in_flight += 1
+            await queue.put((url, depth))
+
+    async def _worker(self, queue, progress, executor, parse_queue=None):
+        """Récupérer et parser les pages de la file de travail"""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            url, depth = await queue.get()
+            try:
+                # Visitée depuis sa mise en file (cible d'une redirection suivie)
+                if url in self.visited:
+                    self.queued.pop(url, None)
+                    continue
+                robots = await loop.run_in_executor(executor, self._check_robots, url)
+                # Même chemin que Crawler.crawl_next (Crawl-delay, robots_disallowed)
+                if not self._apply_robots(url, *robots):
+                    self.queued.pop(url, None)
+                    continue
+                status, html, cached_links, final_url = await loop.run_in_executor(
+                    executor, self._fetch, url
+                )
+                self._apply_redirect(url, final_url)
+                self.frontier.report(url, status)
+                if self._retry_later(url, status, depth):
+                    continue
+                self.queued.pop(url, None)
+                if cached_links is not None:
+                    self._handle_unchanged(url, cached_links, depth)
+                elif parse_queue is not None and html:
+                    # La page reste en vol jusqu'à la fin de son parsing
+                    self.visited.add(url)
+                    self.in_flight += 1
+                    await parse_queue.put((url, html, depth))
+                else:
+                    self._handle_page(url, html, depth)
+            except Exception as e:
+                print(f"Erreur lors du crawl de {url} : {e}")
+                self.metrics.inc("errors", label=type(e).__name__)
+                self.queued.pop(url, None)
+                self.visited.add(url)
+            finally:
+                self.in_flight -= 1
+                progress.set()
+                queue.task_done()
+
+    async def _parser(self, parse_queue, progress, parser_pool):
+        """Parser dans un processus les pages de la file de parsing"""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            url, html, depth = await parse_queue.get()
+            try:
+                with self.metrics.timer("parse_seconds"):
+                    data = await loop.run_in_executor(
+                        parser_pool, parse_html, html, self.parser_backend
+                    )
+                self._handle_parsed(url, data, depth)
+            except Exception as e:
+                print(f"Erreur lors du parsing de {url} : {e}")
+                self.metrics.inc("errors", label=type(e).__name__)
+            finally:
+                self.in_flight -= 1
+                progress.set()
+                parse_queue.task_done()
@@ -0,0 +1,427 @@
+import gzip
+import hashlib
+import html
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from crawler import Crawler
+from async_crawler import AsyncCrawler
+from distributed import DistributedCrawler
+from frontier import Frontier
+from seen_set import FingerprintSet, ScalableBloomFilter
+from http_client import HttpClient, get_html_page
+from html_parser import AVAILABLE_BACKENDS, PARSER_BACKENDS, parse_html
+from metrics import LogReporter, Metrics
+
+
+ROBOTS_TXT = "User-agent: *\nDisallow: /cart\n"
+
+# Pages crawlées sur web-scraping.dev (dictionnaires de parse_html)
+SAVED_PAGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "products.json")
+
+
+def product_page(product_id: int, n_products: int) -> str:
+    """Synthetic product page, close to the web-scraping.dev layout"""
+
+    links = [
+        "/products",
+        "/cart",
+        f"/product/{(product_id + 1) % n_products}",
+        f"/product/{(product_id * 7 + 3) % n_products}",
+        f"/product/{product_id}?variant=small",
+        # Même page qu'un lien précédent, modulo la canonicalisation
+        f"/product/{(product_id + 1) % n_products}/?utm_source=related",
+    ]
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return (
+        "<html><head>"
+        f"<title>Product {product_id}</title>"
+        f'<meta name="description" content="Description of product {product_id}">'
+        "</head><body>"
+        '<table><tr class="feature">'
+        '<td class="feature-label">brand</td>'
+        f'<td class="feature-value">Brand {product_id % 10}</td>'
+        "</tr></table>"
+        f"{anchors}"
+        "</body></html>"
+    )
+
+
+def listing_page(n_products: int) -> str:
+    anchors = "".join(
+        f'<a href="/product/{i}">Product {i}</a>' for i in range(n_products)
+    )
+    return f"<html><head><title>Products</title></head><body>{anchors}</body></html>"
+
+
+@contextmanager
+def serve_catalogue(n_products: int = 500, latency: float = 0.05):
+    """
+    Local HTTP stand-in for web-scraping.dev.
+    Each response is delayed by `latency` seconds to simulate a network round trip.
+    """
+
+    class CatalogueHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 : connexions keep-alive (sans Nagle, comme un vrai serveur)
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            path = self.path.split("?", 1)[0]
+
+            if path == "/robots.txt":
+                body, content_type = ROBOTS_TXT, "text/plain"
+            elif path == "/products":
+                body, content_type = listing_page(n_products), "text/html"
+            elif path.startswith("/product/"):
+                product_id = int(path.rsplit("/", 1)[1])
+                body, content_type = product_page(product_id, n_products), "text/html"
+            else:
+                self.send_error(404)
+                return
+
+            payload = body.encode("utf-8")
+            etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("ETag", etag)
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                payload = gzip.compress(payload)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CatalogueHandler, bind_and_activate=False)
+    # File d'écoute plus large que le défaut (5) pour les crawls concurrents
+    server.request_queue_size = 128
+    server.server_bind()
+    server.server_activate()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_crawler(crawler) -> float:
+    """Crawl and return the throughput in pages/second"""
+
+    start = time.perf_counter()
+    results = crawler.run()
+    elapsed = time.perf_counter() - start
+    return len(results) / elapsed if elapsed else 0.0
+
+
+def compare_sequential_async(max_pages: int = 200, latency: float = 0.05):
+    """Throughput of `Crawler.run` vs `AsyncCrawler.run` on the local server"""
+
+    with serve_catalogue(latency=latency) as base_url:
+        seeds = [f"{base_url}/products"]
+
+        rate = bench_crawler(Crawler(seeds, max_pages=max_pages))
+        print(f"sequential            : {rate:8.1f} pages/s")
+
+        for concurrency in (4, 16, 32):
+            crawler = AsyncCrawler(seeds, max_pages=max_pages, concurrency=concurrency)
+            rate = bench_crawler(crawler)
+            print(f"async concurrency={concurrency:<3} : {rate:8.1f} pages/s")
+
+
+def bench_frontier(sizes=(10_000, 100_000, 1_000_000), n_hosts: int = 1000, n_pops: int = 2000):
+    """Cost of a pop as the frontier grows: `Frontier` vs the previous `list.pop(0)`"""
+
+    for size in sizes:
+        urls = [f"http://host{i % n_hosts}.test/product/{i}" for i in range(size)]
+
+        frontier = Frontier()
+        for url in urls:
+            frontier.push(url)
+        start = time.perf_counter()
+        for _ in range(n_pops):
+            frontier.pop()
+        frontier_ns = (time.perf_counter() - start) / n_pops * 1e9
+
+        queue = list(urls)
+        start = time.perf_counter()
+        for _ in range(n_pops):
+            queue.pop(0)
+        list_ns = (time.perf_counter() - start) / n_pops * 1e9
+
+        print(f"{size:>10} urls : Frontier {frontier_ns:8.0f} ns/pop | list.pop(0) {list_ns:10.0f} ns/pop")
+
+
+def catalogue_url(i: int) -> str:
+    return f"https://web-scraping.dev/product/{i // 12}?variant={('red', 'blue', 'green')[i % 3]}-{i % 4}"
+
+
+def bench_seen_set(sizes=(1_000_000, 10_000_000), error_rate: float = 0.001):
+    """Memory of the seen urls: `set` of strings vs `FingerprintSet` vs `ScalableBloomFilter`"""
+
+    for size in sizes:
+        urls = set()
+        for i in range(size):
+            urls.add(catalogue_url(i))
+        set_bytes = sys.getsizeof(urls) + sum(sys.getsizeof(u) for u in urls)
+        del urls
+
+        fingerprints = FingerprintSet()
+        bloom = ScalableBloomFilter(error_rate=error_rate)
+        start = time.perf_counter()
+        for i in range(size):
+            fingerprints.add(catalogue_url(i))
+        fingerprint_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(size):
+            bloom.add(catalogue_url(i))
+        bloom_s = time.perf_counter() - start
+
+        print(
+            f"{size:>10} urls : set {set_bytes / size:6.1f} B/url"
+            f" | FingerprintSet {fingerprints.memory_bytes() / size:5.1f} B/url ({fingerprint_s:5.1f}s)"
+            f" | Bloom p={error_rate} {bloom.memory_bytes() / size:5.1f} B/url ({bloom_s:5.1f}s)"
+        )
+
+
+def bench_http_client(n_requests: int = 500, latency: float = 0.0):
+    """Requests/second of `get_html_page` (urllib) vs the pooled `HttpClient`"""
+
+    with serve_catalogue(latency=latency) as base_url:
+        urls = [f"{base_url}/product/{i}" for i in range(n_requests)]
+
+        start = time.perf_counter()
+        for url in urls:
+            get_html_page(url)
+        urllib_rate = n_requests / (time.perf_counter() - start)
+
+        client = HttpClient()
+        start = time.perf_counter()
+        for url in urls:
+            client.get_html(url)
+        pooled_rate = n_requests / (time.perf_counter() - start)
+        client.close()
+
+        print(f"get_html_page (urllib) : {urllib_rate:8.1f} req/s")
+        print(f"HttpClient (keep-alive): {pooled_rate:8.1f} req/s")
+
+
+def bench_recrawl(max_pages: int = 200, latency: float = 0.02):
+    """Full crawl then incremental re-crawl with the conditional fetch cache"""
+
+    with serve_catalogue(latency=latency) as base_url, tempfile.TemporaryDirectory() as tmp:
+        seeds = [f"{base_url}/products"]
+        cache_path = os.path.join(tmp, "fetch_cache.db")
+
+        for label in ("first crawl", "re-crawl"):
+            crawler = AsyncCrawler(seeds, max_pages=max_pages, concurrency=16, fetch_cache_path=cache_path)
+            start = time.perf_counter()
+            results = crawler.run()
+            elapsed = time.perf_counter() - start
+            stats = crawler.fetch_cache.stats
+            print(
+                f"{label:<12}: {elapsed:5.2f}s, {len(results):4} pages emitted,"
+                f" {stats['not_modified']:4} not modified,"
+                f" {stats['bytes_saved'] / 1024:8.1f} KiB saved"
+            )
+
+
+# Pages aux cas limites : entités, commentaires, balises mal fermées, script, CDATA...
+EDGE_CASE_PAGES = [
+    '<link rel="canonical" href=" https://web-scraping.dev/product/1 "><a href="/a">x</a><a href="b?x=1">',
+    '<title> A &amp; B <!-- c --> &copy;&#65;&nosuch </title><meta name="description" content=" D ">',
+    '<meta name="og:description" content="E"><meta name=" description\n" content="D"><meta name="description">',
+    '<tr class="feature"><td class="feature-label"><b>Size</b> <br> XL</td><td class="feature-value">'
+    '<script>var x = "<td>";</script>1 &lt; 2</td></tr><tr class="feature x"><td class="feature-label">',
+    '<table><tr class="feature"><td class="feature-label">a</tr><td class="feature-value">b</td></table>',
+    '<script id="reviews-data" type="application/json">[{"rating": 5, "text": "ok"}]</script>',
+    '<div id="reviews-data"><span>[{"rating": 1}]</span></div><div id="reviews-data">[]</div>',
+    '<div id="reviews-data"><!--[1, 2]--></div><p/><img src=x></img><![CDATA[cdata]]><a href>',
+    '<div id="reviews-data">not json</div><template><a href="/t">t</a></template></br>',
+]
+
+
+def saved_page_html(page) -> str:
+    """
+    HTML of a saved page, in the web-scraping.dev layout: canonical link,
+    meta description, feature table, navigation links (relative on the
+    same host) and reviews as embedded JSON.
+    """
+
+    url = page["url"]
+    host = urlsplit(url).netloc
+    anchors = []
+    for link in page["links"]:
+        parts = urlsplit(link)
+        if parts.netloc == host:
+            link = parts.path + (f"?{parts.query}" if parts.query else "")
+        anchors.append(f'<li><a class="nav-link" href="{html.escape(link)}"><span>{html.escape(link)}</span></a></li>')
+    features = "".join(
+        '<tr class="feature">'
+        f'<td class="feature-label">{html.escape(label)}</td>'
+        f'<td class="feature-value"><span>{html.escape(value)}</span></td>'
+        "</tr>"
+        for label, value in page["product_features"].items()
+    )
+    reviews = json.dumps(page["product_reviews"]).replace("</", "<\\/")
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head>"
+        '<meta charset="utf-8">'
+        f"<title>{html.escape(page['title'])}</title>"
+        f'<meta name="description" content="{html.escape(page["description"])}">'
+        f'<link rel="canonical" href="{html.escape(url)}">'
+        '<style>.feature td { padding: 4px; }</style>'
+        "</head><body>"
+        f'<nav><ul>{"".join(anchors)}</ul></nav>'
+        "<!-- product -->"
+        f'<div class="product"><table class="table-product">{features}</table></div>'
+        f'<script id="reviews-data" type="application/json">{reviews}</script>'
+        "<script>window.dataLayer = [];</script>"
+        "</body></html>"
+    )
+
+
+def load_saved_pages(path: str = SAVED_PAGES_PATH):
+    """(html, saved dict) of each saved page"""
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [(saved_page_html(page), page) for page in json.load(f)]
+
+
+def check_parser(path: str = SAVED_PAGES_PATH) -> bool:
+    """
+    Golden-output check of `parse_html`: on the saved pages, every backend
+    must return the saved dict, and on the edge-case pages the dict of the
+    reference html.parser tree. Returns False on any mismatch.
+    """
+
+    saved = load_saved_pages(path)
+    reference = [parse_html(page, "html.parser") for page in EDGE_CASE_PAGES]
+
+    identical = True
+    for backend in PARSER_BACKENDS:
+        if backend not in AVAILABLE_BACKENDS:
+            print(f"{backend:<12}: skipped (package not installed)")
+            continue
+        saved_mismatches = sum(parse_html(page, backend) != expected for page, expected in saved)
+        edge_mismatches = sum(
+            parse_html(page, backend) != expected for page, expected in zip(EDGE_CASE_PAGES, reference)
+        )
+        print(
+            f"{backend:<12}: {saved_mismatches} / {len(saved)} saved pages"
+            f" and {edge_mismatches} / {len(EDGE_CASE_PAGES)} edge cases differ"
+        )
+        identical = identical and not saved_mismatches and not edge_mismatches
+    return identical
+
+
+def bench_parser(repeat: int = 20) -> bool:
+    """Pages/second of each `parse_html` backend on the saved pages, then the golden-output check"""
+
+    pages = [page for page, _ in load_saved_pages()]
+    for backend in AVAILABLE_BACKENDS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                parse_html(page, backend)
+        rate = repeat * len(pages) / (time.perf_counter() - start)
+        print(f"{backend:<12}: {rate:8.1f} pages/s")
+    return check_parser()
+
+
+def bench_parser_workers(max_pages: int = 400, workers=(1, 2, 4), backend: str = "html.parser"):
+    """
+    Pages/second of `AsyncCrawler` with inline parsing vs a pool of parser
+    processes, on the local server without latency (parsing-bound crawl).
+    """
+
+    print(f"{os.cpu_count()} CPU, parser_backend={backend!r}")
+    with serve_catalogue(latency=0.0) as base_url:
+        seeds = [f"{base_url}/products"]
+
+        crawler = AsyncCrawler(seeds, max_pages=max_pages, concurrency=16, parser_backend=backend)
+        print(f"inline parsing        : {bench_crawler(crawler):8.1f} pages/s")
+
+        for n_workers in workers:
+            crawler = AsyncCrawler(
+                seeds, max_pages=max_pages, concurrency=16,
+                parser_workers=n_workers, parser_backend=backend,
+            )
+            print(f"parser_workers={n_workers:<3}    : {bench_crawler(crawler):8.1f} pages/s")
+
+
+def bench_distributed(n_hosts: int = 8, max_pages: int = 400, latency: float = 0.02, workers=(1, 2, 4)):
+    """Pages/second of `Crawler` vs `DistributedCrawler` over several local hosts"""
+
+    with ExitStack() as stack:
+        seeds = [
+            stack.enter_context(serve_catalogue(n_products=200, latency=latency)) + "/products"
+            for _ in range(n_hosts)
+        ]
+
+        rate = bench_crawler(Crawler(seeds, max_pages=max_pages))
+        print(f"{n_hosts} hosts, sequential : {rate:8.1f} pages/s")
+
+        for n_workers in workers:
+            crawler = DistributedCrawler(seeds, n_workers=n_workers, max_pages=max_pages)
+            rate = bench_crawler(crawler)
+            print(
+                f"{n_hosts} hosts, {n_workers} workers  : {rate:8.1f} pages/s"
+                f" (pages by shard : {crawler.stats['pages_by_shard']})"
+            )
+
+
+def bench_metrics(max_pages: int = 500, repeat: int = 3):
+    """Overhead of the instrumentation: crawl without metrics vs with `Metrics`"""
+
+    with serve_catalogue(latency=0.0) as base_url:
+        seeds = [f"{base_url}/products"]
+        for label, make_metrics in (("disabled", lambda: None), ("enabled", Metrics)):
+            rates = [
+                bench_crawler(Crawler(seeds, max_pages=max_pages, metrics=make_metrics()))
+                for _ in range(repeat)
+            ]
+            print(f"metrics {label:<8} : {max(rates):8.1f} pages/s (best of {repeat})")
+
+        metrics = Metrics(reporters=[LogReporter()])
+        Crawler(seeds, max_pages=max_pages, metrics=metrics).run()
+
+
+BENCHMARKS = {
+    "crawl": compare_sequential_async,
+    "frontier": bench_frontier,
+    "seen": bench_seen_set,
+    "http": bench_http_client,
+    "recrawl": bench_recrawl,
+    "parse": bench_parser,
+    "pipeline": bench_parser_workers,
+    "distributed": bench_distributed,
+    "metrics": bench_metrics,
+}
+
+
+if __name__ == "__main__":
+    # python benchmark.py [nom ...] : tous les benchmarks par défaut.
+    # Code de sortie non nul si une vérification échoue
+    failed = [name for name in sys.argv[1:] or BENCHMARKS if BENCHMARKS[name]() is False]
+    if failed:
+        sys.exit(f"Vérification échouée : {', '.join(failed)}")
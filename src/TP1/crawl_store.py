@@ -0,0 +1,214 @@
+import json
+import sqlite3
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Tuple
+
+# États d'une url dans la table `urls`
+QUEUED = 0
+VISITED = 1
+
+
+class CrawlStore:
+    """
+    SQLite store of a crawl: visited / queued urls and parsed pages.
+
+    The queued urls are the durable copy of the frontier, so a crawl can be
+    resumed after a crash without re-fetching the pages already stored.
+    Writes are committed every `commit_every` operations (checkpoint).
+    """
+
+    def __init__(self, path: str, reset: bool = False, commit_every: int = 100):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending_writes = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url TEXT PRIMARY KEY, state INTEGER NOT NULL, depth INTEGER NOT NULL DEFAULT 0"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        if reset:
+            self.conn.execute("DELETE FROM urls")
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM counters")
+        self.conn.commit()
+
+        # Pages comptées dans max_pages, y compris celles non stockées (304) ;
+        # base d'une version précédente : nombre de pages stockées
+        row = self.conn.execute(
+            "SELECT value FROM counters WHERE name = 'pages_crawled'"
+        ).fetchone()
+        self.pages_crawled = row[0] if row is not None else self.count_pages()
+
+        self.visited = StoredVisited(self)
+        self.queued = StoredQueued(self)
+        self.pages = StoredPages(self)
+
+    def _written(self):
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        # Compteur enregistré dans la même transaction que les pages et urls visitées
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES ('pages_crawled', ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (self.pages_crawled,),
+        )
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def add_page(self, data: Dict[str, Any]):
+        self.conn.execute("INSERT INTO pages (data) VALUES (?)", (json.dumps(data),))
+        self._written()
+
+    def count_pages(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def load_pages(self) -> List[Dict[str, Any]]:
+        return list(self.pages)
+
+
+class StoredPages(Sequence):
+    """
+    List-like view of the stored pages, in crawl order. Pages are read from
+    the database on access, never all kept in memory.
+    """
+
+    def __init__(self, store: CrawlStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.count_pages()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        # Lecture par lots pour garder une mémoire bornée
+        cursor = self.store.conn.execute("SELECT data FROM pages ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(1_000)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield json.loads(data)
+
+    def _read(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self.store.conn.execute(
+            "SELECT data FROM pages ORDER BY id LIMIT ? OFFSET ?", (limit, offset)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._read(start, max(stop - start, 0))
+            return [self[i] for i in range(start, stop, step)]
+
+        if index < 0:
+            index += len(self)
+        page = self._read(index, 1) if index >= 0 else []
+        if not page:
+            raise IndexError("page index out of range")
+        return page[0]
+
+    def __repr__(self) -> str:
+        return f"<StoredPages of {self.store.path!r}: {len(self)} pages>"
+
+
+class StoredVisited:
+    """Set-like view of the visited urls"""
+
+    def __init__(self, store: CrawlStore):
+        self.store = store
+
+    def __contains__(self, url: str) -> bool:
+        row = self.store.conn.execute(
+            "SELECT 1 FROM urls WHERE url = ? AND state = ?", (url, VISITED)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.store.conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE state = ?", (VISITED,)
+        ).fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        # Lecture par lots pour garder une mémoire bornée
+        cursor = self.store.conn.execute(
+            "SELECT url FROM urls WHERE state = ?", (VISITED,)
+        )
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                return
+            for (url,) in rows:
+                yield url
+
+    def add(self, url: str):
+        self.store.conn.execute(
+            "INSERT INTO urls (url, state) VALUES (?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET state = excluded.state",
+            (url, VISITED),
+        )
+        self.store._written()
+
+
+class StoredQueued:
+    """Dict-like view of the queued urls (url -> depth)"""
+
+    def __init__(self, store: CrawlStore):
+        self.store = store
+
+    def __contains__(self, url: str) -> bool:
+        row = self.store.conn.execute(
+            "SELECT 1 FROM urls WHERE url = ? AND state = ?", (url, QUEUED)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.store.conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE state = ?", (QUEUED,)
+        ).fetchone()[0]
+
+    def __setitem__(self, url: str, depth: int):
+        self.store.conn.execute(
+            "INSERT INTO urls (url, state, depth) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET state = excluded.state, depth = excluded.depth",
+            (url, QUEUED, depth),
+        )
+        self.store._written()
+
+    def pop(self, url: str, default=None):
+        """
+        Depth of a queued url. The row is kept until the url is marked as
+        visited, so that a crash during the fetch re-queues it on resume.
+        """
+        row = self.store.conn.execute(
+            "SELECT depth FROM urls WHERE url = ? AND state = ?", (url, QUEUED)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        # Lecture par lots pour garder une mémoire bornée
+        cursor = self.store.conn.execute(
+            "SELECT url, depth FROM urls WHERE state = ?", (QUEUED,)
+        )
+        while True:
+            rows = cursor.fetchmany(10_000)
+            if not rows:
+                return
+            yield from rows
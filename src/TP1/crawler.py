@@ -1,9 +1,20 @@
+import os
 import time
-from urllib.parse import urljoin, urldefrag
+from collections import Counter
+from urllib.parse import urljoin
 
-from robots import is_authorized_to_parse
-from http_client import get_html_page
-from html_parser import parse_html
+from robots import RobotsCache
+from frontier import Frontier, BACKOFF_STATUSES, host_of, priority_token_scorer
+from crawl_store import CrawlStore
+from seen_set import FingerprintSet, ScalableBloomFilter
+from dedup import canonicalize_url, page_text, simhash, SimHashIndex
+from fetch_cache import FetchCache
+from http_client import HttpClient
+from html_parser import check_backend, parse_html
+from metrics import NULL_METRICS
+
+# Urls de la frontière gardées en mémoire par défaut avec un state_path (le reste sur disque)
+DEFAULT_FRONTIER_IN_MEMORY = 100_000
 
 
 class Crawler:
@@ -15,6 +26,21 @@ class Crawler:
         priority_token="product",
         sleep_seconds=0.0,
         timeout=10,
+        max_retries=2,
+        scorer=None,
+        host_budget=None,
+        max_frontier_in_memory=None,
+        state_path=None,
+        resume=False,
+        seen_set=None,
+        bloom_error_rate=0.001,
+        allowed_params=None,
+        near_duplicate_distance=None,
+        max_bytes=5 * 1024 * 1024,
+        fetch_cache_path=None,
+        parser_backend="fast",
+        sink=None,
+        metrics=None,
     ):
         self.seed_urls = seed_urls
         self.user_agent = user_agent
@@ -22,13 +48,104 @@ class Crawler:
         self.priority_token = priority_token
         self.sleep_seconds = sleep_seconds
         self.timeout = timeout
+        self.max_retries = max_retries
+        # Paramètres de requête conservés à la canonicalisation (None : tous sauf le tracking)
+        self.allowed_params = allowed_params
+        # Backend de parse_html : "fast" (une passe), "html.parser" ou "lxml" (vérifié dès maintenant)
+        check_backend(parser_backend)
+        self.parser_backend = parser_backend
+        # Sortie en flux (JsonlSink) : les pages ne sont plus gardées dans `results`
+        self.sink = sink
+
+        # Compteurs et histogrammes de latence (no-op si désactivé)
+        self.metrics = metrics or NULL_METRICS
+
+        # Connexions keep-alive réutilisées, une pool par hôte
+        # Chaque cible de redirection passe par le robots.txt avant d'être suivie
+        self.http = HttpClient(
+            user_agent=user_agent, timeout=timeout, max_bytes=max_bytes,
+            allow_redirect=self._redirect_allowed, metrics=self.metrics,
+        )
+
+        # Cache HTTP sur disque : re-crawl incrémental par requêtes conditionnelles
+        self.fetch_cache = FetchCache(fetch_cache_path) if fetch_cache_path else None
+
+        # robots.txt téléchargé une seule fois par hôte
+        self.robots = RobotsCache(user_agent=user_agent, timeout=timeout)
 
-        self.visited = set()
-        self.queued = set()
-        self.priority_queue = []
-        self.normal_queue = []
-        self.pages_crawled = 0
-        self.results = []
+        # Crawl persistant : frontière bornée en mémoire, débordement à côté de la base
+        overflow_dir = None
+        if state_path:
+            overflow_dir = os.path.dirname(os.path.abspath(state_path))
+            if max_frontier_in_memory is None:
+                max_frontier_in_memory = DEFAULT_FRONTIER_IN_MEMORY
+
+        # Frontière : une file par hôte, `sleep_seconds` entre deux requêtes sur un même hôte.
+        # Par défaut, les urls contenant `priority_token` passent en premier.
+        self.frontier = Frontier(
+            delay=sleep_seconds,
+            scorer=scorer or priority_token_scorer(priority_token),
+            host_budget=host_budget,
+            max_in_memory=max_frontier_in_memory,
+            overflow_dir=overflow_dir,
+        )
+        self.retries = {}
+
+        # Pages quasi identiques (SimHash) non indexées, si activé
+        self.near_duplicates = (
+            SimHashIndex(near_duplicate_distance)
+            if near_duplicate_distance is not None else None
+        )
+        self.stats = {
+            # liens réécrits par la canonicalisation
+            "urls_canonicalized": 0,
+            # liens réécrits retombant sur une url déjà connue : requêtes évitées
+            "canonical_duplicates": 0,
+            # pages dont le lien canonical était déjà crawlé
+            "canonical_link_duplicates": 0,
+            # pages quasi identiques à une page déjà indexée
+            "near_duplicates": 0,
+        }
+
+        if resume and not state_path:
+            raise ValueError("resume=True nécessite un state_path")
+        if seen_set not in (None, "fingerprint", "bloom"):
+            raise ValueError(f"seen_set inconnu : {seen_set}")
+        if seen_set and state_path:
+            raise ValueError("seen_set et state_path ne peuvent pas être combinés")
+
+        if state_path:
+            # Urls visitées / en attente et pages sur disque (SQLite)
+            self.store = CrawlStore(state_path, reset=not resume)
+            self.visited = self.store.visited
+            # url -> profondeur
+            self.queued = self.store.queued
+            # Pages lues dans la base à la demande, pas gardées en mémoire
+            self.results = self.store.pages
+            # Urls déjà admises avant la reprise : ni recomptées ni refusées par host_budget
+            for url, depth in self.queued.items():
+                self.frontier.push(url, depth, retry=True)
+            if host_budget is not None:
+                # Budget par hôte reconstruit depuis les urls visitées et en attente
+                admitted = Counter(host_of(url) for url in self.visited)
+                admitted.update(host_of(url) for url, _ in self.queued.items())
+                self.frontier.restore_admitted(admitted)
+        elif seen_set:
+            # Empreintes 64 bits des urls au lieu des chaînes complètes
+            self.store = None
+            if seen_set == "bloom":
+                self.visited = ScalableBloomFilter(error_rate=bloom_error_rate)
+            else:
+                self.visited = FingerprintSet()
+            self.queued = FingerprintSet()
+            self.results = []
+        else:
+            self.store = None
+            self.visited = set()
+            # url -> profondeur
+            self.queued = {}
+            self.results = []
+        self.pages_crawled = self.store.pages_crawled if self.store is not None else 0
 
         for url in seed_urls:
             self.add_url(url)
@@ -40,73 +157,270 @@ class Crawler:
             parsed = self.crawl_next()
             if parsed is None:  # plus rien à crawler
                 break
+            self.metrics.maybe_report()
+        self._shutdown()
+        self.metrics.report()
         return self.results
 
     def crawl_next(self):
         """Crawler la prochaine page"""
         
-        url = self._pop_next_url()
+        url, depth = self._pop_next_url()
+        self.metrics.set_gauge("frontier_size", len(self.frontier))
         if url is None:
             return None
 
-        self.queued.discard(url)
+        self.queued.pop(url, None)
 
         if url in self.visited:
             return {} 
 
         # robots
-        if not is_authorized_to_parse(url, self.user_agent):
-            self.visited.add(url)
+        if not self._apply_robots(url, *self._check_robots(url)):
             return {}
 
-        # On fait une pause
-        self._throttle()
-
         # fetch
-        html = get_html_page(url, user_agent=self.user_agent)
-        if not html:
+        status, html, cached_links, final_url = self._fetch(url)
+        self._apply_redirect(url, final_url)
+        self.frontier.report(url, status)
+        if self._retry_later(url, status, depth):
+            return {}
+
+        if cached_links is not None:
+            return self._handle_unchanged(url, cached_links, depth)
+        return self._handle_page(url, html, depth)
+
+    def _fetch(self, url: str):
+        """
+        Télécharger une page, par une requête conditionnelle si elle est en cache.
+        Retourne (status, html, cached_links, final_url) : `cached_links` n'est
+        pas None quand la page n'a pas changé depuis le dernier crawl (304), et
+        `final_url` est la dernière url téléchargée (cible des redirections).
+        """
+
+        with self.metrics.timer("fetch_seconds"):
+            return self._fetch_page(url)
+
+    def _fetch_page(self, url: str):
+
+        if self.fetch_cache is None:
+            response = self.http.try_get(url)
+            if response is None:
+                return None, None, None, url
+            return response.status, response.text, None, response.url
+
+        entry = self.fetch_cache.get(url)
+        headers = self.fetch_cache.conditional_headers(entry)
+        response = self.http.try_get(url, headers=headers)
+        if response is None:
+            return None, None, None, url
+
+        if response.status == 304 and headers:
+            self.fetch_cache.record_not_modified(url, entry, response.elapsed)
+            return response.status, None, entry["links"], response.url
+
+        if response.text is not None:
+            self.fetch_cache.record_response(url, response, conditional=bool(headers))
+        return response.status, response.text, None, response.url
+
+    def _check_robots(self, url: str):
+        """
+        Autorisation du robots.txt et Crawl-delay de l'hôte, rendu même pour
+        une url interdite : il s'applique aux autres urls de l'hôte
+        """
+
+        with self.metrics.timer("robots_check_seconds"):
+            return self.robots.is_allowed(url), self.robots.crawl_delay(url)
+
+    def _apply_robots(self, url: str, allowed: bool, crawl_delay) -> bool:
+        """
+        Appliquer le résultat de `_check_robots` : Crawl-delay de l'hôte, et
+        une url interdite est comptée et marquée visitée
+        """
+
+        self.frontier.set_crawl_delay(url, crawl_delay)
+        if not allowed:
+            self.metrics.inc("robots_disallowed")
             self.visited.add(url)
+        return allowed
+
+    def _apply_redirect(self, url: str, final_url: str):
+        """
+        Cible d'une redirection suivie : marquée visitée (elle n'est pas
+        retéléchargée si un lien y mène) et son hôte respecte son délai de politesse
+        """
+
+        if final_url == url:
+            return
+        self.visited.add(self._canonicalize(final_url))
+        self.frontier.record_fetch(final_url)
+
+    def _redirect_allowed(self, url: str) -> bool:
+        """Robots.txt check of a redirect target, before HttpClient follows it"""
+
+        if self.robots.is_allowed(url):
+            return True
+        self.metrics.inc("robots_disallowed")
+        return False
+
+    def _retry_later(self, url: str, status, depth: int = 0) -> bool:
+        """Remettre en file une page refusée par un hôte surchargé (429/503)"""
+
+        if status not in BACKOFF_STATUSES:
+            return False
+
+        retries = self.retries.get(url, 0)
+        if retries >= self.max_retries:
+            return False
+
+        # Url déjà admise : la remise en file ne consomme pas le budget de l'hôte
+        self.frontier.push(url, depth, retry=True)
+        self.retries[url] = retries + 1
+        self.metrics.inc("retries")
+        self.queued[url] = depth
+        return True
+
+    def _handle_page(self, url: str, html, depth: int = 0):
+        """Parser la page récupérée et ajouter ses liens aux fils d'attente"""
+
+        self.visited.add(url)
+        if not html:
             return {}
 
         # parse
-        data = parse_html(html)
+        with self.metrics.timer("parse_seconds"):
+            data = parse_html(html, self.parser_backend)
+        return self._handle_parsed(url, data, depth)
+
+    def _handle_parsed(self, url: str, data, depth: int = 0):
+        """Enregistrer une page parsée et ajouter ses liens aux fils d'attente"""
+
         data["url"] = data.get("url") or url
-        self.results.append(data)
+        if self.fetch_cache is not None:
+            self.fetch_cache.set_links(url, data.get("links", []))
+
+        # Lien canonical : la page a pu être crawlée sous une autre url
+        canonical = self._canonicalize(urljoin(url, data["url"]))
+        if canonical != url:
+            if canonical in self.visited:
+                self.stats["canonical_link_duplicates"] += 1
+                return {}
+            self.visited.add(canonical)
+
+        # Quasi-doublon d'une page déjà indexée : on suit ses liens sans l'indexer
+        if self._is_near_duplicate(data):
+            self.stats["near_duplicates"] += 1
+            self._add_links(url, data, depth)
+            return {}
+
+        # Avec une base, `results` est la vue de ses pages
+        if self.sink is not None:
+            self.sink.write(data)
+        elif self.store is None:
+            self.results.append(data)
+        if self.store is not None:
+            self.store.add_page(data)
+
+        self._count_page()
+        self.metrics.inc("pages")
+        self.metrics.inc("pages_by_host", label=host_of(url))
+        self._add_links(url, data, depth)
+
+        return data
+
+    def _handle_unchanged(self, url: str, links, depth: int = 0):
+        """Page inchangée depuis le dernier crawl : ni parsée ni émise, on suit ses liens"""
 
         self.visited.add(url)
+        self._count_page()
+        self.metrics.inc("not_modified")
+        self._add_links(url, {"links": links}, depth)
+        return {}
+
+    def _count_page(self):
+        """Une page de plus dans max_pages, enregistrée avec l'état du crawl"""
+
         self.pages_crawled += 1
+        if self.store is not None:
+            self.store.pages_crawled = self.pages_crawled
 
-        # add links
-        for link in data.get("links", []):
-            absolute = urljoin(url, link)
-            absolute, _ = urldefrag(absolute)
-            self.add_url(absolute)
+    def _add_links(self, url: str, data, depth: int):
+        with self.metrics.timer("enqueue_seconds"):
+            for link in data.get("links", []):
+                self.add_url(urljoin(url, link), depth + 1)
 
-        return data
+    def _is_near_duplicate(self, data) -> bool:
+        if self.near_duplicates is None:
+            return False
+
+        fingerprint = simhash(page_text(data))
+        if self.near_duplicates.find_near(fingerprint) is not None:
+            return True
+        self.near_duplicates.add(fingerprint)
+        return False
 
-    def add_url(self, url: str):
-        """Ajouter l'url à une des 2 fils d'attente selon sa priorité"""
+    def _canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, allowed_params=self.allowed_params)
 
-        url, _ = urldefrag(url)
+    def add_url(self, url: str, depth: int = 0):
+        """Ajouter l'url à la frontière, avec le score donné par le scorer"""
+
+        canonical = self._canonicalize(url)
 
         # On évite les doublons
-        if url in self.visited or url in self.queued:
+        if canonical in self.visited or canonical in self.queued:
+            if canonical != url:
+                self.stats["canonical_duplicates"] += 1
             return
+        if canonical != url:
+            self.stats["urls_canonicalized"] += 1
+        url = canonical
 
-        self.queued.add(url)
-
-        if self.priority_token in url:
-            self.priority_queue.append(url)
-        else:
-            self.normal_queue.append(url)
+        # Hôte ayant épuisé son budget : l'url est ignorée
+        if self.frontier.push(url, depth):
+            self.queued[url] = depth
 
     def _pop_next_url(self):
-        if self.priority_queue:
-            return self.priority_queue.pop(0)
-        if self.normal_queue:
-            return self.normal_queue.pop(0)
-        return None
-
-    def _throttle(self):
-        if self.sleep_seconds and self.sleep_seconds > 0:
-            time.sleep(self.sleep_seconds)
+        """Prochaine url d'un hôte prêt, en attendant son délai de politesse si besoin"""
+
+        while True:
+            url, depth, wait = self.frontier.pop()
+            if url is not None or wait is None:
+                return url, depth
+            time.sleep(wait)
+
+    def _shutdown(self):
+        """
+        Fin du crawl : état enregistré, connexions HTTP, cache HTTP et fichier
+        de débordement de la frontière fermés (une reprise la reconstruit depuis la base)
+        """
+
+        self._checkpoint()
+        self.http.close()
+        if self.fetch_cache is not None:
+            self.fetch_cache.close()
+        self.frontier.close()
+
+    def close(self):
+        """
+        Release every resource of the crawler, including the crawl store:
+        `results` can no longer be read when it is a view of the store.
+        """
+
+        self._shutdown()
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _checkpoint(self):
+        """Enregistrer l'état du crawl sur disque"""
+
+        if self.store is not None:
+            self.store.commit()
+        if self.sink is not None:
+            self.sink.sync()
@@ -0,0 +1,137 @@
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Paramètres de suivi ignorés par défaut (ils ne changent pas le contenu)
+TRACKING_PARAMS = {
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(
+    url: str,
+    allowed_params: Optional[Iterable[str]] = None,
+    ignored_params: Iterable[str] = TRACKING_PARAMS,
+    strip_trailing_slash: bool = True,
+) -> str:
+    """
+    Canonical form of an url, so that the same page is enqueued only once:
+
+    * lowercase scheme and host, default port removed, fragment removed ;
+    * trailing slash removed (except for the root path) ;
+    * query parameters filtered (whitelist `allowed_params` if given,
+      otherwise `ignored_params` are dropped) and sorted.
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").lower()
+    if ":" in host:  # IPv6
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{credentials}@{host}"
+
+    path = parts.path or "/"
+    if strip_trailing_slash and len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if allowed_params is not None:
+        allowed = set(allowed_params)
+        params = [(k, v) for k, v in params if k in allowed]
+    else:
+        ignored = set(ignored_params)
+        params = [(k, v) for k, v in params if k not in ignored]
+    query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def page_text(data: Dict[str, Any]) -> str:
+    """Text content of a parsed page (title, description, features, reviews)"""
+
+    parts = [data.get("title") or "", data.get("description") or ""]
+    parts.extend(str(v) for v in (data.get("product_features") or {}).values())
+    for review in data.get("product_reviews") or []:
+        if isinstance(review, dict):
+            parts.append(str(review.get("text") or ""))
+    return " ".join(parts)
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of a text, over word shingles"""
+
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [
+            " ".join(words[i:i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    weights = [0] * 64
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        for bit in range(64):
+            if h >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class SimHashIndex:
+    """
+    SimHash fingerprints of the pages already seen, to find near-duplicates
+    (Hamming distance <= `max_distance`).
+
+    The 64 bits are split into `max_distance + 1` bands: two fingerprints
+    within the distance share at least one identical band (pigeonhole), so
+    only the fingerprints of the matching buckets are compared.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        n_bands = max_distance + 1
+        width = 64 // n_bands
+        self._bands = [
+            (i * width, (64 - i * width) if i == n_bands - 1 else width)
+            for i in range(n_bands)
+        ]
+        self._buckets = [{} for _ in self._bands]
+
+    def _keys(self, fingerprint: int):
+        for start, width in self._bands:
+            yield (fingerprint >> start) & ((1 << width) - 1)
+
+    def find_near(self, fingerprint: int) -> Optional[int]:
+        """A fingerprint within `max_distance` of `fingerprint`, if any"""
+
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            for candidate in buckets.get(key, ()):
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int):
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            buckets.setdefault(key, []).append(fingerprint)
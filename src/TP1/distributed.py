@@ -0,0 +1,252 @@
+import hashlib
+import multiprocessing
+import queue
+import time
+
+from crawler import Crawler
+from frontier import host_of
+
+
+def shard_of(url: str, n_shards: int) -> int:
+    """Shard owning an url: stable hash of its host (same on every process / node)"""
+
+    digest = hashlib.blake2b(host_of(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n_shards
+
+
+class PageBudget:
+    """
+    Page budget shared by the workers (`multiprocessing.Value`): a worker
+    reserves a page before each fetch and releases it if no page was
+    emitted, so the workers never fetch more than `max_pages` pages.
+    """
+
+    def __init__(self, max_pages: int, context=multiprocessing):
+        self.max_pages = max_pages
+        # Pages émises + pages en cours de crawl
+        self._used = context.Value("i", 0)
+
+    def reserve(self) -> bool:
+        with self._used.get_lock():
+            if self._used.value >= self.max_pages:
+                return False
+            self._used.value += 1
+            return True
+
+    def release(self):
+        with self._used.get_lock():
+            self._used.value -= 1
+
+
+class QueueSink:
+    """Sink sending the parsed pages of a worker to the coordinator"""
+
+    def __init__(self, shard: int, outbox):
+        self.shard = shard
+        self.outbox = outbox
+        self.pages_sent = 0
+
+    def write(self, data):
+        self.outbox.put(("page", self.shard, data))
+        self.pages_sent += 1
+
+    def sync(self):
+        pass
+
+
+class ShardCrawler(Crawler):
+    """
+    Crawler of one shard: it only fetches the urls of its hosts, the links
+    to the other shards are batched and sent to the coordinator.
+
+    Its frontier, visited / queued sets and robots cache therefore only
+    hold the hosts of the shard.
+    """
+
+    def __init__(self, shard: int, n_shards: int, outbox, **kwargs):
+        self.shard = shard
+        self.n_shards = n_shards
+        self.outbox = outbox
+        # shard -> [(url, profondeur)] en attente d'envoi
+        self.outgoing = {}
+        super().__init__(seed_urls=[], sink=QueueSink(shard, outbox), **kwargs)
+
+    def add_url(self, url: str, depth: int = 0):
+        canonical = self._canonicalize(url)
+        shard = shard_of(canonical, self.n_shards)
+        if shard == self.shard:
+            super().add_url(url, depth)
+        else:
+            self.outgoing.setdefault(shard, []).append((canonical, depth))
+
+    def send_links(self):
+        """Send the pending links, one message per destination shard"""
+
+        for shard, links in self.outgoing.items():
+            self.outbox.put(("links", shard, links))
+        self.outgoing = {}
+
+
+def _run_worker(shard: int, n_shards: int, inbox, outbox, budget: PageBudget, crawler_kwargs):
+    """Boucle d'un worker : crawler son shard, recevoir les urls des autres shards"""
+
+    crawler = ShardCrawler(shard, n_shards, outbox, **crawler_kwargs)
+    # Nombre de lots d'urls reçus, pour la détection de fin du coordinateur
+    consumed = 0
+    idle = False
+
+    while True:
+        try:
+            # Sans travail, on attend un message ; sinon on les lit sans bloquer
+            message = inbox.get() if idle else inbox.get_nowait()
+        except queue.Empty:
+            message = None
+
+        if message is not None:
+            if message[0] == "stop":
+                break
+            for url, depth in message[1]:
+                crawler.add_url(url, depth)
+            consumed += 1
+            idle = False
+            continue
+
+        # Budget atteint (pages en cours comprises) : on attend l'arrêt du
+        # coordinateur, ou une page libérée par un autre worker
+        if not budget.reserve():
+            time.sleep(0.01)
+            continue
+        pages_sent = crawler.sink.pages_sent
+        try:
+            parsed = crawler.crawl_next()
+        except Exception as e:
+            print(f"Erreur dans le shard {shard} : {e}")
+            parsed = {}
+        if crawler.sink.pages_sent == pages_sent:
+            budget.release()
+        crawler.send_links()
+
+        if parsed is None:  # frontière du shard vide
+            idle = True
+            outbox.put(("idle", shard, consumed))
+
+    crawler._shutdown()
+
+
+class DistributedCrawler:
+    """
+    Coordinator / workers crawl: urls are sharded by host hash over
+    `n_workers` processes, each one running a `ShardCrawler` with its own
+    frontier and visited set.
+
+    The transport is a set of `multiprocessing` queues (one inbox per
+    worker, one outbox to the coordinator): links discovered by a worker
+    are routed by the coordinator to the inbox of the owning shard, and
+    parsed pages come back to the coordinator, which keeps them in
+    `results` or writes them to `sink`. Replacing the queues by a network
+    broker spreads the workers over several machines.
+
+    The crawl ends at `max_pages` or when every worker is idle and has
+    consumed every batch of urls routed to it. The page budget is shared by
+    the workers (`PageBudget`), so they stop fetching at `max_pages` pages.
+    """
+
+    def __init__(self, seed_urls, n_workers=4, max_pages=50, sink=None, **crawler_kwargs):
+        self.seed_urls = seed_urls
+        self.n_workers = n_workers
+        self.max_pages = max_pages
+        self.sink = sink
+        # Paramètres transmis au Crawler de chaque shard (hors max_pages)
+        self.crawler_kwargs = crawler_kwargs
+
+        self.results = []
+        self.pages_crawled = 0
+        self.stats = {
+            "pages_by_shard": [0] * n_workers,
+            "batches_routed": 0,
+            "links_routed": 0,
+        }
+
+    def run(self):
+        """Lancer les workers et coordonner le crawl (bloquant)"""
+
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for _ in range(self.n_workers)]
+        outbox = context.Queue()
+        budget = PageBudget(self.max_pages, context)
+        workers = [
+            context.Process(
+                target=_run_worker,
+                args=(shard, self.n_workers, inboxes[shard], outbox, budget, self.crawler_kwargs),
+                daemon=True,
+            )
+            for shard in range(self.n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Lots envoyés à chaque shard et dernier état "idle" reçu de chacun
+        routed = [0] * self.n_workers
+        idle = [None] * self.n_workers
+
+        def route(shard, links):
+            inboxes[shard].put(("urls", links))
+            routed[shard] += 1
+
+        seeds = {}
+        for url in self.seed_urls:
+            seeds.setdefault(shard_of(url, self.n_workers), []).append((url, 0))
+        for shard, links in seeds.items():
+            route(shard, links)
+
+        try:
+            while self.pages_crawled < self.max_pages:
+                # Tous les shards inactifs sans lot en attente : crawl terminé
+                if all(idle[i] == routed[i] for i in range(self.n_workers)):
+                    break
+                try:
+                    message = outbox.get(timeout=1.0)
+                except queue.Empty:
+                    dead = [i for i, w in enumerate(workers) if not w.is_alive()]
+                    if dead:
+                        raise RuntimeError(f"Workers arrêtés : {dead}")
+                    continue
+
+                kind = message[0]
+                if kind == "page":
+                    self._collect(message[1], message[2])
+                elif kind == "links":
+                    _, shard, links = message
+                    route(shard, links)
+                    self.stats["batches_routed"] += 1
+                    self.stats["links_routed"] += len(links)
+                elif kind == "idle":
+                    _, shard, consumed = message
+                    idle[shard] = consumed
+        finally:
+            for inbox in inboxes:
+                inbox.put(("stop",))
+            # On vide la file de sortie : un worker ne se termine qu'une fois ses messages envoyés
+            while any(worker.is_alive() for worker in workers):
+                try:
+                    message = outbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if message[0] == "page":
+                    self._collect(message[1], message[2])
+            for worker in workers:
+                worker.join()
+
+        if self.sink is not None:
+            self.sink.sync()
+        return self.results
+
+    def _collect(self, shard: int, data):
+        if self.pages_crawled >= self.max_pages:
+            return
+        self.pages_crawled += 1
+        self.stats["pages_by_shard"][shard] += 1
+        if self.sink is not None:
+            self.sink.write(data)
+        else:
+            self.results.append(data)
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FetchCache:
+    """
+    On-disk HTTP cache of the fetched pages, keyed by canonical url.
+
+    Each entry stores the body, the `ETag` / `Last-Modified` validators,
+    the fetch time and the links of the page, so that an incremental
+    re-crawl sends conditional requests and, on `304 Not Modified`, follows
+    the cached links without re-parsing the page.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Accès depuis les threads de l'AsyncCrawler : une connexion protégée par un verrou
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at REAL, "
+            "elapsed REAL, body TEXT, links TEXT"
+            ") WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+        self.stats = {
+            "conditional_requests": 0,
+            "not_modified": 0,
+            "modified": 0,
+            "new": 0,
+            "bytes_saved": 0,
+            "time_saved": 0.0,
+        }
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, fetched_at, elapsed, body, links "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified, fetched_at, elapsed, body, links = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+            "elapsed": elapsed,
+            "body": body,
+            "links": json.loads(links) if links else None,
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers of a cached entry"""
+
+        headers = {}
+        if entry and entry["links"] is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_not_modified(self, url: str, entry: Dict[str, Any], elapsed: float):
+        """A 304 response: the cached page is still valid"""
+
+        with self._lock:
+            self.stats["conditional_requests"] += 1
+            self.stats["not_modified"] += 1
+            self.stats["bytes_saved"] += len((entry["body"] or "").encode("utf-8"))
+            self.stats["time_saved"] += max((entry["elapsed"] or 0.0) - elapsed, 0.0)
+            self.conn.execute(
+                "UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self.conn.commit()
+
+    def record_response(self, url: str, response, conditional: bool):
+        """A full response: store its body and validators (links come after parsing)"""
+
+        with self._lock:
+            if conditional:
+                self.stats["conditional_requests"] += 1
+                self.stats["modified"] += 1
+            else:
+                self.stats["new"] += 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, etag, last_modified, fetched_at, elapsed, body, links) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL)",
+                (
+                    url,
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                    time.time(),
+                    response.elapsed,
+                    response.text,
+                ),
+            )
+            self.conn.commit()
+
+    def set_links(self, url: str, links: List[str]):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE pages SET links = ? WHERE url = ?", (json.dumps(links), url)
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
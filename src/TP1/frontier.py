@@ -0,0 +1,336 @@
+import heapq
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+# Réponses signalant un hôte surchargé : on ralentit
+BACKOFF_STATUSES = (429, 503)
+
+# Un scorer associe un score à une url découverte à une profondeur donnée :
+# les urls de plus haut score d'un hôte sont servies en premier.
+Scorer = Callable[[str, int], float]
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def priority_token_scorer(token: str, weight: float = 1.0) -> Scorer:
+    """Score `weight` for the urls containing `token`, 0 otherwise"""
+
+    def score(url: str, depth: int) -> float:
+        return weight if token and token in url else 0.0
+    return score
+
+
+def depth_scorer(weight: float = 0.1) -> Scorer:
+    """Penalize the urls far from the seeds"""
+
+    def score(url: str, depth: int) -> float:
+        return -weight * depth
+    return score
+
+
+def pattern_scorer(patterns: Dict[str, float]) -> Scorer:
+    """Add the weight of every regex pattern matching the url"""
+
+    compiled = [(re.compile(p), w) for p, w in patterns.items()]
+
+    def score(url: str, depth: int) -> float:
+        return sum(w for regex, w in compiled if regex.search(url))
+    return score
+
+
+def combine_scorers(*scorers: Scorer) -> Scorer:
+    """Sum of several scorers"""
+
+    def score(url: str, depth: int) -> float:
+        return sum(s(url, depth) for s in scorers)
+    return score
+
+
+class Frontier:
+    """
+    URL frontier with per-host politeness and pluggable priority scoring.
+
+    Each host has its own heap of urls ordered by score (FIFO among equal
+    scores) and a next-allowed fetch time. `pop` returns the best url of
+    whichever ready host has the highest score, so the overall throughput
+    grows with the number of hosts while each host is fetched at most once
+    every `delay` seconds (or its robots.txt `Crawl-delay`).
+
+    Push and pop are O(log n). Beyond `max_in_memory` urls, new urls are
+    spilled to an append-only file and reloaded in batches once the
+    in-memory part has drained, so memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        max_backoff: float = 60.0,
+        scorer: Optional[Scorer] = None,
+        host_budget: Optional[int] = None,
+        max_in_memory: Optional[int] = None,
+        overflow_dir: Optional[str] = None,
+    ):
+        self.delay = delay
+        self.max_backoff = max_backoff
+        self.scorer = scorer or priority_token_scorer("product")
+        self.host_budget = host_budget
+        self.max_in_memory = max_in_memory
+        self.overflow_dir = overflow_dir
+
+        # host -> état de l'hôte (urls, prochaine requête autorisée, back-off)
+        self.hosts = {}
+        # Hôtes en attente de leur prochaine requête : (next_fetch, host)
+        self._waiting = []
+        # Hôtes prêts, par meilleur score : (-score, seq, ready_token, host)
+        self._ready = []
+        self._seq = itertools.count()
+        self._in_memory = 0
+
+        # Débordement sur disque
+        self._overflow_path = None
+        self._overflow_writer = None
+        self._overflow_offset = 0
+        self._overflow_size = 0
+
+    def __len__(self):
+        return self._in_memory + self._overflow_size
+
+    def _host_state(self, host: str) -> dict:
+        state = self.hosts.get(host)
+        if state is None:
+            state = {
+                "urls": [],
+                "admitted": 0,
+                "next_fetch": 0.0,
+                "last_fetch": None,
+                "scheduled": None,
+                "ready": False,
+                "ready_token": 0,
+                "crawl_delay": None,
+                "backoff": 0.0,
+            }
+            self.hosts[host] = state
+        return state
+
+    def _host_delay(self, state: dict) -> float:
+        """Delay between two fetches on a host: configured rate, Crawl-delay, back-off"""
+
+        delay = max(self.delay, state["crawl_delay"] or 0.0)
+        return max(delay, state["backoff"])
+
+    def _schedule(self, host: str, state: dict):
+        """Put a host with pending urls in the waiting heap"""
+
+        state["ready"] = False
+        state["scheduled"] = state["next_fetch"]
+        heapq.heappush(self._waiting, (state["next_fetch"], host))
+
+    def _mark_ready(self, host: str, state: dict):
+        best_score = -state["urls"][0][0]
+        heapq.heappush(self._ready, (-best_score, next(self._seq), state["ready_token"], host))
+
+    def _promote(self, now: float):
+        """Move the hosts whose next-allowed fetch time has passed to the ready heap"""
+
+        while self._waiting and self._waiting[0][0] <= now:
+            next_fetch, host = heapq.heappop(self._waiting)
+            state = self.hosts[host]
+            # Entrée obsolète (hôte reprogrammé entre-temps)
+            if state["scheduled"] != next_fetch:
+                continue
+            state["scheduled"] = None
+            state["ready"] = True
+            state["ready_token"] += 1
+            self._mark_ready(host, state)
+
+    def push(self, url: str, depth: int = 0, retry: bool = False) -> bool:
+        """
+        Add an url to the heap of its host.
+        Returns False if the host has exhausted its `host_budget`. A `retry`
+        (url already admitted: re-queued after a 429/503, or restored on
+        resume) is not charged against the budget.
+        """
+
+        host = host_of(url)
+        state = self._host_state(host)
+        if not retry:
+            if self.host_budget is not None and state["admitted"] >= self.host_budget:
+                return False
+            state["admitted"] += 1
+
+        if self.max_in_memory is not None and self._in_memory >= self.max_in_memory:
+            self._spill(url, depth)
+        else:
+            self._push_in_memory(host, state, url, depth)
+        return True
+
+    def _push_in_memory(self, host: str, state: dict, url: str, depth: int):
+        score = self.scorer(url, depth)
+        had_work = bool(state["urls"])
+        heapq.heappush(state["urls"], (-score, next(self._seq), depth, url))
+        self._in_memory += 1
+
+        if not had_work:
+            self._schedule(host, state)
+        elif state["ready"] and state["urls"][0][3] == url:
+            # L'hôte est prêt et sa meilleure url vient de changer
+            self._mark_ready(host, state)
+
+    def pop(self, now: Optional[float] = None) -> Tuple[Optional[str], int, Optional[float]]:
+        """
+        Pop the best url of a ready host, as (url, depth, wait).
+
+        `url` is None when every host with pending urls is still in its
+        politeness delay (`wait` is then the number of seconds to wait) or
+        when the frontier is empty (`wait` is None).
+        """
+
+        now = time.monotonic() if now is None else now
+        self._promote(now)
+        if not self._ready and self._overflow_size:
+            # Aucun hôte prêt en mémoire : les urls débordées peuvent en contenir
+            self._refill(eager=True)
+            self._promote(now)
+
+        while self._ready:
+            _, _, ready_token, host = heapq.heappop(self._ready)
+            state = self.hosts[host]
+            # Entrée obsolète : hôte déjà servi depuis qu'il est prêt
+            if not state["ready"] or ready_token != state["ready_token"]:
+                continue
+
+            _, _, depth, url = heapq.heappop(state["urls"])
+            self._in_memory -= 1
+
+            # Prochaine requête autorisée sur cet hôte
+            state["last_fetch"] = now
+            state["next_fetch"] = now + self._host_delay(state)
+            if state["urls"]:
+                self._schedule(host, state)
+            else:
+                state["ready"] = False
+
+            self._refill()
+            return url, depth, None
+
+        if self._waiting:
+            return None, 0, max(self._waiting[0][0] - now, 0.0)
+        return None, 0, None
+
+    def restore_admitted(self, counts: Dict[str, int]):
+        """Charge urls admitted before a resume against the `host_budget` of their host"""
+
+        for host, count in counts.items():
+            self._host_state(host)["admitted"] += count
+
+    def _spill(self, url: str, depth: int):
+        """Write an url to the overflow file"""
+
+        if self._overflow_writer is None:
+            fd, self._overflow_path = tempfile.mkstemp(
+                prefix="frontier-", suffix=".jsonl", dir=self.overflow_dir
+            )
+            self._overflow_writer = os.fdopen(fd, "w", encoding="utf-8")
+        self._overflow_writer.write(json.dumps([url, depth]) + "\n")
+        self._overflow_size += 1
+
+    def _refill(self, eager: bool = False):
+        """Reload spilled urls once the in-memory part is half empty (not full if `eager`)"""
+
+        if not self._overflow_size:
+            return
+        threshold = max(self.max_in_memory - 1, 0) if eager else self.max_in_memory // 2
+        if self._in_memory > threshold:
+            return
+
+        self._overflow_writer.flush()
+        batch = max(self.max_in_memory - self._in_memory, 1)
+        with open(self._overflow_path, "r", encoding="utf-8") as f:
+            f.seek(self._overflow_offset)
+            for _ in range(min(batch, self._overflow_size)):
+                url, depth = json.loads(f.readline())
+                host = host_of(url)
+                self._push_in_memory(host, self._host_state(host), url, depth)
+                self._overflow_size -= 1
+            self._overflow_offset = f.tell()
+
+        # Fichier entièrement relu : on repart d'un fichier vide
+        if not self._overflow_size:
+            self.close()
+
+    def close(self):
+        """Remove the overflow file"""
+
+        if self._overflow_writer is not None:
+            self._overflow_writer.close()
+            os.remove(self._overflow_path)
+        self._overflow_writer = None
+        self._overflow_path = None
+        self._overflow_offset = 0
+        self._overflow_size = 0
+
+    def set_crawl_delay(self, url: str, crawl_delay: Optional[float]):
+        """
+        Record the robots.txt Crawl-delay of the host of `url`. It is usually
+        known after the first fetch of the host, whose next fetch is then
+        pushed back to at least `Crawl-delay` seconds after that fetch.
+        """
+
+        host = host_of(url)
+        state = self._host_state(host)
+        state["crawl_delay"] = crawl_delay
+        if state["last_fetch"] is None:
+            return
+        next_fetch = state["last_fetch"] + self._host_delay(state)
+        if next_fetch > state["next_fetch"]:
+            state["next_fetch"] = next_fetch
+            # On reprogramme l'hôte s'il avait déjà des urls en attente
+            if state["urls"]:
+                self._schedule(host, state)
+
+    def record_fetch(self, url: str, now: Optional[float] = None):
+        """
+        Record a fetch of `url` made outside `pop` (target of a redirect):
+        its host waits for its delay before its next url.
+        """
+
+        now = time.monotonic() if now is None else now
+        host = host_of(url)
+        state = self._host_state(host)
+        state["last_fetch"] = now
+        next_fetch = now + self._host_delay(state)
+        if next_fetch > state["next_fetch"]:
+            state["next_fetch"] = next_fetch
+            # On reprogramme l'hôte s'il avait déjà des urls en attente
+            if state["urls"]:
+                self._schedule(host, state)
+
+    def report(self, url: str, status: Optional[int], now: Optional[float] = None):
+        """
+        Adapt the rate of a host to the status of its last response:
+        exponential back-off on 429/503, progressive recovery otherwise.
+        """
+
+        now = time.monotonic() if now is None else now
+        host = host_of(url)
+        state = self._host_state(host)
+
+        if status in BACKOFF_STATUSES:
+            state["backoff"] = min(self.max_backoff, max(2 * state["backoff"], 1.0))
+            state["next_fetch"] = max(state["next_fetch"], now + self._host_delay(state))
+            # On repousse l'hôte s'il avait déjà été programmé
+            if state["urls"]:
+                self._schedule(host, state)
+        elif state["backoff"]:
+            state["backoff"] /= 2
+            if state["backoff"] < 0.5:
+                state["backoff"] = 0.0
@@ -1,9 +1,63 @@
 from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+from html.parser import HTMLParser
 from urllib.parse import urljoin
 import json
+import re
 
-def parse_html(html: str):
-    soup = BeautifulSoup(html, "html.parser")
+try:
+    import lxml  # noqa: F401
+except ImportError:  # lxml est optionnel
+    lxml = None
+
+
+# Backends de parse_html : "fast" (extracteur en une passe), "html.parser" (arbre
+# BeautifulSoup, comportement historique) et "lxml" (arbre BeautifulSoup construit par lxml)
+PARSER_BACKENDS = ("fast", "html.parser", "lxml")
+# Backends utilisables : "lxml" seulement si le paquet est installé
+AVAILABLE_BACKENDS = tuple(b for b in PARSER_BACKENDS if b != "lxml" or lxml is not None)
+
+# Éléments vides, fermés dès leur balise ouvrante (comme dans BeautifulSoup)
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+# Éléments dont le texte n'est pas du contenu (exclu de get_text)
+STRING_CONTAINERS = frozenset({"rt", "rp", "style", "script", "template"})
+
+# Type des chaînes : contenu principal, ou autre (commentaire, doctype...)
+MAIN = ""
+OTHER = None
+
+
+def parse_html(html: str, backend: str = "fast"):
+    """
+    Extract the canonical url, title, description, product features, links
+    and reviews of a page.
+
+    `backend="fast"` runs the single-pass extractor; "html.parser" and "lxml"
+    build a BeautifulSoup tree. "lxml" raises ImportError if lxml is missing.
+    """
+
+    if backend == "fast":
+        return parse_html_fast(html)
+    check_backend(backend)
+    return parse_html_soup(html, backend)
+
+
+def check_backend(backend: str):
+    """Raise if `backend` is unknown, or is "lxml" without the lxml package"""
+
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Backend inconnu : {backend!r} (attendu : {', '.join(PARSER_BACKENDS)})")
+    if backend == "lxml" and lxml is None:
+        raise ImportError("Backend 'lxml' : le paquet lxml n'est pas installé (pip install lxml)")
+
+
+def parse_html_soup(html: str, features: str = "html.parser"):
+    soup = BeautifulSoup(html, features)
 
     # URL : canonical si présent
     canonical = soup.select_one('link[rel="canonical"]')
@@ -13,7 +67,8 @@ def parse_html(html: str):
     title = soup.title.get_text(strip=True) if soup.title else ""
 
     # Description (meta)
-    desc_tag = soup.select_one('meta[name="description"]')
+    # Nom comparé sans les blancs autour (ex. name="description\n")
+    desc_tag = soup.find("meta", attrs={"name": lambda name: name is not None and name.strip() == "description"})
     description = desc_tag.get("content", "").strip() if desc_tag else ""
 
     # Product features
@@ -26,7 +81,7 @@ def parse_html(html: str):
             v = value.get_text(" ", strip=True)
             product_features[k] = v
 
-    # Links 
+    # Links
     links = []
     base_for_join = url or ""  # si on a canonical, on peut joindre les liens relatifs
     for a in soup.find_all("a", href=True):
@@ -52,3 +107,268 @@ def parse_html(html: str):
         "links": links,
         "product_reviews": product_reviews,
     }
+
+
+def parse_html_fast(html: str):
+    """Same dict as `parse_html_soup(html, "html.parser")`, without building a tree"""
+
+    extractor = ProductPageExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.result()
+
+
+class ProductPageExtractor(HTMLParser):
+    """
+    Single-pass extractor over the `html.parser` events.
+
+    It reproduces the tree BeautifulSoup would build (void elements, end
+    tags closing up to the matching open tag, text merged between two tags,
+    script / style text excluded from get_text) but only keeps the elements
+    read by `parse_html`, so no tree and no CSS selector pass is needed.
+    Each special element is kept on a stack with its depth and released
+    when the element is closed.
+    """
+
+    _DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+    _HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+    def __init__(self):
+        # Entités décodées par nos soins, comme BeautifulSoup
+        super().__init__(convert_charrefs=False)
+
+        # Éléments ouverts et nombre d'éléments ouverts par nom
+        self._stack = []
+        self._open_counts = {}
+        # Éléments vides fermés d'office : leur balise fermante est ignorée
+        self._closed_void = []
+        # Texte en cours, jusqu'à la prochaine balise
+        self._data = []
+
+        # Piles (profondeur, ...) des éléments suivis
+        self._containers = []
+        self._collecting = []
+        self._open_rows = []
+        self._capture = []
+
+        self.canonical = None
+        self.canonical_found = False
+        self.description = None
+        self.title = None
+        self.rows = []
+        self.links = []
+        self.reviews = None
+
+    # --- Événements html.parser -------------------------------------------
+
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._flush()
+        self._stack.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        depth = len(self._stack)
+
+        if tag in STRING_CONTAINERS:
+            self._containers.append((depth, tag))
+        if self._capture:
+            children = []
+            self._capture[-1][1].append(children)
+            self._capture.append((depth, children))
+        if attrs or tag == "title":
+            self._inspect(tag, attrs, depth)
+
+        if handle_empty_element and tag in VOID_ELEMENTS:
+            self._pop_to(tag)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # <tag/> : ouverture puis fermeture
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        base, regex = 10, self._DECIMAL_REFERENCE
+        if name.startswith(("x", "X")):
+            name, base, regex = name[1:], 16, self._HEX_REFERENCE
+
+        code, extra = None, ""
+        try:
+            code = int(name, base)
+        except ValueError:
+            match = regex.search(name)
+            if match is not None:
+                code, extra = int(match.group(1), base), match.group(2)
+        if code is None:
+            self._data.append(name)
+            return
+        self._data.append(UnicodeDammit.numeric_character_reference(code)[0])
+        self._data.append(extra)
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._data.append(character if character is not None else "&" + name)
+
+    def handle_comment(self, data):
+        self._flush()
+        self._data.append(data)
+        self._flush(OTHER)
+
+    def handle_decl(self, decl):
+        self._flush()
+        self._data.append(decl[len("DOCTYPE "):])
+        self._flush(OTHER)
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[len("CDATA["):])
+            self._flush(MAIN)
+        else:
+            self._data.append(data)
+            self._flush(OTHER)
+
+    def handle_pi(self, data):
+        self._flush()
+        self._data.append(data)
+        self._flush(OTHER)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    # --- Arbre implicite ----------------------------------------------------
+
+    def _inspect(self, tag, attrs, depth):
+        """Record the elements read by parse_html"""
+
+        attributes = {}
+        for key, value in attrs:
+            attributes[key] = "" if value is None else value
+        classes = attributes["class"].split() if "class" in attributes else ()
+        accept = tag if tag in STRING_CONTAINERS else MAIN
+
+        if tag == "title" and self.title is None:
+            self.title = []
+            self._collecting.append((depth, accept, self.title))
+
+        if tag == "a" and "href" in attributes:
+            href = attributes["href"].strip()
+            if href:
+                self.links.append(href)
+        elif tag == "link" and not self.canonical_found:
+            if attributes.get("rel", "").split() == ["canonical"]:
+                self.canonical_found = True
+                self.canonical = attributes.get("href", "")
+        elif tag == "meta" and self.description is None:
+            # Nom comparé sans les blancs autour, comme dans parse_html_soup
+            if attributes.get("name", "").strip() == "description":
+                self.description = attributes.get("content", "")
+
+        if self._open_rows and classes:
+            # Premier .feature-label / .feature-value de chaque ligne ouverte
+            for key, name in ((0, "feature-label"), (1, "feature-value")):
+                if name not in classes:
+                    continue
+                texts, claimed = [], False
+                for _, row in self._open_rows:
+                    if row[key] is None:
+                        row[key], claimed = texts, True
+                if claimed:
+                    self._collecting.append((depth, accept, texts))
+
+        if tag == "tr" and "feature" in classes:
+            row = [None, None]
+            self.rows.append(row)
+            self._open_rows.append((depth, row))
+
+        if self.reviews is None and attributes.get("id") == "reviews-data":
+            self.reviews = []
+            self._capture.append((depth, self.reviews))
+
+    def _pop_to(self, tag):
+        """Close the open elements up to the most recent `tag` (if any)"""
+
+        if not self._open_counts.get(tag):
+            return
+        while True:
+            depth = len(self._stack)
+            name = self._stack.pop()
+            self._open_counts[name] -= 1
+            for stack in (self._containers, self._collecting, self._open_rows, self._capture):
+                while stack and stack[-1][0] == depth:
+                    stack.pop()
+            if name == tag:
+                return
+
+    def _flush(self, kind=MAIN):
+        """End of a string: `kind` is MAIN for text, OTHER for comments and declarations"""
+
+        if not self._data:
+            return
+        text = "".join(self._data)
+        self._data = []
+
+        if self._capture:
+            self._capture[-1][1].append(text)
+        if kind == MAIN and self._containers:
+            kind = self._containers[-1][1]
+        if kind is OTHER or not self._collecting:
+            return
+
+        stripped = text.strip()
+        if stripped:
+            for _, accept, texts in self._collecting:
+                if accept == kind:
+                    texts.append(stripped)
+
+    def result(self):
+        url = self.canonical.strip() if self.canonical else None
+        title = "".join(self.title) if self.title is not None else ""
+        description = self.description.strip() if self.description is not None else ""
+
+        product_features = {}
+        for label, value in self.rows:
+            if label is not None and value is not None:
+                product_features[" ".join(label)] = " ".join(value)
+
+        links = self.links
+        if url:
+            links = [urljoin(url, href) for href in links]
+
+        product_reviews = []
+        reviews = _single_string(self.reviews) if self.reviews is not None else None
+        if reviews:
+            try:
+                product_reviews = json.loads(reviews)
+            except json.JSONDecodeError:
+                product_reviews = []
+
+        return {
+            "url": url,
+            "title": title,
+            "description": description,
+            "product_features": product_features,
+            "links": links,
+            "product_reviews": product_reviews,
+        }
+
+
+def _single_string(children):
+    """`Tag.string`: the only string below an element with a single child"""
+
+    while len(children) == 1:
+        child = children[0]
+        if isinstance(child, str):
+            return child
+        children = child
+    return None
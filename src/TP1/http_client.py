@@ -1,8 +1,66 @@
+import codecs
+import http.client
+import re
+import threading
+import time
 import urllib.request
 import urllib.error
+import zlib
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
 
-def get_html_page(page_url: str, user_agent: str = "FlexScraper/1.0"):
-    """Get html page"""
+from metrics import NULL_METRICS
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel
+    brotli = None
+
+
+def _brotli_bounded() -> bool:
+    """brotli with a bounded output buffer (`output_buffer_limit`, brotli >= 1.2)"""
+
+    if brotli is None:
+        return False
+    try:
+        brotli.Decompressor().process(b"", output_buffer_limit=1)
+    except TypeError:
+        return False
+    return True
+
+
+# "br" n'est demandé que si la taille décompressée peut être bornée
+BROTLI_SUPPORTED = _brotli_bounded()
+
+# Erreurs de décodage d'une réponse (compression ou charset invalides)
+DECODE_ERRORS = (zlib.error, LookupError) + ((brotli.error,) if brotli is not None else ())
+
+# Erreurs d'une requête : réseau, protocole HTTP, réponse trop grosse ou mal encodée
+REQUEST_ERRORS = (OSError, http.client.HTTPException, ValueError) + DECODE_ERRORS
+
+
+def report_error(page_url: str, error, metrics=None):
+    """Print a failed request and count it in the `errors` metric, by exception type"""
+
+    print(f"Erreur lors de l'accès à {page_url} : {error}")
+    (metrics or NULL_METRICS).inc("errors", label=type(error).__name__)
+
+
+def report_response(page_url: str, status: int, metrics=None):
+    """Count a response in the `responses` metric, by status class; print HTTP errors"""
+
+    (metrics or NULL_METRICS).inc("responses", label=f"{status // 100}xx")
+    if status >= 400:
+        print(f"Erreur lors de l'accès à {page_url} : HTTP {status}")
+
+
+def fetch_page(
+    page_url: str,
+    user_agent: str = "FlexScraper/1.0",
+    timeout: float = 10,
+    metrics=None,
+) -> Tuple[Optional[int], Optional[str]]:
+    """Get html page with the HTTP status of the response"""
 
     headers = {
         "User-Agent": user_agent
@@ -11,9 +69,259 @@ def get_html_page(page_url: str, user_agent: str = "FlexScraper/1.0"):
     request = urllib.request.Request(page_url, headers=headers)
 
     try:
-        with urllib.request.urlopen(request) as response:
-            return response.read().decode("utf-8")
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, html = response.status, response.read().decode("utf-8")
+
+    except urllib.error.HTTPError as e:
+        report_response(page_url, e.code, metrics)
+        return e.code, None
+
+    except REQUEST_ERRORS as e:
+        report_error(page_url, e, metrics)
+        return None, None
+
+    report_response(page_url, status, metrics)
+    return status, html
+
+
+def get_html_page(page_url: str, user_agent: str = "FlexScraper/1.0"):
+    """Get html page"""
+
+    _, html = fetch_page(page_url, user_agent=user_agent)
+    return html
+
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Erreurs d'une connexion keep-alive fermée par le serveur entre deux requêtes
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class HttpResponse(NamedTuple):
+    url: str
+    status: Optional[int]
+    headers: Dict[str, str]
+    body: bytes
+    text: Optional[str]
+    elapsed: float
+
+
+def detect_charset(content_type_charset: Optional[str], body: bytes) -> str:
+    """Charset of a page: Content-Type header, then <meta charset>, then UTF-8"""
+
+    candidates = [content_type_charset]
+    match = _META_CHARSET_RE.search(body[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+
+    for charset in candidates:
+        if not charset:
+            continue
+        try:
+            codec = codecs.lookup(charset)
+        except LookupError:
+            continue
+        # Codecs bytes -> bytes (hex, base64, rot13...) : pas un charset
+        if getattr(codec, "_is_text_encoding", True):
+            return codec.name
+    return "utf-8"
+
+
+class HttpClient:
+    """
+    HTTP client reusing keep-alive connections, with one pool per host.
+
+    Responses are requested compressed (gzip / deflate, brotli if the
+    `brotli` package >= 1.2 is installed), decoded according to their charset and
+    capped to `max_bytes` (compressed and decompressed).
+
+    Redirects are followed up to `max_redirects` hops; with
+    `allow_redirect`, each target is checked first (e.g. against the
+    robots.txt) and a refused one is not fetched: the 30x response is
+    returned instead.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = "FlexScraper/1.0",
+        timeout: float = 10,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_connections_per_host: int = 8,
+        max_redirects: int = 5,
+        allow_redirect: Optional[Callable[[str], bool]] = None,
+        metrics=None,
+    ):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_connections_per_host = max_connections_per_host
+        self.max_redirects = max_redirects
+        self.allow_redirect = allow_redirect
+        self.metrics = metrics or NULL_METRICS
+
+        encodings = ["gzip", "deflate"] + (["br"] if BROTLI_SUPPORTED else [])
+        self.accept_encoding = ", ".join(encodings)
+
+        # (scheme, netloc) -> connexions inactives
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme: str, netloc: str):
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        # Résolution DNS + connexion TCP (+ TLS)
+        with self.metrics.timer("connect_seconds"):
+            conn.connect()
+        self.metrics.inc("connections")
+        return conn
+
+    def _acquire(self, key):
+        """Idle connection of the pool of a host, or a new one"""
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool:
+                return pool.pop(), True
+        return self._new_connection(*key), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.max_connections_per_host:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every pooled connection"""
+
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+    def _decode_body(self, body: bytes, encoding: str) -> bytes:
+        """Decompress a body, without exceeding `max_bytes`"""
+
+        encoding = encoding.strip().lower()
+        if encoding in ("gzip", "x-gzip"):
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            decompressor = zlib.decompressobj()
+        elif encoding == "br" and BROTLI_SUPPORTED:
+            # Sortie bornée : une bombe brotli n'est pas décompressée en entier
+            decompressor = brotli.Decompressor()
+            decoded = decompressor.process(body, output_buffer_limit=self.max_bytes + 1)
+            if len(decoded) > self.max_bytes or not decompressor.is_finished():
+                raise ValueError(f"réponse décompressée supérieure à {self.max_bytes} octets")
+            return decoded
+        else:
+            return body
+
+        decoded = decompressor.decompress(body, self.max_bytes + 1)
+        if len(decoded) > self.max_bytes or decompressor.unconsumed_tail:
+            raise ValueError(f"réponse décompressée supérieure à {self.max_bytes} octets")
+        return decoded
+
+    def _request_once(self, url: str, headers: Dict[str, str]) -> HttpResponse:
+        parts = urlsplit(url)
+        key = (parts.scheme.lower(), parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        start = time.perf_counter()
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # Connexion keep-alive expirée côté serveur : on en ouvre une nouvelle
+                conn.close()
+                conn = self._new_connection(*key)
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+
+            length = response.getheader("Content-Length")
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                raise ValueError(f"réponse supérieure à {self.max_bytes} octets")
+            body = response.read(self.max_bytes + 1)
+            if len(body) > self.max_bytes:
+                raise ValueError(f"réponse supérieure à {self.max_bytes} octets")
+            self.metrics.inc("bytes_downloaded", len(body))
+        except Exception:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        response_headers = {k.lower(): v for k, v in response.getheaders()}
+        body = self._decode_body(body, response_headers.get("content-encoding", ""))
+
+        text = None
+        if 200 <= response.status < 300:
+            charset = detect_charset(response.headers.get_content_charset(), body)
+            text = body.decode(charset, errors="replace")
+
+        return HttpResponse(
+            url=url,
+            status=response.status,
+            headers=response_headers,
+            body=body,
+            text=text,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """GET an url, following redirects (`url` of the response: last url fetched)"""
+
+        request_headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": self.accept_encoding,
+            "Connection": "keep-alive",
+        }
+        request_headers.update(headers or {})
+
+        for _ in range(self.max_redirects + 1):
+            response = self._request_once(url, request_headers)
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            url = urljoin(url, location)
+            # Cible refusée (robots.txt...) : la redirection n'est pas suivie
+            if self.allow_redirect is not None and not self.allow_redirect(url):
+                return response
+        return response
+
+    def try_get(self, page_url: str, headers: Optional[Dict[str, str]] = None) -> Optional[HttpResponse]:
+        """GET an url, printing the error and returning None on failure"""
+
+        try:
+            response = self.get(page_url, headers=headers)
+        except REQUEST_ERRORS as e:
+            report_error(page_url, e, self.metrics)
+            return None
+
+        report_response(page_url, response.status, self.metrics)
+        return response
+
+    def get_html(self, page_url: str) -> Tuple[Optional[int], Optional[str]]:
+        """Get html page with the HTTP status of the response"""
 
-    except urllib.error.URLError as e:
-        print(f"Erreur lors de l'accès à {page_url} : {e}")
-        return None
\ No newline at end of file
+        response = self.try_get(page_url)
+        if response is None:
+            return None, None
+        return response.status, response.text
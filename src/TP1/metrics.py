@@ -0,0 +1,252 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional
+
+# Bornes (secondes) des histogrammes de latence
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets (count, sum, cumulative counts)"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile"""
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class _Timer:
+    """Context manager observing its duration in a histogram"""
+
+    __slots__ = ("metrics", "name", "label", "start")
+
+    def __init__(self, metrics, name, label):
+        self.metrics = metrics
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, self.label)
+
+
+class Metrics:
+    """
+    Counters, gauges and latency histograms of a crawl.
+
+    A metric is identified by its name and an optional label (host, error
+    class...). `maybe_report` is cheap enough for the crawl loop: the
+    reporters are only called every `interval` seconds.
+    """
+
+    enabled = True
+
+    def __init__(self, reporters: Optional[List] = None, interval: float = 10.0):
+        self.reporters = reporters or []
+        self.interval = interval
+        self.counters: Dict[tuple, float] = {}
+        self.gauges: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, Histogram] = {}
+        self.started_at = time.time()
+        self._last_report = time.monotonic()
+        # Mises à jour depuis les threads de l'AsyncCrawler
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, label: Optional[str] = None):
+        key = (name, label)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, label: Optional[str] = None):
+        self.gauges[(name, label)] = value
+
+    def observe(self, name: str, value: float, label: Optional[str] = None):
+        key = (name, label)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def timer(self, name: str, label: Optional[str] = None) -> _Timer:
+        """`with metrics.timer("fetch_seconds"): ...`"""
+
+        return _Timer(self, name, label)
+
+    def snapshot(self) -> dict:
+        """All the metrics as a JSON-serializable dict"""
+
+        def key(name, label):
+            return name if label is None else f"{name}{{{label}}}"
+
+        with self._lock:
+            return {
+                "elapsed": time.time() - self.started_at,
+                "counters": {key(*k): v for k, v in self.counters.items()},
+                "gauges": {key(*k): v for k, v in self.gauges.items()},
+                "histograms": {key(*k): h.snapshot() for k, h in self.histograms.items()},
+            }
+
+    def maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self):
+        for reporter in self.reporters:
+            reporter.report(self)
+
+
+class NullMetrics:
+    """Disabled metrics: every call is a no-op"""
+
+    enabled = False
+    _timer = nullcontext()
+
+    def inc(self, name, value=1, label=None):
+        pass
+
+    def set_gauge(self, name, value, label=None):
+        pass
+
+    def observe(self, name, value, label=None):
+        pass
+
+    def timer(self, name, label=None):
+        return self._timer
+
+    def maybe_report(self):
+        pass
+
+    def report(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class LogReporter:
+    """One summary line: pages, pages/s, bytes, errors, frontier size, p95 latencies"""
+
+    def report(self, metrics: Metrics):
+        snapshot = metrics.snapshot()
+        counters, gauges = snapshot["counters"], snapshot["gauges"]
+        pages = counters.get("pages", 0)
+        errors = sum(v for k, v in counters.items() if k.startswith("errors"))
+        latencies = " ".join(
+            f"{name.replace('_seconds', '')}_p95={h['p95'] * 1000:.1f}ms"
+            for name, h in sorted(snapshot["histograms"].items())
+            if "{" not in name
+        )
+        print(
+            f"[metrics] {pages:.0f} pages ({pages / max(snapshot['elapsed'], 1e-9):.1f} pages/s)"
+            f" | {counters.get('bytes_downloaded', 0) / 1024 / 1024:.1f} MiB"
+            f" | {errors:.0f} errors | frontier {gauges.get('frontier_size', 0):.0f}"
+            f" | {latencies}"
+        )
+
+
+class JsonReporter:
+    """Dump of the snapshot to a JSON file (replaced atomically)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def report(self, metrics: Metrics):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, indent=4)
+        os.replace(tmp_path, self.path)
+
+
+class PrometheusReporter:
+    """
+    Prometheus text exposition format, for the textfile collector of the
+    node exporter. Metric names are prefixed by `prefix`.
+    """
+
+    def __init__(self, path: str, prefix: str = "crawler"):
+        self.path = path
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(label: Optional[str], extra: str = "") -> str:
+        labels = []
+        if label is not None:
+            escaped = label.replace("\\", "\\\\").replace('"', '\\"')
+            labels.append(f'label="{escaped}"')
+        if extra:
+            labels.append(extra)
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    def render(self, metrics: Metrics) -> str:
+        lines = []
+        with metrics._lock:
+            counters = dict(metrics.counters)
+            gauges = dict(metrics.gauges)
+            histograms = {k: (h.buckets, list(h.counts), h.count, h.sum) for k, h in metrics.histograms.items()}
+
+        typed = set()
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for (name, label), value in sorted(values.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+                metric = f"{self.prefix}_{name}" + ("_total" if kind == "counter" else "")
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    typed.add(metric)
+                lines.append(f"{metric}{self._labels(label)} {value}")
+
+        for (name, label), (buckets, counts, count, total) in sorted(
+            histograms.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")
+        ):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{metric}_bucket{self._labels(label, le)} {cumulative}")
+            lines.append(f"{metric}_sum{self._labels(label)} {total}")
+            lines.append(f"{metric}_count{self._labels(label)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, metrics: Metrics):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render(metrics))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+class JsonlSink:
+    """
+    Streaming output of the crawled pages, one JSON document per line (the
+    `products.jsonl` format read by `TP2/json_parser.parse_json`).
+
+    Each page is written as soon as it is parsed instead of being kept in
+    `Crawler.results`. A `.gz` path is gzip-compressed. Lines are flushed to
+    the OS every `flush_every` pages and fsynced every `fsync_every` pages,
+    so a crash loses at most the pages since the last flush. With
+    `max_bytes`, the output is rotated: `products.jsonl`, then
+    `products.1.jsonl`, `products.2.jsonl`...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        max_bytes: Optional[int] = None,
+        flush_every: int = 1,
+        fsync_every: Optional[int] = 100,
+    ):
+        self.path = path
+        self.compress = path.endswith(".gz")
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.fsync_every = fsync_every
+
+        self.part = 0
+        if append:
+            # On reprend au dernier fichier de la rotation
+            while os.path.exists(self._part_path(self.part + 1)):
+                self.part += 1
+        self.paths: List[str] = []
+        self.pages_written = 0
+        self._unflushed = 0
+        self._unsynced = 0
+        self._raw = None
+        self._file = None
+        self._open(mode="a" if append else "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _part_path(self, part: int) -> str:
+        if part == 0:
+            return self.path
+        directory, name = os.path.split(self.path)
+        # products.jsonl.gz -> products.1.jsonl.gz
+        stem, dot, extensions = name.partition(".")
+        return os.path.join(directory, f"{stem}.{part}{dot}{extensions}")
+
+    def _open(self, mode: str):
+        path = self._part_path(self.part)
+        self._raw = open(path, mode + "b")
+        if self.compress:
+            self._file = gzip.GzipFile(fileobj=self._raw, mode=mode + "b")
+        else:
+            self._file = self._raw
+        self.paths.append(path)
+
+    def _rotate(self):
+        self._close_file()
+        self.part += 1
+        self._open(mode="w")
+
+    def write(self, data: Dict[str, Any]):
+        """Write a page as one JSON line"""
+
+        self._file.write(json.dumps(data).encode("utf-8") + b"\n")
+        self.pages_written += 1
+        self._unflushed += 1
+        self._unsynced += 1
+
+        if self._unflushed >= self.flush_every:
+            self.flush()
+        if self.fsync_every is not None and self._unsynced >= self.fsync_every:
+            self.sync()
+        if self.max_bytes is not None and self._raw.tell() >= self.max_bytes:
+            self._rotate()
+
+    def flush(self):
+        """Hand the buffered lines to the OS (they survive a crash of the process)"""
+
+        self._file.flush()
+        if self._file is not self._raw:
+            self._raw.flush()
+        self._unflushed = 0
+
+    def sync(self):
+        """Flush then fsync (the lines survive a crash of the machine)"""
+
+        self.flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+
+    def _close_file(self):
+        self.sync()
+        if self._file is not self._raw:
+            self._file.close()
+        self._raw.close()
+
+    def close(self):
+        if self._raw is not None and not self._raw.closed:
+            self._close_file()
@@ -1,77 +1,243 @@
+import re
+import threading
+import time
 import urllib.request
 import urllib.error
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from urllib.parse import urlparse
 
-def get_robots_txt(base_url: str, user_agent:str="FlexScraper/1.0"):
+def get_robots_txt(base_url: str, user_agent:str="FlexScraper/1.0", timeout: float = 10):
     """
     Get robots.txt of the site
     """
-    
+
     headers = {
         "User-Agent": user_agent
     }
     robots_url = base_url.rstrip("/") + "/robots.txt"
     request = urllib.request.Request(robots_url, headers=headers)
-    
-    with urllib.request.urlopen(request) as response:
-        return response.read().decode("utf-8")
 
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read().decode("utf-8", errors="replace")
 
-def is_authorized_to_parse(page_url: str, user_agent: str = "FlexScraper/1.0") -> bool:
-    """Check if the user agent is authorized to parse the page"""
 
-    try:
-        parsed = urlparse(page_url)
-        base_url = f"{parsed.scheme}://{parsed.netloc}"
-        robots_txt = get_robots_txt(base_url, user_agent)
-    except Exception:
-        # robots.txt inaccessible, on autorise par défaut
-        return True
+def _compile_pattern(pattern: str):
+    """
+    Compile a robots.txt path pattern.
+    Plain prefixes are matched with `str.startswith`, patterns using the
+    `*` / `$` wildcards with a regex.
+    """
 
-    path = parsed.path or "/"
+    if "*" not in pattern and not pattern.endswith("$"):
+        return pattern, None
+
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    if anchored:
+        regex += "$"
+    return None, re.compile(regex)
+
+
+class RobotsRules:
+    """Rules of a robots.txt, parsed and compiled once"""
 
-    rules = {}
-    current_agent = None
+    def __init__(self, groups: Optional[List[dict]] = None):
+        self.groups = groups or []
+        # user agent -> (règles compilées, crawl delay)
+        self._agent_rules = {}
 
-    # Parsing du robots.txt
-    for line in robots_txt.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
+    @classmethod
+    def parse(cls, robots_txt: str) -> "RobotsRules":
+        """Parse a robots.txt into groups of (user agents, rules, crawl delay)"""
 
-        if line.lower().startswith("user-agent"):
-            current_agent = line.split(":", 1)[1].strip()
-            rules[current_agent] = {"allow": [], "disallow": []}
+        groups = []
+        current = None
+        last_was_agent = False
+
+        for line in robots_txt.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line or ":" not in line:
+                continue
 
-        elif current_agent:
             directive, value = line.split(":", 1)
             directive = directive.lower().strip()
             value = value.strip()
 
-            if directive == "allow":
-                rules[current_agent]["allow"].append(value)
-            elif directive == "disallow":
-                rules[current_agent]["disallow"].append(value)
-
-    # Règles spécifiques au User-Agent
-    if user_agent in rules:
-        agent_rules = rules[user_agent]
-    # Sinon nous sommes un User-Agent * si spécifié
-    elif "*" in rules:
-        agent_rules = rules["*"]
-    # Aucune règle, autorisé
-    else:
+            if directive == "user-agent":
+                # Plusieurs lignes User-Agent consécutives partagent le même groupe
+                if current is None or not last_was_agent:
+                    current = {"agents": [], "rules": [], "crawl_delay": None}
+                    groups.append(current)
+                current["agents"].append(value.lower())
+                last_was_agent = True
+                continue
+
+            last_was_agent = False
+            if current is None:
+                continue
+
+            if directive in ("allow", "disallow"):
+                # Un Disallow vide n'interdit rien
+                if value:
+                    current["rules"].append((directive == "allow", value))
+            elif directive == "crawl-delay":
+                try:
+                    current["crawl_delay"] = float(value)
+                except ValueError:
+                    pass
+
+        return cls(groups)
+
+    def _rules_for(self, user_agent: str) -> Tuple[list, Optional[float]]:
+        """Compiled rules of the groups matching the user agent (or `*`)"""
+
+        if user_agent in self._agent_rules:
+            return self._agent_rules[user_agent]
+
+        full_agent = user_agent.lower()
+        product_token = full_agent.split("/", 1)[0]
+
+        # Règles spécifiques au User-Agent, sinon celles de *
+        groups = [
+            g for g in self.groups
+            if full_agent in g["agents"] or product_token in g["agents"]
+        ]
+        if not groups:
+            groups = [g for g in self.groups if "*" in g["agents"]]
+
+        rules = []
+        crawl_delay = None
+        for group in groups:
+            for allow, pattern in group["rules"]:
+                prefix, regex = _compile_pattern(pattern)
+                rules.append((len(pattern), allow, prefix, regex))
+            if group["crawl_delay"] is not None:
+                crawl_delay = group["crawl_delay"]
+
+        # Règle la plus longue d'abord ; à longueur égale, Allow l'emporte
+        rules.sort(key=lambda r: (r[0], r[1]), reverse=True)
+
+        self._agent_rules[user_agent] = (rules, crawl_delay)
+        return rules, crawl_delay
+
+    def is_allowed(self, path: str, user_agent: str = "FlexScraper/1.0") -> bool:
+        """Longest-match evaluation of the rules for a path (with query string)"""
+
+        rules, _ = self._rules_for(user_agent)
+        for _, allow, prefix, regex in rules:
+            if prefix is not None:
+                if path.startswith(prefix):
+                    return allow
+            elif regex.match(path):
+                return allow
         return True
 
-    # Application des règles
-    allowed = True
+    def crawl_delay(self, user_agent: str = "FlexScraper/1.0") -> Optional[float]:
+        _, crawl_delay = self._rules_for(user_agent)
+        return crawl_delay
+
+
+def _path_of(parsed) -> str:
+    path = parsed.path or "/"
+    if parsed.query:
+        path += "?" + parsed.query
+    return path
+
+
+class RobotsCache:
+    """
+    Per-host robots.txt cache, keyed by scheme + netloc.
+
+    Entries expire after `ttl` seconds and the least recently used host is
+    evicted beyond `max_hosts`. Unreachable robots.txt are cached as well
+    (negative caching) so that a failing host is not queried for every page.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = "FlexScraper/1.0",
+        ttl: float = 3600.0,
+        error_ttl: float = 300.0,
+        max_hosts: int = 1024,
+        timeout: float = 10,
+    ):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_hosts = max_hosts
+        self.timeout = timeout
+
+        # base_url -> (expiration, RobotsRules)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fetch_rules(self, base_url: str) -> Tuple[RobotsRules, float]:
+        """Download and compile the robots.txt of a host, with its cache TTL"""
+
+        try:
+            robots_txt = get_robots_txt(base_url, self.user_agent, self.timeout)
+        except urllib.error.HTTPError as e:
+            # 4xx : pas de robots.txt, tout est autorisé
+            # 5xx : robots.txt inaccessible, on autorise par défaut mais on réessaie plus tôt
+            ttl = self.ttl if 400 <= e.code < 500 else self.error_ttl
+            return RobotsRules(), ttl
+        except Exception:
+            # robots.txt inaccessible, on autorise par défaut
+            return RobotsRules(), self.error_ttl
+
+        return RobotsRules.parse(robots_txt), self.ttl
+
+    def get_rules(self, page_url: str) -> RobotsRules:
+        """Get the compiled rules of the host of `page_url`"""
+
+        parsed = urlparse(page_url)
+        base_url = f"{parsed.scheme}://{parsed.netloc}".lower()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(base_url)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(base_url)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        rules, ttl = self._fetch_rules(base_url)
+
+        with self._lock:
+            self._entries[base_url] = (now + ttl, rules)
+            self._entries.move_to_end(base_url)
+            while len(self._entries) > self.max_hosts:
+                self._entries.popitem(last=False)
 
-    for allowed_path in agent_rules["allow"]:
-        if allowed_path == "*" or path.startswith(allowed_path):
-            allowed = True
+        return rules
+
+    def is_allowed(self, page_url: str) -> bool:
+        """Check if the user agent is authorized to parse the page"""
+
+        rules = self.get_rules(page_url)
+        return rules.is_allowed(_path_of(urlparse(page_url)), self.user_agent)
+
+    def crawl_delay(self, page_url: str) -> Optional[float]:
+        """Crawl-delay of the host of `page_url`, if any"""
+
+        return self.get_rules(page_url).crawl_delay(self.user_agent)
+
+
+def is_authorized_to_parse(page_url: str, user_agent: str = "FlexScraper/1.0") -> bool:
+    """Check if the user agent is authorized to parse the page"""
+
+    try:
+        parsed = urlparse(page_url)
+        base_url = f"{parsed.scheme}://{parsed.netloc}"
+        robots_txt = get_robots_txt(base_url, user_agent)
+    except Exception:
+        # robots.txt inaccessible, on autorise par défaut
+        return True
 
-    for disallowed in agent_rules["disallow"]:
-        if disallowed and path.startswith(disallowed):
-            allowed = False
-            
-    return allowed
+    return RobotsRules.parse(robots_txt).is_allowed(_path_of(parsed), user_agent)
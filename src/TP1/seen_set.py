@@ -0,0 +1,198 @@
+import hashlib
+import math
+from array import array
+
+
+def _double_hash(url: str):
+    """Two independent 64-bit hashes of an url, for the Bloom filters"""
+
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def url_fingerprint(url: str) -> int:
+    """64-bit fingerprint of an url (never 0, which marks an empty slot)"""
+
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class FingerprintSet:
+    """
+    Compact set of urls storing only their 64-bit fingerprints in an
+    open-addressing table (`array('Q')`, 8 bytes per slot).
+
+    It also offers the mapping interface used for `Crawler.queued`
+    (`queued[url] = depth`, `queued.pop(url)`): the depth itself is not
+    stored, the frontier already keeps it.
+    """
+
+    def __init__(self, capacity: int = 1024, max_load: float = 0.7):
+        size = 1
+        while size * max_load < capacity:
+            size *= 2
+        self.max_load = max_load
+        self._table = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def _find(self, fp: int) -> int:
+        """Slot of `fp`, or the empty slot where it would be inserted (linear probing)"""
+
+        table, mask = self._table, self._mask
+        i = fp & mask
+        while True:
+            slot = table[i]
+            if slot == 0 or slot == fp:
+                return i
+            i = (i + 1) & mask
+
+    def _resize(self):
+        old = self._table
+        self._table = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for fp in old:
+            if fp:
+                self._table[self._find(fp)] = fp
+
+    def __contains__(self, url: str) -> bool:
+        fp = url_fingerprint(url)
+        return self._table[self._find(fp)] == fp
+
+    def add(self, url: str) -> bool:
+        """Add an url, return False if it was already present"""
+
+        fp = url_fingerprint(url)
+        i = self._find(fp)
+        if self._table[i] == fp:
+            return False
+
+        self._table[i] = fp
+        self._len += 1
+        if self._len > self.max_load * len(self._table):
+            self._resize()
+        return True
+
+    def discard(self, url: str):
+        """Remove an url (backward-shift deletion, no tombstones)"""
+
+        fp = url_fingerprint(url)
+        table, mask = self._table, self._mask
+        i = self._find(fp)
+        if table[i] != fp:
+            return
+
+        j = i
+        while True:
+            j = (j + 1) & mask
+            slot = table[j]
+            if slot == 0:
+                break
+            # On ne déplace pas une entrée dont la position idéale est entre i et j
+            home = slot & mask
+            if (i < j and i < home <= j) or (i > j and (home > i or home <= j)):
+                continue
+            table[i] = slot
+            i = j
+        table[i] = 0
+        self._len -= 1
+
+    def __setitem__(self, url: str, depth: int):
+        self.add(url)
+
+    def pop(self, url: str, default=None):
+        self.discard(url)
+        return default
+
+    def memory_bytes(self) -> int:
+        return self._table.itemsize * len(self._table)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` urls at `error_rate`"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1: int, h2: int):
+        # Double hashing : h1 + i * h2
+        n_bits = self.n_bits
+        return [(h1 + i * h2) % n_bits for i in range(self.n_hashes)]
+
+    def contains_hashes(self, h1: int, h2: int) -> bool:
+        bits = self._bits
+        for p in self._positions(h1, h2):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def add_hashes(self, h1: int, h2: int):
+        bits = self._bits
+        for p in self._positions(h1, h2):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_hashes(*_double_hash(url))
+
+    def add(self, url: str):
+        self.add_hashes(*_double_hash(url))
+
+
+class ScalableBloomFilter:
+    """
+    Scalable Bloom filter: a new, larger and stricter filter is added each
+    time the current one is full, so the overall false-positive rate stays
+    below `error_rate` whatever the number of urls.
+
+    Urls cannot be removed: it is meant for `Crawler.visited`. A false
+    positive makes the crawler skip an url it has never fetched.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.001,
+        initial_capacity: int = 100_000,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def __contains__(self, url: str) -> bool:
+        h1, h2 = _double_hash(url)
+        return any(f.contains_hashes(h1, h2) for f in self.filters)
+
+    def add(self, url: str) -> bool:
+        """Add an url, return False if it was (probably) already present"""
+
+        h1, h2 = _double_hash(url)
+        if any(f.contains_hashes(h1, h2) for f in self.filters):
+            return False
+
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            # Somme des taux d'erreur bornée par error_rate (série géométrique)
+            i = len(self.filters)
+            self.filters.append(BloomFilter(
+                capacity=self.initial_capacity * self.growth ** i,
+                error_rate=self.error_rate * (1 - self.tightening) * self.tightening ** i,
+            ))
+        self.filters[-1].add_hashes(h1, h2)
+        return True
+
+    def memory_bytes(self) -> int:
+        return sum(len(f._bits) for f in self.filters)
@@ -0,0 +1,280 @@
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from json_parser import iter_json, parse_json
+from incremental import IncrementalIndex
+from utils import get_lemmatizer, get_stop_words, tokenize_many, tokenize_text
+from index import (
+    IndexBuilder,
+    build_indexes_parallel,
+    token_positions,
+    create_description_index,
+    create_title_index,
+    create_reviews_index,
+    create_feature_index
+)
+
+PRODUCTS_PATH = "./input/products.jsonl"
+OUTPUT_DIR = "./output"
+
+
+def make_catalogue(path: str, scale: int, source: str = PRODUCTS_PATH) -> int:
+    """
+    Write a catalogue `scale` times larger than `source`: each copy of a
+    product gets a new product id, so every copy is a distinct document.
+    """
+
+    products = list(iter_json(source))
+    n_products = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for copy in range(scale):
+            for product in products:
+                product = dict(product)
+                product_id = product.pop("id", None)
+                product.pop("variant", None)
+                if product_id and copy:
+                    product["url"] = product["url"].replace(
+                        f"/product/{product_id}", f"/product/{int(product_id) + copy * 100_000}"
+                    )
+                elif copy:
+                    product["url"] = f"{product['url']}#copy-{copy}"
+                f.write(json.dumps(product) + "\n")
+                n_products += 1
+    return n_products
+
+
+def build_with_functions(path: str):
+    """Previous build: one pass per index over the parsed products"""
+
+    products = parse_json(path)
+    create_title_index(products)
+    create_description_index(products)
+    create_reviews_index(products)
+    create_feature_index(products, "made in")
+    create_feature_index(products, "brand")
+
+
+def build_with_builder(path: str):
+    IndexBuilder.from_jsonl(path)
+
+
+def bench_build(scales=(1, 10, 100)):
+    """Build time of every index for 1x to 100x the catalogue: create_* functions vs IndexBuilder"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = os.path.join(tmp, f"products_x{scale}.jsonl")
+            n_products = make_catalogue(path, scale)
+
+            timings = []
+            for build in (build_with_functions, build_with_builder):
+                start = time.perf_counter()
+                build(path)
+                timings.append(time.perf_counter() - start)
+
+            functions_s, builder_s = timings
+            print(
+                f"x{scale:<4} {n_products:>7} products : create_* {functions_s:7.2f}s"
+                f" ({functions_s / n_products * 1e6:6.0f} us/product)"
+                f" | IndexBuilder {builder_s:7.2f}s ({builder_s / n_products * 1e6:6.0f} us/product)"
+            )
+
+
+def quadratic_positions(tokens):
+    """Previous positions: one scan of the document per distinct token"""
+
+    return {
+        token: [idx for idx, t in enumerate(tokens) if t == token]
+        for token in set(tokens)
+    }
+
+
+def bench_positions(lengths=(100, 1_000, 10_000), vocabulary: int = 5_000, repeat: int = 5):
+    """Positions of a document: one scan per distinct token vs a single enumerate pass"""
+
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(vocabulary)]
+    for length in lengths:
+        tokens = [rng.choice(words) for _ in range(length)]
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            expected = quadratic_positions(tokens)
+        quadratic_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            positions = token_positions(tokens)
+        linear_s = (time.perf_counter() - start) / repeat
+
+        identical = {t: p.tolist() for t, p in positions.items()} == expected
+        print(
+            f"{length:>6} tokens ({len(expected):>5} distinct) : per-token scan {quadratic_s * 1e3:9.2f} ms"
+            f" | single pass {linear_s * 1e3:7.2f} ms | identical={identical}"
+        )
+
+
+def bench_parallel(scale: int = 100, workers=(1, 2, 4), chunk_size: int = 10_000):
+    """Sequential IndexBuilder vs sharded build in a process pool, then merge"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"products_x{scale}.jsonl")
+        n_products = make_catalogue(path, scale)
+
+        start = time.perf_counter()
+        expected = IndexBuilder.from_jsonl(path).indexes()
+        sequential_s = time.perf_counter() - start
+        print(f"x{scale} {n_products} products ({os.cpu_count()} CPU) : sequential {sequential_s:7.2f}s")
+
+        for n_workers in workers:
+            start = time.perf_counter()
+            built = build_indexes_parallel(path, n_workers=n_workers, chunk_size=chunk_size).indexes()
+            parallel_s = time.perf_counter() - start
+            print(
+                f"  {n_workers} workers : {parallel_s:7.2f}s (x{sequential_s / parallel_s:.2f})"
+                f" | identical={built == expected}"
+            )
+
+
+def bench_incremental(scale: int = 10, changed: float = 0.01):
+    """Daily re-crawl with `changed` of the products modified: full rebuild vs IncrementalIndex"""
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"products_x{scale}.jsonl")
+        make_catalogue(path, scale)
+        products = [p for p in iter_json(path) if p.get("url")]
+
+        index = IncrementalIndex(os.path.join(tmp, "segments"), background=False)
+        start = time.perf_counter()
+        index.update(products)
+        initial_s = time.perf_counter() - start
+
+        # Nouveau crawl : quelques produits modifiés
+        rng = random.Random(0)
+        crawl = list(products)
+        for i in rng.sample(range(len(crawl)), max(1, int(len(crawl) * changed))):
+            crawl[i] = dict(crawl[i], title=crawl[i]["title"] + " new edition")
+
+        start = time.perf_counter()
+        full = IndexBuilder()
+        full.add_all(crawl)
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = index.update(crawl, delete_missing=True)
+        incremental_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        built = index.indexes()
+        snapshot_s = time.perf_counter() - start
+
+        # Ordre des documents différent : un produit mis à jour passe dans le dernier segment
+        def unordered(index):
+            return {t: sorted(p.items()) if isinstance(p, dict) else sorted(p) for t, p in index.items()}
+
+        identical = all(
+            unordered(built[name]) == unordered(expected)
+            for name, expected in full.indexes().items()
+        )
+        print(
+            f"x{scale} {len(products)} products (initial indexing {initial_s:.2f}s), {counts['updated']} changed :"
+            f" full rebuild {full_s:.2f}s | incremental update {incremental_s:.2f}s"
+            f" + merged view {snapshot_s:.2f}s | {len(index.segments)} segments | identical={identical}"
+        )
+
+
+def legacy_tokenize(text: str, normalize: bool = False):
+    """Previous tokenizer: regex compiled per call, one WordNetLemmatizer per call"""
+
+    text = re.sub(r"[^\w\s]", "", text.lower())
+    tokens = [t for t in text.split() if t not in get_stop_words()]
+    if normalize:
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        tokens = [lemmatizer.lemmatize(t) for t in tokens]
+    return tokens
+
+
+def _import_seconds(code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def bench_tokenizer(scale: int = 10):
+    """Import time of utils and tokens/s: previous tokenizer vs tokenize_text vs tokenize_many"""
+
+    legacy_s = _import_seconds("import nltk; nltk.download('stopwords'); nltk.download('wordnet')")
+    lazy_s = _import_seconds("import utils")
+    print(f"import : nltk.download at import {legacy_s * 1e3:7.1f} ms | lazy utils {lazy_s * 1e3:7.1f} ms")
+
+    products = list(iter_json(PRODUCTS_PATH)) * scale
+    texts = [p.get(field) or "" for p in products for field in ("title", "description")]
+
+    # Sans WordNet (hors ligne), la lemmatisation n'est pas mesurée
+    try:
+        legacy_tokenize("shoes", normalize=True)
+        modes = (False, True)
+    except LookupError:
+        modes = (False,)
+    for normalize in modes:
+        if normalize:
+            get_lemmatizer().cache_clear()
+        timings = []
+        for tokenize in (
+            lambda: [legacy_tokenize(t, normalize) for t in texts],
+            lambda: [tokenize_text(t, normalize) for t in texts],
+            lambda: tokenize_many(texts, normalize),
+        ):
+            start = time.perf_counter()
+            tokens = tokenize()
+            timings.append(time.perf_counter() - start)
+        n_tokens = sum(len(t) for t in tokens)
+        legacy, single, batch = (n_tokens / t for t in timings)
+        print(
+            f"normalize={normalize!s:<5} {len(texts)} texts, {n_tokens} tokens : previous {legacy:9.0f} tokens/s"
+            f" | tokenize_text {single:9.0f} tokens/s | tokenize_many {batch:9.0f} tokens/s"
+        )
+
+
+def check_outputs(output_dir: str = OUTPUT_DIR, products_path: str = PRODUCTS_PATH) -> bool:
+    """
+    Golden-output check: IndexBuilder files vs the JSON indexes of `output_dir`.
+    Returns False if an index differs.
+    """
+
+    identical = True
+    with tempfile.TemporaryDirectory() as tmp:
+        IndexBuilder.from_jsonl(products_path).save(tmp)
+        for name in sorted(n for n in os.listdir(output_dir) if n.endswith(".json")):
+            with open(os.path.join(output_dir, name)) as f:
+                expected = json.load(f)
+            with open(os.path.join(tmp, name)) as f:
+                built = json.load(f)
+            print(f"{name:<24}: {'identical' if built == expected else 'DIFFERENT'}")
+            identical = identical and built == expected
+    return identical
+
+
+BENCHMARKS = {
+    "build": bench_build,
+    "positions": bench_positions,
+    "parallel": bench_parallel,
+    "incremental": bench_incremental,
+    "tokenizer": bench_tokenizer,
+    "check": check_outputs,
+}
+
+
+if __name__ == "__main__":
+    # python benchmark.py [nom ...] : tous les benchmarks par défaut.
+    # Code de sortie non nul si une vérification (check) échoue
+    failed = [name for name in sys.argv[1:] or BENCHMARKS if BENCHMARKS[name]() is False]
+    if failed:
+        sys.exit(f"Vérification échouée : {', '.join(failed)}")
@@ -0,0 +1,304 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Union
+
+# Format binaire des index inversés (fichiers .idx) :
+#   en-tête | table doc id -> url | dictionnaire des termes triés | postings | statistiques
+# Les postings sont des varints : nombre de documents, écarts entre doc ids
+# et, pour un index positionnel, nombre de positions puis écarts entre positions.
+# Statistiques (BM25) : longueur de chaque document (dernière position + 1)
+# et nombre de documents de chaque terme.
+MAGIC = b"TPIX"
+VERSION = 2
+LIST, POSITIONAL = 0, 1
+
+# magic, version, type, nombre de documents, nombre de termes, début de la
+# table des urls, du dictionnaire des termes, des postings et des statistiques
+HEADER = struct.Struct("<4sBBxxIIQQQQ")
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _string_table(strings: List[bytes]):
+    """Offsets (array of n+1 uint32) and concatenation of the strings"""
+
+    offsets = array("I", [0])
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+    return offsets, b"".join(strings)
+
+
+def write_binary_index(index: Dict[str, Any], path: str):
+    """
+    Write an inverted index (token -> [url] or token -> {url: [positions]})
+    in the binary format read by `BinaryIndex`.
+    """
+
+    positional = any(isinstance(postings, dict) for postings in index.values())
+
+    # Doc ids : urls triées
+    urls = set()
+    for postings in index.values():
+        urls.update(postings)
+    urls = sorted(urls)
+    doc_ids = {url: doc_id for doc_id, url in enumerate(urls)}
+
+    # Dictionnaire trié sur les octets UTF-8 (ordre de la recherche dichotomique)
+    terms = sorted(term.encode("utf-8") for term in index)
+
+    postings_data = bytearray()
+    postings_offsets = array("Q")
+    doc_lengths = array("I", bytes(4 * len(urls)))
+    doc_freqs = array("I")
+    for term in terms:
+        postings_offsets.append(len(postings_data))
+        postings = index[term.decode("utf-8")]
+        doc_freqs.append(len(postings))
+        _encode_varint(len(postings), postings_data)
+        previous = 0
+        if positional:
+            for doc_id, url in sorted((doc_ids[url], url) for url in postings):
+                _encode_varint(doc_id - previous, postings_data)
+                previous = doc_id
+                positions = postings[url]
+                if len(positions):
+                    doc_lengths[doc_id] = max(doc_lengths[doc_id], max(positions) + 1)
+                _encode_varint(len(positions), postings_data)
+                last = 0
+                for position in positions:
+                    _encode_varint(position - last, postings_data)
+                    last = position
+        else:
+            for doc_id in sorted(doc_ids[url] for url in postings):
+                _encode_varint(doc_id - previous, postings_data)
+                previous = doc_id
+    postings_offsets.append(len(postings_data))
+
+    url_offsets, url_blob = _string_table([url.encode("utf-8") for url in urls])
+    term_offsets, term_blob = _string_table(terms)
+
+    docs_offset = HEADER.size
+    terms_offset = docs_offset + len(url_offsets) * 4 + len(url_blob)
+    # Alignement des offsets 64 bits sur 8 octets
+    terms_offset += -terms_offset % 8
+    postings_offset = terms_offset + len(postings_offsets) * 8 + len(term_offsets) * 4 + len(term_blob)
+    stats_offset = postings_offset + len(postings_data)
+    stats_offset += -stats_offset % 4
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, POSITIONAL if positional else LIST, len(urls), len(terms),
+            docs_offset, terms_offset, postings_offset, stats_offset,
+        ))
+        f.write(_little_endian(url_offsets))
+        f.write(url_blob)
+        f.write(b"\0" * (terms_offset - f.tell()))
+        f.write(_little_endian(postings_offsets))
+        f.write(_little_endian(term_offsets))
+        f.write(term_blob)
+        f.write(postings_data)
+        f.write(b"\0" * (stats_offset - f.tell()))
+        f.write(_little_endian(doc_lengths))
+        f.write(_little_endian(doc_freqs))
+    os.replace(tmp_path, path)
+
+
+class BinaryIndex(Mapping):
+    """
+    Read-only, memory-mapped inverted index written by `write_binary_index`.
+
+    It behaves like the JSON index dict (`token in index`, `index[token]`,
+    `index.get`, `items()`...): postings are decoded on access, to a list of
+    urls or a `{url: [positions]}` dict, and only the pages of the accessed
+    postings are read from disk. The last `cache_size` decoded postings are
+    kept in memory.
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic, version, kind, n_docs, n_terms,
+            docs_offset, terms_offset, postings_offset, stats_offset,
+        ) = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} : format d'index binaire inconnu")
+        self.positional = kind == POSITIONAL
+        self.n_docs = n_docs
+        self.n_terms = n_terms
+
+        view = memoryview(self._mm)
+        self._url_offsets = self._uint_array(view, docs_offset, n_docs + 1, "I")
+        self._url_blob = docs_offset + (n_docs + 1) * 4
+        self._postings_offsets = self._uint_array(view, terms_offset, n_terms + 1, "Q")
+        term_offsets_start = terms_offset + (n_terms + 1) * 8
+        self._term_offsets = self._uint_array(view, term_offsets_start, n_terms + 1, "I")
+        self._term_blob = term_offsets_start + (n_terms + 1) * 4
+        self._postings_start = postings_offset
+        self._doc_lengths = self._uint_array(view, stats_offset, n_docs, "I")
+        self._doc_freqs = self._uint_array(view, stats_offset + n_docs * 4, n_terms, "I")
+
+        self._urls = [None] * n_docs
+        self._postings = lru_cache(maxsize=cache_size)(self._decode_postings)
+
+    @staticmethod
+    def _uint_array(view: memoryview, start: int, count: int, typecode: str):
+        size = array(typecode).itemsize
+        values = view[start:start + count * size].cast(typecode)
+        if sys.byteorder == "big":
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    def close(self):
+        self._postings.cache_clear()
+        self._url_offsets = self._postings_offsets = self._term_offsets = None
+        self._doc_lengths = self._doc_freqs = None
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Dictionnaire des termes -------------------------------------------
+
+    def _term(self, i: int) -> bytes:
+        return self._mm[self._term_blob + self._term_offsets[i]:self._term_blob + self._term_offsets[i + 1]]
+
+    def _find(self, token: str) -> int:
+        """Rank of `token` in the term dictionary (binary search), -1 if absent"""
+
+        key = token.encode("utf-8")
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.n_terms and self._term(low) == key:
+            return low
+        return -1
+
+    def url(self, doc_id: int) -> str:
+        url = self._urls[doc_id]
+        if url is None:
+            start = self._url_blob + self._url_offsets[doc_id]
+            end = self._url_blob + self._url_offsets[doc_id + 1]
+            url = self._urls[doc_id] = self._mm[start:end].decode("utf-8")
+        return url
+
+    # --- Statistiques -------------------------------------------------------
+
+    def document_frequency(self, token: str) -> int:
+        """Number of postings of `token`, without decoding them"""
+
+        i = self._find(token)
+        return self._doc_freqs[i] if i >= 0 else 0
+
+    def document_lengths(self) -> Dict[str, int]:
+        """url -> length (last position + 1) of the documents of a positional index"""
+
+        return {self.url(doc_id): length for doc_id, length in enumerate(self._doc_lengths) if length}
+
+    # --- Postings -----------------------------------------------------------
+
+    def _decode_postings(self, i: int) -> Union[List[str], Dict[str, List[int]]]:
+        data = self._mm[
+            self._postings_start + self._postings_offsets[i]:self._postings_start + self._postings_offsets[i + 1]
+        ]
+        pos = 0
+
+        def varint():
+            nonlocal pos
+            value = shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    return value
+                shift += 7
+
+        n_postings = varint()
+        doc_id = 0
+        if not self.positional:
+            urls = []
+            for _ in range(n_postings):
+                doc_id += varint()
+                urls.append(self.url(doc_id))
+            return urls
+
+        postings = {}
+        for _ in range(n_postings):
+            doc_id += varint()
+            positions = []
+            position = 0
+            for _ in range(varint()):
+                position += varint()
+                positions.append(position)
+            postings[self.url(doc_id)] = positions
+        return postings
+
+    # --- Interface dict ------------------------------------------------------
+
+    def __getitem__(self, token: str):
+        i = self._find(token) if isinstance(token, str) else -1
+        if i < 0:
+            raise KeyError(token)
+        return self._postings(i)
+
+    def __contains__(self, token) -> bool:
+        return isinstance(token, str) and self._find(token) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.n_terms):
+            yield self._term(i).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.n_terms
+
+    def values(self):
+        return (self._postings(i) for i in range(self.n_terms))
+
+    def items(self):
+        return ((self._term(i).decode("utf-8"), self._postings(i)) for i in range(self.n_terms))
+
+
+def convert_json_index(json_path: str, binary_path: str = None) -> str:
+    """Convert a JSON inverted index to the binary format (`.idx` next to it by default)"""
+
+    if binary_path is None:
+        binary_path = os.path.splitext(json_path)[0] + ".idx"
+    with open(json_path, "r", encoding="utf-8") as f:
+        write_binary_index(json.load(f), binary_path)
+    return binary_path
+
+
+if __name__ == "__main__":
+    # python binary_index.py input/title_index.json ... : conversion des index JSON
+    for json_path in sys.argv[1:]:
+        print(f"{json_path} -> {convert_json_index(json_path)}")
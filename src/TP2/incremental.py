@@ -0,0 +1,352 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from index import FEATURE_INDEXES, IndexBuilder, merge_builders
+from json_parser import iter_json
+
+MANIFEST = "manifest.json"
+
+
+def fingerprint(product: Dict[str, Any]) -> str:
+    """Hash of a product: a re-crawled product is only re-indexed if it changed"""
+
+    encoded = json.dumps(product, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def without_documents(builder: IndexBuilder, dead: set) -> IndexBuilder:
+    """Copy of the indexes of a segment without the postings of the `dead` urls"""
+
+    if not dead:
+        return builder
+
+    def live(index):
+        filtered = {}
+        for token, postings in index.items():
+            if isinstance(postings, dict):
+                postings = {url: p for url, p in postings.items() if url not in dead}
+            else:
+                postings = [url for url in postings if url not in dead]
+            if postings:
+                filtered[token] = postings
+        return filtered
+
+    kept = IndexBuilder(builder.feature_indexes)
+    kept.title_index = live(builder.title_index)
+    kept.description_index = live(builder.description_index)
+    kept.features_index = {name: live(index) for name, index in builder.features_index.items()}
+    kept.reviews_index = {url: r for url, r in builder.reviews_index.items() if url not in dead}
+    kept.documents = len(kept.reviews_index)
+    return kept
+
+
+class IncrementalIndex:
+    """
+    Indexes updated product by product instead of being rebuilt.
+
+    The indexes are split into immutable segments (`seg_000001/`, the
+    JSON files of an `IndexBuilder`). Added or updated products are
+    buffered and written as a new segment by `flush`; the previous version
+    of an updated or deleted product is masked by a tombstone (its url in
+    the tombstones of its segment). `manifest.json` lists the segments,
+    their tombstones and the fingerprint of each product, so re-indexing a
+    crawl only touches the products that changed.
+
+    Merge policy: when `merge_factor` consecutive segments have the same
+    size tier (log base `merge_factor` of their documents), or when most
+    documents of a segment are deleted, the segments are merged into one
+    without their tombstoned documents, in a background thread if
+    `background`.
+
+    Products are identified by url: products without url are ignored.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        feature_indexes: Dict[str, str] = FEATURE_INDEXES,
+        max_buffered: int = 1000,
+        merge_factor: int = 4,
+        background: bool = True,
+    ):
+        self.directory = directory
+        self.feature_indexes = feature_indexes
+        self.max_buffered = max_buffered
+        self.merge_factor = merge_factor
+        self.background = background
+        os.makedirs(directory, exist_ok=True)
+
+        manifest = {}
+        manifest_path = os.path.join(directory, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        # Segments du plus ancien au plus récent : {"name", "documents"}
+        self.segments: List[Dict[str, Any]] = manifest.get("segments", [])
+        self.tombstones: Dict[str, set] = {
+            name: set(urls) for name, urls in manifest.get("tombstones", {}).items()
+        }
+        # url -> [segment, empreinte]
+        self.documents: Dict[str, List[str]] = manifest.get("documents", {})
+        self.next_segment = manifest.get("next_segment", 1)
+        # Incrémentée à chaque modification des index
+        self.generation = manifest.get("generation", 0)
+
+        # Produits en attente du prochain segment : url -> produit
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self._loaded: Dict[str, IndexBuilder] = {}
+        self._snapshot: Optional[IndexBuilder] = None
+        self._lock = threading.RLock()
+        self._merge_thread: Optional[threading.Thread] = None
+        self.stats = {"flushes": 0, "merges": 0, "merged_segments": 0, "expunged": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Mises à jour --------------------------------------------------------
+
+    def _mask(self, url: str):
+        """Mask the current version of `url` (pending or in a segment)"""
+
+        location = self.documents.pop(url, None)
+        if location is None:
+            return
+        segment = location[0]
+        if segment is None:
+            self.pending.pop(url, None)
+        else:
+            self.tombstones.setdefault(segment, set()).add(url)
+
+    def add(self, product: Dict[str, Any]) -> bool:
+        """Add or update a product; False if it is unchanged (or has no url)"""
+
+        url = product.get("url")
+        if not url:
+            return False
+        digest = fingerprint(product)
+        with self._lock:
+            location = self.documents.get(url)
+            if location is not None and location[1] == digest:
+                return False
+            self._mask(url)
+            self.pending[url] = product
+            self.documents[url] = [None, digest]
+            self._changed()
+            full = len(self.pending) >= self.max_buffered
+        if full:
+            self.flush()
+        return True
+
+    def delete(self, url: str) -> bool:
+        with self._lock:
+            if url not in self.documents:
+                return False
+            self._mask(url)
+            self._changed()
+        return True
+
+    def update_from_jsonl(self, jsonl_path: str, delete_missing: bool = False) -> Dict[str, int]:
+        """
+        Apply a crawl: new and changed products are (re-)indexed and, with
+        `delete_missing`, the products missing from the crawl are deleted.
+        """
+
+        return self.update(iter_json(jsonl_path), delete_missing)
+
+    def update(self, products: Iterable[Dict[str, Any]], delete_missing: bool = False) -> Dict[str, int]:
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+        seen = set()
+        for product in products:
+            url = product.get("url")
+            if not url:
+                continue
+            seen.add(url)
+            with self._lock:
+                known = url in self.documents
+            if self.add(product):
+                counts["updated" if known else "added"] += 1
+            else:
+                counts["unchanged"] += 1
+        if delete_missing:
+            with self._lock:
+                missing = [url for url in self.documents if url not in seen]
+            for url in missing:
+                counts["deleted"] += self.delete(url)
+        self.flush()
+        return counts
+
+    def _changed(self):
+        self.generation += 1
+        self._snapshot = None
+
+    # --- Segments ------------------------------------------------------------
+
+    def _segment_dir(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment(self, name: str) -> IndexBuilder:
+        # `_loaded` partagé avec le thread de fusion : accès sous verrou, lecture du disque hors verrou
+        with self._lock:
+            builder = self._loaded.get(name)
+        if builder is None:
+            builder = IndexBuilder.load(self._segment_dir(name), feature_indexes=self.feature_indexes)
+            with self._lock:
+                builder = self._loaded.setdefault(name, builder)
+        return builder
+
+    def _new_segment(self, builder: IndexBuilder) -> Dict[str, Any]:
+        """Write a segment (before it is listed in the manifest)"""
+
+        with self._lock:
+            name = f"seg_{self.next_segment:06d}"
+            self.next_segment += 1
+        os.makedirs(self._segment_dir(name))
+        builder.save(self._segment_dir(name))
+        with self._lock:
+            self._loaded[name] = builder
+        return {"name": name, "documents": builder.documents}
+
+    def _write_manifest(self):
+        manifest = {
+            "generation": self.generation,
+            "next_segment": self.next_segment,
+            "segments": self.segments,
+            "tombstones": {name: sorted(urls) for name, urls in self.tombstones.items() if urls},
+            "documents": self.documents,
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def flush(self):
+        """Write the pending products as a new segment and save the manifest"""
+
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            if pending:
+                builder = IndexBuilder(self.feature_indexes)
+                builder.add_all(pending.values())
+                segment = self._new_segment(builder)
+                self.segments.append(segment)
+                for url in pending:
+                    self.documents[url][0] = segment["name"]
+                self.stats["flushes"] += 1
+            self._write_manifest()
+        self.maybe_merge()
+
+    # --- Fusion --------------------------------------------------------------
+
+    def _tier(self, segment: Dict[str, Any]) -> int:
+        return int(math.log(max(segment["documents"], 1), self.merge_factor))
+
+    def _pick_merge(self) -> List[str]:
+        """Segments to merge according to the merge policy (empty: nothing to do)"""
+
+        segments = self.segments
+        for start in range(len(segments) - self.merge_factor + 1):
+            run = segments[start:start + self.merge_factor]
+            if len({self._tier(s) for s in run}) == 1:
+                return [s["name"] for s in run]
+        # Segment dont la majorité des documents est supprimée
+        for segment in segments:
+            if 2 * len(self.tombstones.get(segment["name"], ())) > segment["documents"]:
+                return [segment["name"]]
+        return []
+
+    def maybe_merge(self):
+        """Start a merge if the policy asks for one (one merge at a time)"""
+
+        with self._lock:
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            names = self._pick_merge()
+            if not names:
+                return
+            if self.background:
+                self._merge_thread = threading.Thread(target=self._merge_all, args=(names,), daemon=True)
+                self._merge_thread.start()
+                return
+        self._merge_all(names)
+
+    def _merge_all(self, names: List[str]):
+        # Une fusion peut en déclencher une autre (niveau supérieur)
+        while names:
+            self._merge(names)
+            with self._lock:
+                names = self._pick_merge()
+
+    def _merge(self, names: List[str]):
+        with self._lock:
+            dead = {name: set(self.tombstones.get(name, ())) for name in names}
+
+        # Hors verrou : les mises à jour continuent pendant la fusion
+        merged = merge_builders([
+            without_documents(self._segment(name), dead[name]) for name in names
+        ])
+        segment = self._new_segment(merged)
+
+        with self._lock:
+            # Documents supprimés ou mis à jour pendant la fusion
+            carried = set()
+            for name in names:
+                carried |= self.tombstones.pop(name, set()) - dead[name]
+            if carried:
+                self.tombstones[segment["name"]] = carried
+            for url, location in self.documents.items():
+                if location[0] in dead:
+                    location[0] = segment["name"]
+
+            position = next(i for i, s in enumerate(self.segments) if s["name"] == names[0])
+            self.segments[position:position + len(names)] = [segment]
+            self.stats["merges"] += 1
+            self.stats["merged_segments"] += len(names)
+            self.stats["expunged"] += sum(len(urls) for urls in dead.values())
+            self._snapshot = None
+            self._write_manifest()
+            for name in names:
+                self._loaded.pop(name, None)
+                shutil.rmtree(self._segment_dir(name), ignore_errors=True)
+
+    def wait(self):
+        """Wait for the running background merge"""
+
+        with self._lock:
+            thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+
+    def close(self):
+        self.flush()
+        self.wait()
+
+    # --- Lecture -------------------------------------------------------------
+
+    def snapshot(self) -> IndexBuilder:
+        """Current indexes: the live documents of every segment (flushes the pending products)"""
+
+        with self._lock:
+            if self.pending:
+                self.flush()
+            if self._snapshot is None:
+                self._snapshot = merge_builders([
+                    without_documents(self._segment(s["name"]), self.tombstones.get(s["name"], set()))
+                    for s in self.segments
+                ]) if self.segments else IndexBuilder(self.feature_indexes)
+            return self._snapshot
+
+    def indexes(self) -> Dict[str, Dict[str, Any]]:
+        return self.snapshot().indexes()
+
+    def save(self, output_dir: str, binary: bool = False):
+        """Write the current indexes like `IndexBuilder.save`"""
+
+        self.snapshot().save(output_dir, binary=binary)
@@ -1,6 +1,20 @@
-from typing import List, Dict, Any
+import heapq
+import json
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 from datetime import datetime
 from utils import tokenize_text
+from json_parser import iter_json, iter_lines, parse_product
+from binary_index import write_binary_index
+
+# Index de features : nom de l'index -> clé dans product_features
+FEATURE_INDEXES = {
+    "origin": "made in",
+    "brand": "brand",
+}
 
 
 def create_description_index(
@@ -17,9 +31,9 @@ def create_description_index(
         tokens = tokenize_text(description_doc)
         
         doc_url = doc.get("url") 
-        for token in set(tokens):
+        for token, positions in token_positions(tokens).items():
             token_index = description_index.setdefault(token, {})
-            token_index[doc_url] = [idx for idx, t in enumerate(tokens) if t == token]
+            token_index[doc_url] = positions.tolist()
     
     return description_index
 
@@ -37,9 +51,9 @@ def create_title_index(
         tokens = tokenize_text(title_doc)
         
         doc_url = doc.get("url") 
-        for token in set(tokens):
+        for token, positions in token_positions(tokens).items():
             token_index = title_index.setdefault(token, {})
-            token_index[doc_url] = [idx for idx, t in enumerate(tokens) if t == token]
+            token_index[doc_url] = positions.tolist()
     
     return title_index
 
@@ -100,3 +114,229 @@ def create_feature_index(
 
     return index
 
+
+def token_positions(tokens: List[str]) -> Dict[str, array]:
+    """
+    Positions of each distinct token of a document, in a single pass
+    (compact `array('I')`, 4 bytes per position).
+    """
+    
+    positions: Dict[str, array] = {}
+    for idx, token in enumerate(tokens):
+        found = positions.get(token)
+        if found is None:
+            positions[token] = array("I", (idx,))
+        else:
+            found.append(idx)
+    return positions
+
+
+def reviews_stats(doc_reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregated reviews of a document (total, mean and last rating)"""
+    
+    if not doc_reviews:
+        return {"total_reviews": 0, "mean_mark": 0, "last_rating": 0}
+    
+    last_review = sorted(
+        doc_reviews,
+        key=lambda r: datetime.strptime(r["date"], "%Y-%m-%d"),
+        reverse=True
+    )[0]
+    return {
+        "total_reviews": len(doc_reviews),
+        "mean_mark": sum([review.get("rating") for review in doc_reviews])/len(doc_reviews),
+        "last_rating": last_review.get("rating"),
+    }
+
+
+class IndexBuilder:
+    """
+    Build the title, description, feature and reviews indexes in a single
+    pass: each product is read once and each of its fields tokenized once.
+    
+    The indexes are the same as the ones of the `create_*_index` functions,
+    except that positions are kept as `array('I')` (lists once saved).
+    """
+    
+    def __init__(self, feature_indexes: Dict[str, str] = FEATURE_INDEXES):
+        self.feature_indexes = feature_indexes
+        # Positions en array('I') : converties en listes à l'écriture JSON
+        self.title_index: Dict[str, Dict[str, array]] = {}
+        self.description_index: Dict[str, Dict[str, array]] = {}
+        self.reviews_index: Dict[str, Dict[str, Any]] = {}
+        self.features_index: Dict[str, Dict[str, List[str]]] = {
+            name: {} for name in feature_indexes
+        }
+        self.documents = 0
+    
+    @classmethod
+    def from_jsonl(cls, jsonl_path: str, **kwargs) -> "IndexBuilder":
+        """Stream a products.jsonl file into a new builder"""
+        
+        builder = cls(**kwargs)
+        builder.add_all(iter_json(jsonl_path))
+        return builder
+    
+    @classmethod
+    def load(cls, input_dir: str, **kwargs) -> "IndexBuilder":
+        """Read back the JSON indexes written by `save` (positions as lists)"""
+        
+        builder = cls(**kwargs)
+        loaded = {}
+        for name in builder.indexes():
+            with open(os.path.join(input_dir, f"{name}_index.json"), "r", encoding="utf-8") as f:
+                loaded[name] = json.load(f)
+        builder.title_index = loaded.pop("title")
+        builder.description_index = loaded.pop("description")
+        builder.reviews_index = loaded.pop("reviews")
+        builder.features_index = loaded
+        # Une entrée de l'index des reviews par document
+        builder.documents = len(builder.reviews_index)
+        return builder
+    
+    def add_all(self, products: Iterable[Dict[str, Any]]):
+        for product in products:
+            self.add(product)
+    
+    def add(self, doc: Dict[str, Any]):
+        """Index every field of a product"""
+        
+        doc_url = doc.get("url")
+        self.documents += 1
+        
+        for index, field in (
+            (self.title_index, "title"),
+            (self.description_index, "description"),
+        ):
+            tokens = tokenize_text(doc.get(field) or "")
+            for token, positions in token_positions(tokens).items():
+                index.setdefault(token, {})[doc_url] = positions
+        
+        self.reviews_index[doc_url] = reviews_stats(doc.get("product_reviews") or [])
+        
+        if not doc_url:
+            return
+        features = doc.get("product_features") or {}
+        for name, feature in self.feature_indexes.items():
+            index = self.features_index[name]
+            for token in dict.fromkeys(tokenize_text(features.get(feature) or "")):
+                index.setdefault(token, []).append(doc_url)
+    
+    def indexes(self) -> Dict[str, Dict[str, Any]]:
+        """Index name -> index (names of the files `<name>_index.json`)"""
+        
+        return {
+            "title": self.title_index,
+            "description": self.description_index,
+            "reviews": self.reviews_index,
+            **self.features_index,
+        }
+    
+    def save(self, output_dir: str, binary: bool = False):
+        """
+        Write every index to `output_dir/<name>_index.json`, and with `binary`
+        the inverted indexes to `output_dir/<name>_index.idx` (binary_index format)
+        """
+        
+        for name, index in self.indexes().items():
+            with open(os.path.join(output_dir, f"{name}_index.json"), "w") as f:
+                json.dump(index, f, default=array.tolist)
+            if binary and name != "reviews":
+                write_binary_index(index, os.path.join(output_dir, f"{name}_index.idx"))
+
+
+def _iter_chunks(jsonl_path: str, chunk_size: int) -> Iterator[List[str]]:
+    """Lines of the products json, by chunks of `chunk_size` products"""
+    
+    chunk = []
+    # Fichier principal puis fichiers de la rotation du crawler
+    for line in iter_lines(jsonl_path):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _build_chunk(lines: List[str], feature_indexes: Dict[str, str]) -> IndexBuilder:
+    """Partial indexes of a chunk (run in a worker process)"""
+    
+    builder = IndexBuilder(feature_indexes)
+    builder.add_all(parse_product(line) for line in lines)
+    # Positions en listes pour le retour au processus principal : le pickle
+    # d'un array est ~10x plus lent que celui d'une liste d'entiers
+    for index in (builder.title_index, builder.description_index):
+        for postings in index.values():
+            for url, positions in postings.items():
+                postings[url] = positions.tolist()
+    return builder
+
+
+def _merge_index(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    K-way merge of the sorted term dictionaries of partial indexes.
+    Postings of a term are concatenated in chunk order, i.e. by document.
+    """
+    
+    merged = {}
+    terms = heapq.merge(*(
+        [(term, chunk) for term in sorted(index)]
+        for chunk, index in enumerate(partials)
+    ))
+    for term, chunk in terms:
+        postings = partials[chunk][term]
+        if isinstance(postings, dict):
+            # Index positionnel : positions remises en array('I')
+            merged.setdefault(term, {}).update(
+                (url, array("I", positions)) for url, positions in postings.items()
+            )
+        else:
+            merged.setdefault(term, []).extend(postings)
+    return merged
+
+
+def merge_builders(partials: List[IndexBuilder]) -> IndexBuilder:
+    """Merge the partial indexes of consecutive chunks into the final indexes"""
+    
+    feature_indexes = partials[0].feature_indexes if partials else FEATURE_INDEXES
+    builder = IndexBuilder(feature_indexes)
+    builder.title_index = _merge_index([p.title_index for p in partials])
+    builder.description_index = _merge_index([p.description_index for p in partials])
+    builder.features_index = {
+        name: _merge_index([p.features_index[name] for p in partials])
+        for name in feature_indexes
+    }
+    # Reviews : index non inversé, une entrée par document
+    for partial in partials:
+        builder.reviews_index.update(partial.reviews_index)
+    builder.documents = sum(p.documents for p in partials)
+    return builder
+
+
+def build_indexes_parallel(
+    jsonl_path: str,
+    n_workers: Optional[int] = None,
+    chunk_size: int = 10_000,
+    feature_indexes: Dict[str, str] = FEATURE_INDEXES,
+) -> IndexBuilder:
+    """
+    Build the indexes of a products json in a process pool: the file is
+    split into chunks of `chunk_size` products, each chunk is indexed by a
+    worker and the partial indexes are merged. Same indexes as
+    `IndexBuilder.from_jsonl` (terms sorted).
+    """
+    
+    n_workers = n_workers or os.cpu_count() or 1
+    partials = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        # Nombre borné de chunks en attente : la lecture ne devance pas les workers
+        pending = deque()
+        for chunk in _iter_chunks(jsonl_path, chunk_size):
+            pending.append(pool.submit(_build_chunk, chunk, feature_indexes))
+            if len(pending) >= 2 * n_workers:
+                partials.append(pending.popleft().result())
+        while pending:
+            partials.append(pending.popleft().result())
+    
+    return merge_builders(partials)
@@ -1,31 +1,78 @@
+import gzip
 import json
+import os
 import re
+from typing import Any, Dict, Iterator, List
+
+URL_PATTERN = re.compile(
+    r"/product/(?P<id>\d+)(?:\?variant=(?P<variant>[a-zA-Z0-9_-]+))?"
+)
+
+
+def open_jsonl(jsonl_path:str):
+    
+    """Open a products json, gzip-compressed or not"""
+    
+    # Sortie compressée du crawler (products.jsonl.gz)
+    opener = gzip.open if jsonl_path.endswith(".gz") else open
+    return opener(jsonl_path, "rt", encoding="utf-8")
+
+
+def rotated_paths(jsonl_path:str) -> List[str]:
+    
+    """
+    The products json and the parts of its rotation, in writing order:
+    products.jsonl, products.1.jsonl, products.2.jsonl... (JsonlSink of the TP1)
+    """
+    
+    directory, name = os.path.split(jsonl_path)
+    # products.jsonl.gz -> products.1.jsonl.gz
+    stem, dot, extensions = name.partition(".")
+    paths = [jsonl_path]
+    while True:
+        part = os.path.join(directory, f"{stem}.{len(paths)}{dot}{extensions}")
+        if not os.path.exists(part):
+            return paths
+        paths.append(part)
+
+
+def iter_lines(jsonl_path:str) -> Iterator[str]:
+    
+    """Lines of the products json, followed by the lines of its rotated parts"""
+    
+    for path in rotated_paths(jsonl_path):
+        with open_jsonl(path) as f:
+            yield from f
+
+
+def parse_product(line:str) -> Dict[str, Any]:
+    
+    """Parse one line of the products json, with the id and variant of its url"""
+    
+    product = json.loads(line)
+    product_url = product.get("url") or ""
+    match = URL_PATTERN.search(product_url)
+    if match:
+        product_id = match.groupdict().get("id")
+        if product_id:
+            product["id"] = product_id
+        product_variant = match.groupdict().get("variant")
+        if product_variant:
+            product["variant"] = product_variant
+    
+    return product
+
+
+def iter_json(jsonl_path:str) -> Iterator[Dict[str, Any]]:
+    
+    """Stream the products json, one product at a time"""
+    
+    for line in iter_lines(jsonl_path):
+        yield parse_product(line)
 
 
 def parse_json(jsonl_path:str):
     
     """Parse the products json"""
     
-    products = []
-    url_pattern = re.compile(
-        r"/product/(?P<id>\d+)(?:\?variant=(?P<variant>[a-zA-Z0-9_-]+))?"
-    )
-    with open(jsonl_path, "r", encoding="utf-8") as f:
-        i = 0
-        for line in f:
-            product = json.loads(line)
-            product_url = product.get("url") or ""
-            match = url_pattern.search(product_url)
-            if match:
-                product_id = match.groupdict().get("id")
-                if product_id:
-                    product["id"] = product_id
-                product_variant = match.groupdict().get("variant")
-                if product_variant:
-                    product["variant"] = product_variant
-                
-            products.append(product)
-    
-    return products
-            
-products = parse_json("./input/products.jsonl")
\ No newline at end of file
+    return list(iter_json(jsonl_path))
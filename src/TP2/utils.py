@@ -1,31 +1,147 @@
 import re
+import warnings
+from functools import lru_cache
+from typing import Iterable, List
+
+# Ponctuation supprimée avant la tokenisation (regex compilée une fois)
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Nombre de mots lemmatisés gardés en cache
+LEMMA_CACHE_SIZE = 100_000
+
+# Stop words anglais de NLTK, utilisés si le corpus n'est pas installé (hors ligne)
+ENGLISH_STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself
+yourselves he him his himself she she's her hers herself it it's its itself they them
+their theirs themselves what which who whom this that that'll these those am is are was
+were be been being have has had having do does did doing a an the and but if or because
+as until while of at by for with about against between into through during before after
+above below to from up down in out on off over under again further then once here there
+when where why how all any both each few more most other some such no nor not only own
+same so than too very s t can will just don don't should should've now d ll m o re ve y
+ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven
+haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+# Ressources NLTK chargées au premier besoin (pas au chargement du module).
+# Un échec est gardé aussi : pas de nouveau téléchargement à chaque appel
+_stop_words = {}
+_lemmatize = None
+_wordnet_found = False
+_fallback_warned = False
+
+
+def _nltk_resource(path: str, package: str) -> bool:
+    """
+    Make sure an NLTK resource is installed: it is only downloaded if
+    missing, and False is returned if it cannot be (offline).
+    """
+
+    import nltk
+
+    try:
+        nltk.data.find(path)
+        return True
+    except LookupError:
+        pass
+    try:
+        if nltk.download(package, quiet=True, raise_on_error=True):
+            nltk.data.find(path)
+            return True
+    except Exception:
+        pass
+    return False
 
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-nltk.download("stopwords")
-nltk.download('wordnet')
 
 def get_stop_words(lang:str="english"):
-    return set(stopwords.words(lang))
-
-STOPWORDS = get_stop_words()
-
-def tokenize_text(text:str, normalize:bool=False) -> str:
-    
-    """A word split tokenizer"""
-    
-    text = text.lower()
-    # on supprime la ponctuation
-    text  = re.sub(r"[^\w\s]", "", text)
-    # Tokenisation par espace
-    tokens = text.split()
-    # On ignore les stops words
-    tokens = [t for t in tokens if t not in STOPWORDS]
-    
+    """
+    Memoized NLTK stop words of `lang`. Without the NLTK corpus (offline),
+    the built-in English list is used, with a single warning; other
+    languages raise LookupError, without retrying the download.
+    """
+
+    if lang not in _stop_words:
+        if _nltk_resource(f"corpora/stopwords/{lang}", "stopwords"):
+            from nltk.corpus import stopwords
+            _stop_words[lang] = frozenset(stopwords.words(lang))
+        elif lang == "english":
+            warnings.warn("Stop words NLTK introuvables : liste anglaise intégrée utilisée", RuntimeWarning)
+            _stop_words[lang] = ENGLISH_STOP_WORDS
+        else:
+            _stop_words[lang] = None
+    stop_words = _stop_words[lang]
+    if stop_words is None:
+        raise LookupError(f"Stop words NLTK '{lang}' introuvables (nltk.download('stopwords'))")
+    return stop_words
+
+
+def __getattr__(name):
+    # STOPWORDS reste disponible, mais n'est chargé qu'au premier accès
+    if name == "STOPWORDS":
+        return get_stop_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_lemmatizer(fallback:bool=False):
+    """
+    Memoized WordNet lemmatizer (LRU cache of `LEMMA_CACHE_SIZE` words).
+    Without WordNet (offline), raises LookupError, without retrying the
+    download; with `fallback`, words are left as is, with a single warning.
+    """
+
+    global _lemmatize, _wordnet_found, _fallback_warned
+    if _lemmatize is None:
+        _wordnet_found = _nltk_resource("corpora/wordnet", "wordnet")
+        if _wordnet_found:
+            from nltk.stem import WordNetLemmatizer
+            lemmatize = WordNetLemmatizer().lemmatize
+        else:
+            def lemmatize(token):
+                return token
+        _lemmatize = lru_cache(maxsize=LEMMA_CACHE_SIZE)(lemmatize)
+
+    if not _wordnet_found:
+        if not fallback:
+            raise LookupError(
+                "WordNet introuvable (nltk.download('wordnet')) ;"
+                " lemmatize_fallback=True pour garder les tokens non lemmatisés"
+            )
+        if not _fallback_warned:
+            warnings.warn("WordNet introuvable : tokens non lemmatisés", RuntimeWarning)
+            _fallback_warned = True
+    return _lemmatize
+
+
+def tokenize_text(text:str, normalize:bool=False, lemmatize_fallback:bool=False) -> List[str]:
+
+    """A word split tokenizer (`lemmatize_fallback`: see `get_lemmatizer`)"""
+
+    stop_words = get_stop_words()
+    # Minuscules, on supprime la ponctuation, tokenisation par espace
+    # et on ignore les stops words
+    tokens = [t for t in PUNCTUATION.sub("", text.lower()).split() if t not in stop_words]
+
     # On normalise le text si demandé
     if normalize:
-        lemmatizer = WordNetLemmatizer()
-        tokens = [lemmatizer.lemmatize(t) for t in tokens]
-    
+        lemmatize = get_lemmatizer(lemmatize_fallback)
+        tokens = [lemmatize(t) for t in tokens]
+
     return tokens
+
+
+def tokenize_many(texts:Iterable[str], normalize:bool=False, lemmatize_fallback:bool=False) -> List[List[str]]:
+
+    """Tokenize a batch of texts (resources looked up once for the batch)"""
+
+    stop_words = get_stop_words()
+    lemmatize = get_lemmatizer(lemmatize_fallback) if normalize else None
+    sub = PUNCTUATION.sub
+
+    batch = []
+    for text in texts:
+        tokens = [t for t in sub("", text.lower()).split() if t not in stop_words]
+        if lemmatize is not None:
+            tokens = [lemmatize(t) for t in tokens]
+        batch.append(tokens)
+    return batch
@@ -0,0 +1,331 @@
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from config import INDEX_PATHS, JSON_INDEX_PATHS, PRODUCTS_PATH
+from product_store import ProductStore
+from search_engine import SearchEngine
+from quering import load_index, prepare_query, find_docs_with_any_token
+from ranking import field_statistics, linear_ranking_score, rank_documents
+from utils import tokenize_text
+from vector_ranking import VectorScorer, np
+
+INVERTED_INDEXES = ("title", "description", "brand", "origin")
+# Requêtes exemples, préparées avec lemmatize_fallback : le benchmark compare des
+# backends sur les mêmes tokens et tourne aussi hors ligne (sans WordNet)
+QUERIES = (
+    "brand MagicSteps",
+    "box of chocolate candy",
+    "Light-Up Sneakers made in america",
+)
+
+
+def bench_load(repeat: int = 20):
+    """Load time of the inverted indexes and of the postings of the sample queries: JSON vs binary"""
+
+    tokens = {t for query in QUERIES for t in tokenize_text(query)}
+    for label, paths in (("json", JSON_INDEX_PATHS), ("binary", INDEX_PATHS)):
+        size = sum(os.path.getsize(paths[key]) for key in INVERTED_INDEXES)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            indexes = {key: load_index(paths[key]) for key in INVERTED_INDEXES}
+        load_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for index in indexes.values():
+            for token in tokens:
+                index.get(token)
+        lookup_s = time.perf_counter() - start
+
+        print(
+            f"{label:<6}: {size / 1024:7.1f} KiB | load {load_s * 1e3:7.2f} ms"
+            f" | first lookup of {len(tokens)} tokens {lookup_s * 1e3:6.2f} ms"
+        )
+
+
+def rank_document_at_a_time(query_tokens, candidate_docs, indexes, field_stats, top_k=None):
+    """Previous rank_documents: linear_ranking_score per candidate, then a full sort"""
+
+    scored_docs = [
+        (url, linear_ranking_score(url, query_tokens, indexes, field_stats=field_stats))
+        for url in candidate_docs
+    ]
+    scored_docs.sort(key=lambda x: x[1], reverse=True)
+    return scored_docs[:top_k] if top_k else scored_docs
+
+
+def bench_ranking(repeat: int = 3) -> bool:
+    """
+    Ranking of the sample queries: BM25 statistics recomputed at each call
+    vs precomputed once. Returns False if the scores differ.
+    """
+
+    identical = True
+    for label, paths in (("json", JSON_INDEX_PATHS), ("binary", INDEX_PATHS)):
+        indexes = {key: load_index(path) for key, path in paths.items()}
+        start = time.perf_counter()
+        stats = field_statistics(indexes)
+        stats_s = time.perf_counter() - start
+
+        queries = []
+        for query in QUERIES:
+            tokens = prepare_query(query, indexes["origin_synonyms"], lemmatize_fallback=True)
+            queries.append((tokens, find_docs_with_any_token(tokens, indexes)))
+
+        timings, rankings = [], []
+        # field_stats={} : statistiques recalculées à chaque appel de bm25_score
+        for field_stats in ({}, stats):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                ranked = [rank_document_at_a_time(tokens, docs, indexes, field_stats) for tokens, docs in queries]
+            timings.append((time.perf_counter() - start) / repeat / len(queries))
+            rankings.append([dict(r) for r in ranked])
+
+        per_call_s, precomputed_s = timings
+        print(
+            f"{label:<6}: statistics {stats_s * 1e3:5.1f} ms | per query : recomputed {per_call_s * 1e3:8.1f} ms"
+            f" | precomputed {precomputed_s * 1e3:6.2f} ms | identical={rankings[0] == rankings[1]}"
+        )
+        identical = identical and rankings[0] == rankings[1]
+    return identical
+
+
+def bench_taat(repeat: int = 20) -> bool:
+    """
+    Document-at-a-time scoring vs term-at-a-time accumulators + top-k heap
+    (top 10 and all). Returns False if the rankings differ.
+    """
+
+    identical = True
+    for label, paths in (("json", JSON_INDEX_PATHS), ("binary", INDEX_PATHS)):
+        indexes = {key: load_index(path) for key, path in paths.items()}
+        stats = field_statistics(indexes)
+        queries = []
+        for query in QUERIES:
+            tokens = prepare_query(query, indexes["origin_synonyms"], lemmatize_fallback=True)
+            queries.append((tokens, find_docs_with_any_token(tokens, indexes)))
+
+        for top_k in (10, None):
+            timings, rankings = [], []
+            for rank in (rank_document_at_a_time, rank_documents):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    ranked = [rank(tokens, docs, indexes, field_stats=stats, top_k=top_k) for tokens, docs in queries]
+                timings.append((time.perf_counter() - start) / repeat / len(queries))
+                rankings.append(ranked)
+
+            daat_s, taat_s = timings
+            print(
+                f"{label:<6} top_k={top_k!s:<4}: document-at-a-time {daat_s * 1e3:6.2f} ms"
+                f" | term-at-a-time {taat_s * 1e3:6.2f} ms | identical={rankings[0] == rankings[1]}"
+            )
+            identical = identical and rankings[0] == rankings[1]
+    return identical
+
+
+def make_indexes(n_docs: int, seed: int = 0):
+    """
+    Synthetic indexes of `n_docs` documents (Zipf-like vocabulary): 4-token
+    titles, 10-token descriptions, one brand and one origin per document.
+    """
+
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(20_000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    brands = [f"brand{i}" for i in range(100)]
+    origins = [f"country{i}" for i in range(30)]
+
+    indexes = {"title": {}, "description": {}, "brand": {}, "origin": {}, "reviews": {}}
+    for i in range(n_docs):
+        url = f"https://example.com/product/{i}"
+        for key, length in (("title", 4), ("description", 10)):
+            for position, token in enumerate(rng.choices(vocabulary, cum_weights=cum_weights, k=length)):
+                indexes[key].setdefault(token, {}).setdefault(url, []).append(position)
+        indexes["brand"].setdefault(rng.choice(brands), []).append(url)
+        indexes["origin"].setdefault(rng.choice(origins), []).append(url)
+        indexes["reviews"][url] = {"mean_mark": round(rng.uniform(1, 5), 1)}
+    return indexes
+
+
+def bench_numpy(sizes=(10_000, 100_000, 1_000_000), top_k: int = 10, repeat: int = 3):
+    """
+    Python term-at-a-time ranking vs NumPy backend on synthetic indexes of
+    10k to 1M documents. Returns False if the rankings differ.
+    """
+
+    if np is None:
+        print("numpy n'est pas installé : benchmark ignoré")
+        return None
+
+    identical = True
+    queries = (["w50", "w120", "brand7"], ["w5", "w300"], ["w1000", "w2000", "w3000", "country3"])
+    for n_docs in sizes:
+        indexes = make_indexes(n_docs)
+        stats = field_statistics(indexes)
+        start = time.perf_counter()
+        scorer = VectorScorer(indexes, stats)
+        setup_s = time.perf_counter() - start
+
+        candidates = [find_docs_with_any_token(tokens, indexes) for tokens in queries]
+        timings, rankings = [], []
+        for rank in (
+            lambda tokens, docs: rank_documents(tokens, docs, indexes, top_k=top_k, field_stats=stats),
+            lambda tokens, docs: scorer.rank(tokens, docs, top_k=top_k),
+        ):
+            # Premier passage : postings convertis (cache) ; puis mesure
+            ranked = [rank(tokens, docs) for tokens, docs in zip(queries, candidates)]
+            start = time.perf_counter()
+            for _ in range(repeat):
+                ranked = [rank(tokens, docs) for tokens, docs in zip(queries, candidates)]
+            timings.append((time.perf_counter() - start) / repeat / len(queries))
+            rankings.append(ranked)
+
+        python_s, numpy_s = timings
+        mean_candidates = sum(map(len, candidates)) / len(candidates)
+        print(
+            f"{n_docs:>9} docs ({mean_candidates:>8.0f} candidates/query) : python {python_s * 1e3:8.1f} ms"
+            f" | numpy {numpy_s * 1e3:7.1f} ms (setup {setup_s:.1f}s) | identical={rankings[0] == rankings[1]}"
+        )
+        identical = identical and rankings[0] == rankings[1]
+    return identical
+
+
+def load_products_scan(products_path, urls):
+    """Previous _load_products_by_url: json.loads of every line of the JSONL file"""
+
+    selected = {}
+    with open(products_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if obj.get("url") in urls:
+                selected[obj["url"]] = obj
+    return selected
+
+
+def bench_products(scales=(1, 10, 100), top_k: int = 10, repeat: int = 20) -> bool:
+    """
+    Hydration of top-k results: full JSONL scan vs product store (offsets +
+    LRU cache). Returns False if the products read differ.
+    """
+
+    identical = True
+
+    with open(PRODUCTS_PATH, "r", encoding="utf-8") as f:
+        products = [json.loads(line) for line in f if line.strip()]
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            # Catalogue agrandi : copies des produits avec des urls distinctes
+            path = os.path.join(tmp, f"products_x{scale}.jsonl")
+            urls = []
+            with open(path, "w", encoding="utf-8") as f:
+                for copy in range(scale):
+                    for product in products:
+                        product = dict(product, url=f"{product['url']}#{copy}")
+                        urls.append(product["url"])
+                        f.write(json.dumps(product) + "\n")
+            queries = [set(rng.sample(urls, top_k)) for _ in range(repeat)]
+
+            start = time.perf_counter()
+            expected = [load_products_scan(path, query) for query in queries]
+            scan_s = (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            ProductStore(path).close()
+            build_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ProductStore(path) as store:
+                open_s = time.perf_counter() - start
+                start = time.perf_counter()
+                found = [store.get_many(query) for query in queries]
+                cold_s = (time.perf_counter() - start) / repeat
+                start = time.perf_counter()
+                for query in queries:
+                    store.get_many(query)
+                cached_s = (time.perf_counter() - start) / repeat
+
+            print(
+                f"{len(urls):>7} products : scan {scan_s * 1e3:8.2f} ms | store {cold_s * 1e3:6.3f} ms"
+                f" (cached {cached_s * 1e3:6.3f} ms, offsets built {build_s * 1e3:7.1f} ms, reopened {open_s * 1e3:6.1f} ms)"
+                f" | identical={found == expected}"
+            )
+            identical = identical and found == expected
+    return identical
+
+
+def bench_cache(n_queries: int = 300, top_k: int = 10) -> bool:
+    """
+    Repeated queries (Zipf-like popularity): search without and with the
+    result cache. Returns False if the results differ.
+    """
+
+    vocabulary = sorted({t for query in QUERIES for t in tokenize_text(query)} | {"shoes", "red", "blue", "gift"})
+    rng = random.Random(0)
+    distinct = list(QUERIES) + [" ".join(rng.sample(vocabulary, 3)) for _ in range(50)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(distinct))))
+    workload = rng.choices(distinct, cum_weights=cum_weights, k=n_queries)
+
+    timings, results = [], []
+    for cache_size in (0, 256):
+        with SearchEngine(cache_size=cache_size, lemmatize_fallback=True) as engine:
+            engine.search(QUERIES[0])  # chargement des index hors mesure
+            engine.clear_cache()
+            start = time.perf_counter()
+            results.append([engine.search(query, top_k=top_k) for query in workload])
+            timings.append((time.perf_counter() - start) / n_queries)
+    info = engine.cache_info()
+
+    no_cache_s, cache_s = timings
+    print(
+        f"{n_queries} queries ({len(set(workload))} distinct) : no cache {no_cache_s * 1e3:6.2f} ms/query"
+        f" | cache {cache_s * 1e3:6.3f} ms/query (hit rate {info['hit_rate']:.0%})"
+        f" | identical={results[0] == results[1]}"
+    )
+    return results[0] == results[1]
+
+
+def check_binary() -> bool:
+    """The binary indexes hold the same postings as the JSON indexes (False otherwise)"""
+
+    all_identical = True
+    for key in INVERTED_INDEXES:
+        expected = load_index(JSON_INDEX_PATHS[key])
+        binary = load_index(INDEX_PATHS[key])
+        # Listes d'urls dans l'ordre des doc ids côté binaire
+        identical = len(binary) == len(expected) and all(
+            sorted(binary[token]) == sorted(postings) if isinstance(postings, list)
+            else binary[token] == postings
+            for token, postings in expected.items()
+        )
+        print(f"{key:<12}: {'identical' if identical else 'DIFFERENT'}")
+        all_identical = all_identical and identical
+    return all_identical
+
+
+BENCHMARKS = {
+    "load": bench_load,
+    "ranking": bench_ranking,
+    "taat": bench_taat,
+    "numpy": bench_numpy,
+    "products": bench_products,
+    "cache": bench_cache,
+    "check": check_binary,
+}
+
+
+if __name__ == "__main__":
+    # python benchmark.py [nom ...] : tous les benchmarks par défaut.
+    # Code de sortie non nul si une vérification (identical=False) échoue
+    failed = [name for name in sys.argv[1:] or BENCHMARKS if BENCHMARKS[name]() is False]
+    if failed:
+        sys.exit(f"Vérification échouée : {', '.join(failed)}")
@@ -4,13 +4,19 @@ BASE_DIR = Path(__file__).resolve().parent
 
 INPUT_DIR = BASE_DIR / "input"
 
+# Index inversés au format binaire (.idx, lus par mmap), les autres en JSON
 INDEX_PATHS = {
-    "title": INPUT_DIR / "title_index.json",
-    "description": INPUT_DIR / "description_index.json",
-    "brand": INPUT_DIR / "brand_index.json",
+    "title": INPUT_DIR / "title_index.idx",
+    "description": INPUT_DIR / "description_index.idx",
+    "brand": INPUT_DIR / "brand_index.idx",
     "reviews": INPUT_DIR / "reviews_index.json",
-    "origin": INPUT_DIR / "origin_index.json",
+    "origin": INPUT_DIR / "origin_index.idx",
     "origin_synonyms": INPUT_DIR / "origin_synonyms.json"
 }
 
+# Mêmes index au format JSON
+JSON_INDEX_PATHS = {
+    key: path.with_suffix(".json") for key, path in INDEX_PATHS.items()
+}
+
 PRODUCTS_PATH = INPUT_DIR / "products.jsonl"
\ No newline at end of file
@@ -0,0 +1,121 @@
+import json
+import mmap
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+
+class ProductStore:
+    """
+    Products of a JSONL file, read by url without scanning the file.
+
+    The byte offset and length of each product line are indexed once and
+    saved next to the file (`products.offsets.json`, rebuilt when the
+    JSONL changes); a product is then read from the memory-mapped file and
+    parsed alone. The last `cache_size` products read are kept in an LRU
+    cache. As with a full scan, the last line of an url wins.
+
+    The returned dicts are shared with the cache: copy them before
+    modifying them.
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = str(path)
+        self.offsets_path = os.path.splitext(self.path)[0] + ".offsets.json"
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap d'un fichier vide impossible
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = self._load_offsets()
+
+    def _signature(self) -> Dict[str, int]:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load_offsets(self) -> Dict[str, list]:
+        """Offsets saved next to the file if still valid, else rebuilt"""
+
+        signature = self._signature()
+        try:
+            with open(self.offsets_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("signature") == signature:
+                return saved["offsets"]
+        except (OSError, ValueError):
+            pass
+
+        offsets = self.build_offsets()
+        try:
+            tmp_path = self.offsets_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "offsets": offsets}, f)
+            os.replace(tmp_path, self.offsets_path)
+        except OSError:
+            # Dossier en lecture seule : index gardé en mémoire
+            pass
+        return offsets
+
+    def build_offsets(self) -> Dict[str, list]:
+        """url -> [offset, length] of its line (one pass over the file)"""
+
+        offsets = {}
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    url = json.loads(line).get("url")
+                    if url is not None:
+                        offsets[url] = [offset, len(line)]
+                offset += len(line)
+        return offsets
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        product = self._cache.get(url)
+        if product is not None:
+            self._cache.move_to_end(url)
+            self.stats["hits"] += 1
+            return product
+
+        location = self.offsets.get(url)
+        if location is None:
+            return None
+        self.stats["misses"] += 1
+        offset, length = location
+        product = json.loads(self._mm[offset:offset + length])
+
+        self._cache[url] = product
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return product
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """url -> product, for the urls found in the store"""
+
+        products = {}
+        for url in urls:
+            product = self.get(url)
+            if product is not None:
+                products[url] = product
+        return products
+
+    def close(self):
+        self._cache.clear()
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
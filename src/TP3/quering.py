@@ -2,10 +2,16 @@ from typing import List, Dict, Any, Set, Optional
 import json
 
 from utils import tokenize_text
+from binary_index import BinaryIndex
 
 def load_index(index_path: str) -> Dict[str, Any]:
-    """Load an index by given the index path file"""
+    """
+    Load an index by given the index path file: a JSON file, or a binary
+    `.idx` index, memory-mapped and read through the same dict interface
+    """
 
+    if str(index_path).endswith(".idx"):
+        return BinaryIndex(str(index_path))
     with open(index_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -23,13 +29,15 @@ def resolve_origin_from_synonym(
 
 def prepare_query(
     query: str,
-    origin_synonyms_index: Dict[str, Any]
+    origin_synonyms_index: Dict[str, Any],
+    lemmatize_fallback: bool = False,
 ) -> List[str]:
     """
     Tokenize + normalize the user query and apply simple synonym expansion
-    for origin-related tokens.
+    for origin-related tokens. Without WordNet, raises LookupError unless
+    `lemmatize_fallback` (tokens kept unlemmatized).
     """
-    tokens = tokenize_text(query, normalize=True)
+    tokens = tokenize_text(query, normalize=True, lemmatize_fallback=lemmatize_fallback)
 
     expanded = set(tokens)
     for t in tokens:
@@ -1,6 +1,18 @@
+import heapq
 import math
+from array import array
+from operator import itemgetter
 from typing import Dict, List, Set, Any, Optional, Tuple
 
+TEXT_INDEXES = ("title", "description", "brand", "origin")
+
+DEFAULT_RANKING_WEIGHTS = {
+    "bm25_title": 2.0,
+    "bm25_description": 1.0,
+    "exact_match": 1.5,
+    "reviews": 0.7,
+}
+
 
 def exact_match_score(
     query_tokens: List[str],
@@ -48,71 +60,116 @@ def term_frequency(
     return tf
 
 
+class FieldStats:
+    """
+    BM25 statistics of a field index, computed once (at load time) instead
+    of at every `bm25_score` call: collection size N, length of each
+    document, average length, document frequency and IDF of each term.
+    """
+
+    def __init__(
+        self,
+        total_docs: int,
+        positional: bool,
+        doc_lens: Dict[str, int],
+        doc_freqs,
+    ):
+        self.total_docs = total_docs
+        self.positional = positional
+        self.doc_lens = doc_lens
+        # token -> df (dict, ou fonction de l'index binaire)
+        self._doc_freqs = doc_freqs
+        if positional:
+            self.avg_len = (sum(doc_lens.values()) / len(doc_lens)) if doc_lens else 0.0
+        else:
+            # Non-positional index (brand/origin):
+            # no notion of document length -> neutral normalization
+            self.avg_len = 1.0
+        self._idf: Dict[str, float] = {}
+
+    @classmethod
+    def from_index(cls, field_index: Dict[str, Dict[str, Any]]) -> "FieldStats":
+        """Statistics of a JSON index (one pass) or of a binary index (stored in the file)"""
+
+        if hasattr(field_index, "document_lengths"):
+            # Index binaire : longueurs et df écrites avec l'index
+            return cls(
+                total_docs=field_index.n_docs,
+                positional=field_index.positional,
+                doc_lens=field_index.document_lengths() if field_index.positional else {},
+                doc_freqs=field_index.document_frequency,
+            )
+
+        docs_union = set()
+        doc_freqs = {}
+        max_pos_by_doc: Dict[str, int] = {}
+        positional = False
+        for i, (token, postings) in enumerate(field_index.items()):
+            if i == 0:
+                positional = isinstance(postings, dict)
+            doc_freqs[token] = len(postings)
+            if isinstance(postings, dict):
+                docs_union.update(postings.keys())
+                if positional:
+                    # Reconstruct document lengths from positions
+                    for url, positions in postings.items():
+                        if positions:
+                            max_pos_by_doc[url] = max(
+                                max_pos_by_doc.get(url, -1),
+                                max(positions)
+                            )
+            elif isinstance(postings, list):
+                docs_union.update(postings)
+
+        return cls(
+            total_docs=len(docs_union),
+            positional=positional,
+            doc_lens={d: (m + 1) for d, m in max_pos_by_doc.items()},
+            doc_freqs=doc_freqs,
+        )
+
+    def doc_freq(self, token: str) -> int:
+        if isinstance(self._doc_freqs, dict):
+            return self._doc_freqs.get(token, 0)
+        return self._doc_freqs(token)
+
+    def idf(self, token: str, total_docs: Optional[int] = None) -> float:
+        """BM25 IDF of a token (memoized for the collection size of the index)"""
+
+        if total_docs is not None and total_docs != self.total_docs:
+            return bm25_idf(total_docs, self.doc_freq(token))
+        idf = self._idf.get(token)
+        if idf is None:
+            idf = self._idf[token] = bm25_idf(self.total_docs, self.doc_freq(token))
+        return idf
+
+
+def bm25_idf(N: int, df: int) -> float:
+    return math.log(1 + (N - df + 0.5) / (df + 0.5))
+
+
 def bm25_score(
     query_tokens: List[str],
     doc_url: str,
     field_index: Dict[str, Dict[str, Any]],
     total_docs: Optional[int] = None,
     k1: float = 1.2,
-    b: float = 0.75
+    b: float = 0.75,
+    stats: Optional[FieldStats] = None,
 ) -> float:
     """
     Compute the BM25 score of a document for a given query on a single field.
 
     In this implementation, we follow the BM25 formulation presented in the course,
     using only the inverted index (no access to raw documents).
-    """
-
-    # --------------------------------------------------
-    # Infer collection size N if not provided
-    # --------------------------------------------------
-    if total_docs is None:
-        docs_union = set()
-        for postings in field_index.values():
-            if isinstance(postings, dict):
-                docs_union.update(postings.keys())
-            elif isinstance(postings, list):
-                docs_union.update(postings)
-        total_docs = len(docs_union)
-
-    # --------------------------------------------------
-    # Detect whether the index is positional
-    # --------------------------------------------------
-    positional = False
-    for postings in field_index.values():
-        positional = isinstance(postings, dict)
-        break
-
-    # --------------------------------------------------
-    # Compute document lengths and average field length
-    # --------------------------------------------------
-    if positional:
-        # Reconstruct document lengths from positions
-        max_pos_by_doc: Dict[str, int] = {}
-        for postings in field_index.values():
-            if not isinstance(postings, dict):
-                continue
-            for url, positions in postings.items():
-                if positions:
-                    max_pos_by_doc[url] = max(
-                        max_pos_by_doc.get(url, -1),
-                        max(positions)
-                    )
 
-        doc_lens = {d: (m + 1) for d, m in max_pos_by_doc.items()}
-        avg_len = (sum(doc_lens.values()) / len(doc_lens)) if doc_lens else 0.0
+    `stats` are the precomputed statistics of the field (computed here if
+    missing): the cost of a call then only depends on the query postings.
+    """
 
-    else:
-        # Non-positional index (brand/origin):
-        # no notion of document length -> neutral normalization
-        doc_lens = {}
-        avg_len = 1.0
-
-    # --------------------------------------------------
-    # BM25 IDF function
-    # --------------------------------------------------
-    def idf(N: int, df: int) -> float:
-        return math.log(1 + (N - df + 0.5) / (df + 0.5))
+    if stats is None:
+        stats = FieldStats.from_index(field_index)
+    avg_len = stats.avg_len
 
     # --------------------------------------------------
     # BM25 scoring
@@ -120,26 +177,24 @@ def bm25_score(
     score = 0.0
 
     for token in query_tokens:
-        # Term frequency in the document
-        tf = term_frequency(token, doc_url, field_index)
-        if tf <= 0:
-            continue
-
         postings = field_index.get(token)
         if not postings:
             continue
 
-        # Document frequency
-        df = len(postings)
-        if df <= 0:
+        # Term frequency in the document
+        if isinstance(postings, dict):
+            tf = len(postings.get(doc_url, []))
+        else:
+            tf = 1 if doc_url in postings else 0
+        if tf <= 0:
             continue
 
-        # IDF component
-        token_idf = idf(total_docs, df)
+        # IDF component (document frequency = len(postings))
+        token_idf = stats.idf(token, total_docs)
 
         # Length normalization
         if isinstance(postings, dict):
-            doc_len = doc_lens.get(doc_url, 0)
+            doc_len = stats.doc_lens.get(doc_url, 0)
         else:
             doc_len = 1
 
@@ -155,6 +210,12 @@ def bm25_score(
     return score
 
 
+def field_statistics(indexes: Dict[str, Dict[str, Any]]) -> Dict[str, FieldStats]:
+    """BM25 statistics of the fields scored by the linear ranking model"""
+
+    return {key: FieldStats.from_index(indexes[key]) for key in ("title", "description")}
+
+
 def reviews_score(
     doc_url: str,
     reviews_index: Dict[str, Dict[str, Any]],
@@ -176,11 +237,15 @@ def linear_ranking_score(
     indexes: Dict[str, Dict[str, Any]],
     ranking_weights: Optional[Dict[str, float]] = None,
     bm25_params: Optional[Dict[str, float]] = None,
+    field_stats: Optional[Dict[str, FieldStats]] = None,
 ) -> float:
     """
     Compute the final linear ranking score for one document, as a weighted sum
     of several base ranking signals (Linear Ranking model).
 
+    `field_stats` are the BM25 statistics of title and description (see
+    `field_statistics`), computed once per index.
+
     Signals:
       - BM25(title)
       - BM25(description)
@@ -190,21 +255,22 @@ def linear_ranking_score(
 
     # Default weights
     if ranking_weights is None:
-        ranking_weights = {
-            "bm25_title": 2.0,
-            "bm25_description": 1.0,
-            "exact_match": 1.5,
-            "reviews": 0.7,
-        }
+        ranking_weights = DEFAULT_RANKING_WEIGHTS
 
     # bm25_params
     bm25_params = bm25_params or {}
     bm25_allowed_parms = {"k1", "b", "total_docs"}
     bm25_params = {k: v for k, v in bm25_params.items() if k in bm25_allowed_parms}
 
+    field_stats = field_stats or {}
+
     # Base ranking signals
-    s_bm25_title = bm25_score(query_tokens, doc_url, indexes["title"], **bm25_params)
-    s_bm25_desc = bm25_score(query_tokens, doc_url, indexes["description"], **bm25_params)
+    s_bm25_title = bm25_score(
+        query_tokens, doc_url, indexes["title"], stats=field_stats.get("title"), **bm25_params
+    )
+    s_bm25_desc = bm25_score(
+        query_tokens, doc_url, indexes["description"], stats=field_stats.get("description"), **bm25_params
+    )
     s_exact = exact_match_score(query_tokens, doc_url, indexes)
     s_reviews = reviews_score(doc_url, indexes["reviews"])
 
@@ -219,6 +285,94 @@ def linear_ranking_score(
     return final_score
 
 
+def _matching_docs(postings, doc_ids: Dict[str, int]):
+    """(url, doc id) of the candidates in the postings of a token (each url once)"""
+
+    urls = postings.keys() if isinstance(postings, dict) else set(postings)
+    # On parcourt la plus petite des deux listes
+    if len(urls) <= len(doc_ids):
+        for url in urls:
+            doc_id = doc_ids.get(url)
+            if doc_id is not None:
+                yield url, doc_id
+    else:
+        for url, doc_id in doc_ids.items():
+            if url in urls:
+                yield url, doc_id
+
+
+def bm25_accumulate(
+    query_tokens: List[str],
+    doc_ids: Dict[str, int],
+    field_index: Dict[str, Dict[str, Any]],
+    total_docs: Optional[int] = None,
+    k1: float = 1.2,
+    b: float = 0.75,
+    stats: Optional[FieldStats] = None,
+) -> array:
+    """
+    Term-at-a-time BM25: the postings of each query token are read once
+    and the contributions are accumulated per doc id (same sums, in the
+    same order, as `bm25_score`).
+    """
+
+    scores = array("d", bytes(8 * len(doc_ids)))
+    if stats is None:
+        stats = FieldStats.from_index(field_index)
+    avg_len = stats.avg_len
+    if avg_len <= 0:
+        return scores
+
+    for token in query_tokens:
+        postings = field_index.get(token)
+        if not postings:
+            continue
+        token_idf = stats.idf(token, total_docs)
+        positional = isinstance(postings, dict)
+
+        for url, doc_id in _matching_docs(postings, doc_ids):
+            if positional:
+                tf = len(postings[url])
+                doc_len = stats.doc_lens.get(url, 0)
+            else:
+                tf = 1
+                doc_len = 1
+            if tf <= 0:
+                continue
+            scores[doc_id] += token_idf * (
+                (tf * (k1 + 1)) /
+                (tf + k1 * (1 - b + b * (doc_len / avg_len)))
+            )
+
+    return scores
+
+
+def exact_match_accumulate(
+    query_tokens: List[str],
+    doc_ids: Dict[str, int],
+    indexes: Dict[str, Dict[str, Any]],
+) -> array:
+    """Term-at-a-time `exact_match_score` of every candidate"""
+
+    scores = array("d", bytes(8 * len(doc_ids)))
+    if not query_tokens:
+        return scores
+
+    matched = [0] * len(doc_ids)
+    for token in set(query_tokens):
+        token_docs = set()
+        for index_key in TEXT_INDEXES:
+            postings = indexes[index_key].get(token)
+            if postings:
+                token_docs.update(doc_id for _, doc_id in _matching_docs(postings, doc_ids))
+        for doc_id in token_docs:
+            matched[doc_id] += 1
+
+    for doc_id, count in enumerate(matched):
+        scores[doc_id] = count / len(query_tokens)
+    return scores
+
+
 def rank_documents(
     query_tokens: List[str],
     candidate_docs: Set[str],
@@ -226,26 +380,57 @@ def rank_documents(
     ranking_weights: Optional[Dict[str, float]] = None,
     bm25_params: Optional[Dict[str, float]] = None,
     top_k: Optional[int] = None,
+    field_stats: Optional[Dict[str, FieldStats]] = None,
 ) -> List[Tuple[str, float]]:
     """
     Rank a set of candidate documents for a query using the linear ranking model.
+
+    Term-at-a-time evaluation: each candidate gets a dense doc id, the
+    postings of each query token are walked once per index and the signals
+    are accumulated in arrays, then the `top_k` best documents are selected
+    with a heap. Scores are the ones of `linear_ranking_score`.
     """
-    scored_docs = []
-    
-    for doc_url in candidate_docs:
-        s = linear_ranking_score(
-            doc_url=doc_url,
-            query_tokens=query_tokens,
-            indexes=indexes,
-            ranking_weights=ranking_weights,
-            bm25_params=bm25_params,
+
+    # Default weights
+    if ranking_weights is None:
+        ranking_weights = DEFAULT_RANKING_WEIGHTS
+    bm25_params = {k: v for k, v in (bm25_params or {}).items() if k in {"k1", "b", "total_docs"}}
+
+    # Statistiques BM25 calculées une fois pour tous les candidats
+    if field_stats is None:
+        field_stats = field_statistics(indexes)
+
+    docs = list(candidate_docs)
+    doc_ids = {url: doc_id for doc_id, url in enumerate(docs)}
+
+    s_bm25_title = bm25_accumulate(
+        query_tokens, doc_ids, indexes["title"], stats=field_stats.get("title"), **bm25_params
+    )
+    s_bm25_desc = bm25_accumulate(
+        query_tokens, doc_ids, indexes["description"], stats=field_stats.get("description"), **bm25_params
+    )
+    s_exact = exact_match_accumulate(query_tokens, doc_ids, indexes)
+
+    w_title = ranking_weights.get("bm25_title", 0.0)
+    w_desc = ranking_weights.get("bm25_description", 0.0)
+    w_exact = ranking_weights.get("exact_match", 0.0)
+    w_reviews = ranking_weights.get("reviews", 0.0)
+    reviews_index = indexes["reviews"]
+
+    # Linear combination
+    scored_docs = [
+        (
+            url,
+            w_title * s_bm25_title[doc_id]
+            + w_desc * s_bm25_desc[doc_id]
+            + w_exact * s_exact[doc_id]
+            + w_reviews * reviews_score(url, reviews_index)
         )
-        scored_docs.append((doc_url, s))
+        for doc_id, url in enumerate(docs)
+    ]
 
-    scored_docs.sort(key=lambda x: x[1], reverse=True)
-    
     if top_k:
-        scored_docs = scored_docs[:top_k]
-        
+        # Même ordre que le tri complet (nlargest est stable)
+        return heapq.nlargest(top_k, scored_docs, key=itemgetter(1))
+    scored_docs.sort(key=itemgetter(1), reverse=True)
     return scored_docs
-
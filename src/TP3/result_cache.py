@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class ResultCache:
+    """
+    Bounded cache of search results (LRU eviction, optional TTL).
+
+    Every entry is tied to the version of the indexes it was computed
+    with: when `check_version` sees another version, the cache is emptied.
+    `maxsize=0` disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def check_version(self, version: Hashable):
+        """Empty the cache if the indexes changed since the cached results"""
+
+        if version != self.version:
+            self.invalidate()
+            self.version = version
+
+    def invalidate(self):
+        """Drop every entry: the results were computed with outdated indexes"""
+
+        if self._entries:
+            self.stats["invalidations"] += 1
+        self._entries.clear()
+        self.version = None
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        value, expires = entry
+        if expires is not None and time.monotonic() >= expires:
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        """Hit/miss statistics and current size"""
+
+        requests = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            hit_rate=self.stats["hits"] / requests if requests else 0.0,
+        )
@@ -1,6 +1,8 @@
 # __init__.py
 from typing import List, Dict, Any, Set, Optional, Tuple
 import json
+import os
+import time
 
 from config import INDEX_PATHS, PRODUCTS_PATH
 from quering import (
@@ -9,7 +11,18 @@ from quering import (
     find_docs_with_any_token,
     find_docs_with_all_tokens,
 )
-from ranking import rank_documents
+from product_store import ProductStore
+from ranking import rank_documents, field_statistics
+from result_cache import ResultCache
+from vector_ranking import VectorScorer, np
+
+# Backends du ranking : "python" (rank_documents) ou "numpy" (VectorScorer)
+SCORING_BACKENDS = ("python", "numpy")
+
+
+def _freeze(params: Optional[Dict[str, float]]):
+    """Hashable form of a parameters dict (cache key)"""
+    return None if params is None else tuple(sorted(params.items()))
 
 
 class SearchEngine:
@@ -25,16 +38,43 @@ class SearchEngine:
         use_and_filter: bool = False,
         ranking_weights: Optional[Dict[str, float]] = None,
         bm25_params: Optional[Dict[str, float]] = None,
+        scoring_backend: str = "python",
+        product_cache_size: int = 1024,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = None,
+        reload_check_interval: float = 1.0,
+        lemmatize_fallback: bool = False,
     ):
+        if scoring_backend not in SCORING_BACKENDS:
+            raise ValueError(
+                f"Backend inconnu : {scoring_backend!r} (attendu : {', '.join(SCORING_BACKENDS)})"
+            )
+        # Sans numpy, le backend "numpy" revient au ranking Python
+        self.scoring_backend = scoring_backend if np is not None else "python"
         self.index_paths = index_paths
         self.products_path = products_path
+        self.product_cache_size = product_cache_size
         self.use_and_filter = use_and_filter
+        # Sans WordNet : requêtes non lemmatisées plutôt qu'une LookupError
+        self.lemmatize_fallback = lemmatize_fallback
 
         # Ranking configuration
         self.ranking_weights = ranking_weights
         self.bm25_params = bm25_params
 
         self.indexes = indexes
+        self.indexes_from_files = indexes is None
+        self.field_stats = None
+        self.vector_scorer = None
+        self.product_store = None
+
+        # Cache des résultats, vidé quand les index changent
+        self.result_cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        # Fichiers vérifiés (os.stat) au plus une fois par intervalle, 0 : à chaque recherche
+        self.reload_check_interval = reload_check_interval
+        self._files_version = None
+        self._files_checked_at = None
+        self._indexes_id = None
 
     def _get_indexes(self) -> Dict[str, Dict[str, Any]]:
         """Get indexes, loading them if needed."""
@@ -42,27 +82,121 @@ class SearchEngine:
             self.indexes = {k: load_index(self.index_paths[k]) for k in self.index_paths.keys()}
         return self.indexes
 
+    def _files_signature(self) -> Tuple:
+        """(path, size, mtime) of the index files and of the products file"""
+        signature = []
+        for path in (*self.index_paths.values(), self.products_path):
+            try:
+                stat = os.stat(path)
+                signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def _close_indexes(self):
+        """Close the indexes loaded from the index files (mmap of the binary indexes)"""
+        if self.indexes is not None and self.indexes_from_files:
+            for index in self.indexes.values():
+                if hasattr(index, "close"):
+                    index.close()
+
+    def _close_product_store(self):
+        if self.product_store is not None:
+            self.product_store.close()
+            self.product_store = None
+
+    def _reset(self):
+        """Close and forget the loaded indexes and everything computed from them"""
+        self._close_indexes()
+        self._close_product_store()
+        self.indexes = None
+        self.field_stats = None
+        self.vector_scorer = None
+
+    def close(self):
+        """Release the memory-mapped indexes and the products file"""
+        if self.indexes_from_files:
+            self._reset()
+        else:
+            # Index passés au constructeur : fermés par l'appelant
+            self._close_product_store()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def index_version(self) -> Tuple:
+        """
+        Version of the indexes used by `search`: signature of the files and
+        identity of the loaded indexes. Index or products files changed on
+        disk are reloaded (checked every `reload_check_interval` seconds),
+        and statistics of replaced indexes recomputed.
+        """
+        now = time.monotonic()
+        if (
+            self._files_checked_at is not None
+            and now - self._files_checked_at < self.reload_check_interval
+        ):
+            signature = self._files_version
+        else:
+            signature = self._files_signature()
+            self._files_checked_at = now
+        if signature != self._files_version:
+            # Anciennes ressources fermées, puis cache vidé, avant de charger les nouvelles.
+            # Index passés au constructeur : gardés, seul le catalogue est relu
+            if self._files_version is not None and self.indexes_from_files:
+                self._reset()
+            else:
+                self._close_product_store()
+            if self._files_version is not None:
+                self.result_cache.invalidate()
+            self._files_version = signature
+
+        indexes_id = id(self._get_indexes())
+        if indexes_id != self._indexes_id:
+            # engine.indexes remplacé : statistiques à recalculer
+            self.field_stats = None
+            self.vector_scorer = None
+            self._indexes_id = indexes_id
+        return signature, indexes_id
+
+    def clear_cache(self):
+        """Empty the result cache (e.g. after modifying `indexes` in place)"""
+        self.result_cache.clear()
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the result cache"""
+        return self.result_cache.info()
+
+    def _get_field_stats(self):
+        """BM25 statistics of the indexes, computed once"""
+        if self.field_stats is None:
+            self.field_stats = field_statistics(self._get_indexes())
+        return self.field_stats
+
+    def _get_vector_scorer(self) -> VectorScorer:
+        """NumPy scorer of the indexes, built once"""
+        if self.vector_scorer is None:
+            self.vector_scorer = VectorScorer(self._get_indexes(), self._get_field_stats())
+        return self.vector_scorer
+
+    def _get_product_store(self) -> ProductStore:
+        """Product store of the JSONL file (offsets index + LRU cache), opened once"""
+        if self.product_store is None:
+            self.product_store = ProductStore(self.products_path, cache_size=self.product_cache_size)
+        return self.product_store
+
     def _load_products_by_url(self, urls: Set[str]) -> Dict[str, Dict[str, Any]]:
         """
         Load products from the JSONL file, keeping only documents whose URL is in `urls`.
         Returns a dict: url -> product dict.
         """
-        selected: Dict[str, Dict[str, Any]] = {}
-
         if not urls:
-            return selected
-
-        with open(self.products_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                obj = json.loads(line)
-                u = obj.get("url")
-                if u in urls:
-                    selected[u] = obj
-
-        return selected
+            return {}
+        # Lecture des seules lignes demandées (offsets), sans parcourir le fichier
+        return self._get_product_store().get_many(urls)
 
     def search(self, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -75,10 +209,27 @@ class SearchEngine:
         Returns:
             List of product dicts, each enriched with a "_score" key.
         """
-        indexes = self._get_indexes()
+        self.result_cache.check_version(self.index_version())
+        indexes = self.indexes
 
         # Query preparation (tokenize + normalize + synonym expansion)
-        query_tokens = prepare_query(query, indexes["origin_synonyms"])
+        query_tokens = prepare_query(query, indexes["origin_synonyms"], self.lemmatize_fallback)
+
+        # Résultat en cache : même requête normalisée (tokens triés, le score ne
+        # dépend pas de leur ordre) et mêmes paramètres
+        cache_key = (
+            tuple(sorted(query_tokens)),
+            self.use_and_filter,
+            self.scoring_backend,
+            _freeze(self.ranking_weights),
+            _freeze(self.bm25_params),
+            top_k,
+        )
+        # Résultats gardés encodés en JSON : chaque appel reçoit ses propres
+        # produits, que l'appelant peut modifier (reviews, features...)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
 
         # Candidate retrieval
         if self.use_and_filter:
@@ -87,14 +238,24 @@ class SearchEngine:
             candidate_docs = find_docs_with_any_token(query_tokens, indexes)
 
         # Ranking
-        ranked_docs = rank_documents(
-            query_tokens=query_tokens,
-            candidate_docs=candidate_docs,
-            indexes=indexes,
-            ranking_weights=self.ranking_weights,
-            bm25_params=self.bm25_params,
-            top_k=top_k,
-        )
+        if self.scoring_backend == "numpy":
+            ranked_docs = self._get_vector_scorer().rank(
+                query_tokens=query_tokens,
+                candidate_docs=candidate_docs,
+                ranking_weights=self.ranking_weights,
+                bm25_params=self.bm25_params,
+                top_k=top_k,
+            )
+        else:
+            ranked_docs = rank_documents(
+                query_tokens=query_tokens,
+                candidate_docs=candidate_docs,
+                indexes=indexes,
+                ranking_weights=self.ranking_weights,
+                bm25_params=self.bm25_params,
+                top_k=top_k,
+                field_stats=self._get_field_stats(),
+            )
 
         # Load products for the ranked URLs only
         docs_urls = [url for url, _ in ranked_docs]
@@ -110,5 +271,8 @@ class SearchEngine:
             product["_score"] = score
             results.append(product)
 
-        return results
+        # Décodés à nouveau : copies indépendantes du cache du ProductStore
+        encoded = json.dumps(results)
+        self.result_cache.put(cache_key, encoded)
+        return json.loads(encoded)
 
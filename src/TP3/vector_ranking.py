@@ -0,0 +1,180 @@
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ranking import (
+    DEFAULT_RANKING_WEIGHTS,
+    TEXT_INDEXES,
+    FieldStats,
+    field_statistics,
+    reviews_score,
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+
+class VectorScorer:
+    """
+    NumPy backend of the linear ranking model (`rank_documents`).
+
+    Every document of the indexes gets a global doc id; document lengths
+    and review means are arrays indexed by doc id, and the postings of a
+    token are turned once into arrays of doc ids and term frequencies (LRU
+    cache of `cache_size` postings). A query is then scored for all its
+    candidates in a few array operations per token. The arithmetic is the
+    one of `bm25_accumulate` (same operations in the same order), so the
+    scores and the ranking are the same as the Python backend.
+    """
+
+    def __init__(
+        self,
+        indexes: Dict[str, Dict[str, Any]],
+        field_stats: Optional[Dict[str, FieldStats]] = None,
+        cache_size: int = 4096,
+    ):
+        if np is None:
+            raise ImportError("Le backend de ranking 'numpy' nécessite numpy (pip install numpy)")
+        self.indexes = indexes
+        self.field_stats = field_stats if field_stats is not None else field_statistics(indexes)
+
+        # Doc ids globaux : tous les documents des index
+        urls = dict.fromkeys(indexes["reviews"])
+        for key in TEXT_INDEXES:
+            index = indexes[key]
+            if hasattr(index, "url"):
+                # Index binaire : table doc id -> url du fichier
+                urls.update(dict.fromkeys(index.url(i) for i in range(index.n_docs)))
+            else:
+                for postings in index.values():
+                    urls.update(dict.fromkeys(postings))
+        self.urls = list(urls)
+        self.doc_ids = {url: doc_id for doc_id, url in enumerate(self.urls)}
+
+        self.doc_lens = {}
+        for key, stats in self.field_stats.items():
+            lengths = np.zeros(len(self.urls))
+            for url, length in stats.doc_lens.items():
+                lengths[self.doc_ids[url]] = length
+            self.doc_lens[key] = lengths
+
+        reviews_index = indexes["reviews"]
+        self.reviews = np.fromiter(
+            (reviews_score(url, reviews_index) for url in self.urls), dtype=np.float64, count=len(self.urls)
+        )
+
+        self._postings = lru_cache(maxsize=cache_size)(self._postings_arrays)
+
+        # Doc id global -> rang du candidat (-1 : pas candidat), alloué une fois :
+        # une requête n'écrit puis ne remet à -1 que les entrées de ses candidats
+        self._local = np.full(len(self.urls), -1, dtype=np.int64)
+        self._local_lock = threading.Lock()
+
+    def _postings_arrays(self, key: str, token: str):
+        """(doc ids, tf, positional) of the postings of a token, None if absent"""
+
+        postings = self.indexes[key].get(token)
+        if not postings:
+            return None
+        if isinstance(postings, dict):
+            ids = np.fromiter((self.doc_ids[url] for url in postings), dtype=np.int64, count=len(postings))
+            tf = np.fromiter((len(p) for p in postings.values()), dtype=np.float64, count=len(postings))
+            return ids, tf, True
+        # Liste d'urls : chaque document une fois
+        ids = np.unique(np.fromiter((self.doc_ids[url] for url in postings), dtype=np.int64, count=len(postings)))
+        return ids, np.ones(len(ids)), False
+
+    def _bm25(self, key, query_tokens, local, n_candidates, k1, b, total_docs):
+        scores = np.zeros(n_candidates)
+        stats = self.field_stats.get(key)
+        if stats is None:
+            stats = self.field_stats[key] = FieldStats.from_index(self.indexes[key])
+        avg_len = stats.avg_len
+        if avg_len <= 0:
+            return scores
+
+        for token in query_tokens:
+            postings = self._postings(key, token)
+            if postings is None:
+                continue
+            ids, tf, positional = postings
+            positions = local[ids]
+            mask = (positions >= 0) & (tf > 0)
+            if not mask.any():
+                continue
+            tf = tf[mask]
+            doc_len = self.doc_lens[key][ids[mask]] if positional else np.ones(len(tf))
+            token_idf = stats.idf(token, total_docs)
+            scores[positions[mask]] += token_idf * (
+                (tf * (k1 + 1)) /
+                (tf + k1 * (1 - b + b * (doc_len / avg_len)))
+            )
+        return scores
+
+    def _exact_match(self, query_tokens, local, n_candidates):
+        if not query_tokens:
+            return np.zeros(n_candidates)
+        matched = np.zeros(n_candidates, dtype=np.int64)
+        for token in set(query_tokens):
+            present = np.zeros(n_candidates, dtype=bool)
+            for key in TEXT_INDEXES:
+                postings = self._postings(key, token)
+                if postings is not None:
+                    positions = local[postings[0]]
+                    present[positions[positions >= 0]] = True
+            matched += present
+        return matched / len(query_tokens)
+
+    def rank(
+        self,
+        query_tokens: List[str],
+        candidate_docs: Set[str],
+        ranking_weights: Optional[Dict[str, float]] = None,
+        bm25_params: Optional[Dict[str, float]] = None,
+        top_k: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Same arguments and result as `ranking.rank_documents`"""
+
+        if ranking_weights is None:
+            ranking_weights = DEFAULT_RANKING_WEIGHTS
+        bm25_params = bm25_params or {}
+        k1 = bm25_params.get("k1", 1.2)
+        b = bm25_params.get("b", 0.75)
+        total_docs = bm25_params.get("total_docs")
+
+        docs = list(candidate_docs)
+        n_candidates = len(docs)
+        if not n_candidates:
+            return []
+        candidates = np.fromiter((self.doc_ids[url] for url in docs), dtype=np.int64, count=n_candidates)
+        with self._local_lock:
+            local = self._local
+            local[candidates] = np.arange(n_candidates)
+            try:
+                s_bm25_title = self._bm25("title", query_tokens, local, n_candidates, k1, b, total_docs)
+                s_bm25_desc = self._bm25("description", query_tokens, local, n_candidates, k1, b, total_docs)
+                s_exact = self._exact_match(query_tokens, local, n_candidates)
+            finally:
+                local[candidates] = -1
+
+        # Linear combination
+        scores = (
+            ranking_weights.get("bm25_title", 0.0) * s_bm25_title
+            + ranking_weights.get("bm25_description", 0.0) * s_bm25_desc
+            + ranking_weights.get("exact_match", 0.0) * s_exact
+            + ranking_weights.get("reviews", 0.0) * self.reviews[candidates]
+        )
+
+        # Tri stable décroissant (même ordre que rank_documents) ; pour un top k,
+        # seuls les candidats au moins égaux au k-ième score sont triés
+        if top_k and top_k < n_candidates:
+            kth = np.partition(scores, n_candidates - top_k)[n_candidates - top_k]
+            selected = np.flatnonzero(scores >= kth)
+        else:
+            selected = np.arange(n_candidates)
+        order = selected[np.argsort(-scores[selected], kind="stable")]
+        if top_k:
+            order = order[:top_k]
+        return [(docs[i], float(scores[i])) for i in order]
@@ -0,0 +1,25 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+TP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "TP1")
+
+# Les modules du TP s'importent à plat, comme depuis le dossier du TP
+sys.path.insert(0, TP_DIR)
+
+# benchmark.py du TP1 (nom de module partagé avec les autres TP) : importable
+# par les tests sous le nom `tp1_benchmark`
+_spec = importlib.util.spec_from_file_location("tp1_benchmark", os.path.join(TP_DIR, "benchmark.py"))
+tp1_benchmark = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tp1_benchmark)
+sys.modules["tp1_benchmark"] = tp1_benchmark
+
+
+@pytest.fixture
+def catalogue():
+    """Url du serveur local du benchmark (20 produits, sans latence)"""
+
+    with tp1_benchmark.serve_catalogue(n_products=20, latency=0) as base_url:
+        yield base_url
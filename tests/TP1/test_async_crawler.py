@@ -0,0 +1,24 @@
+import pytest
+
+from async_crawler import AsyncCrawler
+from crawler import Crawler
+from metrics import Metrics
+
+
+def crawl(crawler_class, base_url, **kwargs):
+    metrics = Metrics()
+    crawler = crawler_class([f"{base_url}/products"], max_pages=1_000, sleep_seconds=0, metrics=metrics, **kwargs)
+    results = crawler.run()
+    return {page["url"] for page in results}, crawler, metrics
+
+
+@pytest.mark.parametrize("parser_workers", [None, 2])
+def test_async_crawler_returns_the_pages_of_run(catalogue, parser_workers):
+    expected, crawler, metrics = crawl(Crawler, catalogue)
+    pages, async_crawler, async_metrics = crawl(AsyncCrawler, catalogue, concurrency=4, parser_workers=parser_workers)
+
+    assert pages == expected
+    assert async_crawler.visited == crawler.visited
+    # /cart, interdit par le robots.txt du serveur local, est compté par les deux crawlers
+    assert f"{catalogue}/cart" in async_crawler.visited
+    assert async_metrics.counters[("robots_disallowed", None)] == metrics.counters[("robots_disallowed", None)] == 1
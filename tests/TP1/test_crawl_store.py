@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from crawler import Crawler
+from metrics import Metrics
+
+
+def test_shutdown_removes_frontier_overflow_and_close_releases_store(tmp_path, catalogue):
+    # Frontière de 2 urls en mémoire : le reste déborde à côté de la base
+    with Crawler(
+        [f"{catalogue}/products"],
+        max_pages=3,
+        state_path=str(tmp_path / "crawl.db"),
+        max_frontier_in_memory=2,
+    ) as crawler:
+        crawler.run()
+        assert crawler.frontier._overflow_path is None
+        assert not list(tmp_path.glob("frontier-*"))
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        crawler.store.conn.execute("SELECT 1")
+
+
+def test_resume_counts_unchanged_pages_in_max_pages(tmp_path, catalogue):
+    seeds = [f"{catalogue}/products"]
+    cache_path = str(tmp_path / "cache.db")
+    state_path = str(tmp_path / "crawl.db")
+
+    with Crawler(seeds, max_pages=4, fetch_cache_path=cache_path) as crawler:
+        crawler.run()
+
+    # Mêmes pages, inchangées (304) : comptées dans max_pages sans être stockées
+    metrics = Metrics()
+    with Crawler(seeds, max_pages=4, fetch_cache_path=cache_path, state_path=state_path, metrics=metrics) as crawler:
+        crawler.run()
+        assert metrics.counters[("not_modified", None)] == 4
+        assert len(crawler.results) == 0
+
+    # La reprise d'un crawl terminé ne télécharge rien de plus
+    with Crawler(seeds, max_pages=4, fetch_cache_path=cache_path, state_path=state_path, resume=True) as crawler:
+        assert crawler.pages_crawled == 4
+        crawler.run()
+        assert crawler.pages_crawled == 4
+
+
+def test_resume_keeps_host_budget(tmp_path, catalogue):
+    seeds = [f"{catalogue}/products"]
+    with Crawler(seeds, max_pages=100, host_budget=6) as crawler:
+        crawler.run()
+        expected = set(crawler.visited)
+
+    state_path = str(tmp_path / "crawl.db")
+    with Crawler(seeds, max_pages=2, host_budget=6, state_path=state_path) as crawler:
+        crawler.run()
+
+    # Reprise : les urls admises avant l'interruption restent comptées dans le budget de l'hôte
+    with Crawler(seeds, max_pages=100, host_budget=6, state_path=state_path, resume=True) as crawler:
+        crawler.run()
+        assert set(crawler.visited) == expected
+        assert len(crawler.queued) == 0
@@ -0,0 +1,92 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import Crawler
+from distributed import DistributedCrawler, shard_of
+
+N_WORKERS = 2
+PAGES_PER_SITE = 5
+
+
+def start_site(sites, requested):
+    """
+    Site local : / liste ses pages /p0.../p4 et la page d'accueil des autres
+    sites (liens d'un shard à l'autre)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            base = f"http://127.0.0.1:{self.server.server_address[1]}"
+            requested.append(base + self.path)
+            if self.path == "/robots.txt":
+                body = "User-agent: *\nAllow: /\n"
+            elif self.path == "/":
+                links = [f"/p{i}" for i in range(PAGES_PER_SITE)] + [f"{site}/" for site in sites if site != base]
+                body = "".join(f'<a href="{link}">{link}</a>' for link in links)
+            elif self.path.startswith("/p"):
+                body = f"<title>{base}{self.path}</title><a href=\"/\">home</a>"
+            else:
+                self.send_error(404)
+                return
+            payload = f"<html><body>{body}</body></html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def sites():
+    """Sites locaux répartis sur les deux shards, et les urls demandées"""
+
+    urls, servers, requested = [], [], []
+    # Ports aléatoires : on ajoute des sites jusqu'à couvrir les deux shards
+    while len(urls) < 3 or len({shard_of(url, N_WORKERS) for url in urls}) < N_WORKERS:
+        server = start_site(urls, requested)
+        servers.append(server)
+        urls.append(f"http://127.0.0.1:{server.server_address[1]}")
+    yield urls, requested
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def pages(requested):
+    return [url for url in requested if not url.endswith("/robots.txt")]
+
+
+def test_distributed_crawl_routes_links_across_shards_and_terminates(sites):
+    urls, requested = sites
+    seeds = [f"{urls[0]}/"]
+
+    crawler = DistributedCrawler(seeds, n_workers=N_WORKERS, max_pages=1_000)
+    results = crawler.run()
+
+    # Toutes les pages de tous les sites, depuis la seule page d'accueil du premier
+    expected = {f"{url}/" for url in urls} | {f"{url}/p{i}" for url in urls for i in range(PAGES_PER_SITE)}
+    assert sorted(page["url"] for page in results) == sorted(expected)
+    assert crawler.stats["links_routed"] > 0
+    assert all(count > 0 for count in crawler.stats["pages_by_shard"])
+
+    sequential = Crawler(seeds, max_pages=1_000).run()
+    assert {page["url"] for page in sequential} == {page["url"] for page in results}
+
+
+def test_workers_share_the_page_budget(sites):
+    urls, requested = sites
+    crawler = DistributedCrawler([f"{url}/" for url in urls], n_workers=N_WORKERS, max_pages=4)
+    results = crawler.run()
+
+    assert len(results) == 4
+    # Budget partagé : aucun worker ne télécharge de page au-delà de max_pages
+    assert len(pages(requested)) == 4
@@ -0,0 +1,16 @@
+import sqlite3
+
+import pytest
+
+from async_crawler import AsyncCrawler
+from crawler import Crawler
+
+
+@pytest.mark.parametrize("crawler_class", [Crawler, AsyncCrawler])
+def test_fetch_cache_closed_at_end_of_crawl(tmp_path, crawler_class):
+    # Port fermé : le crawl se termine tout de suite
+    crawler = crawler_class(["http://127.0.0.1:1/"], fetch_cache_path=str(tmp_path / "cache.db"))
+    crawler.run()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        crawler.fetch_cache.conn.execute("SELECT 1")
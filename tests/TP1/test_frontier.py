@@ -0,0 +1,89 @@
+from frontier import Frontier
+
+
+def test_crawl_delay_learned_after_first_fetch_delays_second_fetch():
+    frontier = Frontier(delay=0.0)
+    frontier.push("https://example.com/a")
+    frontier.push("https://example.com/b")
+
+    url, _, _ = frontier.pop(now=0.0)
+    assert url == "https://example.com/a"
+
+    # robots.txt lu après le premier fetch de l'hôte
+    frontier.set_crawl_delay(url, 5.0)
+
+    url, _, wait = frontier.pop(now=0.01)
+    assert url is None
+    assert abs(wait - 4.99) < 1e-9
+
+    url, _, _ = frontier.pop(now=5.0)
+    assert url == "https://example.com/b"
+
+
+def test_crawl_delay_does_not_delay_other_hosts():
+    frontier = Frontier(delay=0.0)
+    frontier.push("https://example.com/a")
+    frontier.push("https://example.com/b")
+    frontier.push("https://other.com/a")
+
+    url, _, _ = frontier.pop(now=0.0)
+    frontier.set_crawl_delay(url, 5.0)
+
+    popped = {frontier.pop(now=0.01)[0], frontier.pop(now=0.01)[0]}
+    assert popped == {"https://other.com/a", None}
+
+
+def test_retry_is_not_charged_against_host_budget():
+    frontier = Frontier(host_budget=2)
+    assert frontier.push("https://example.com/a")
+    assert frontier.push("https://example.com/b")
+    assert not frontier.push("https://example.com/c")
+
+    url, _, _ = frontier.pop(now=0.0)
+    # 429 : l'url est remise en file, plusieurs fois si besoin
+    frontier.report(url, 429, now=0.0)
+    assert frontier.push(url, retry=True)
+    assert frontier.hosts["example.com"]["admitted"] == 2
+
+    popped = set()
+    now = 0.0
+    while len(frontier):
+        now += 60.0
+        url, _, _ = frontier.pop(now=now)
+        if url is not None:
+            popped.add(url)
+    assert popped == {"https://example.com/a", "https://example.com/b"}
+
+
+def test_spilled_urls_are_reloaded_when_no_host_in_memory_is_ready():
+    frontier = Frontier(delay=10.0, max_in_memory=4)
+    for i in range(4):
+        frontier.push(f"https://example.com/{i}")
+    # Partie en mémoire pleine : l'url de l'autre hôte déborde sur disque
+    frontier.push("https://other.com/a")
+
+    assert frontier.pop(now=0.0)[0] == "https://example.com/0"
+    # example.com est dans son délai de politesse, other.com est prêt
+    assert frontier.pop(now=0.01)[0] == "https://other.com/a"
+    frontier.close()
+
+
+def test_spilled_urls_are_popped_without_in_memory_urls():
+    frontier = Frontier(max_in_memory=0)
+    frontier.push("https://example.com/a")
+
+    assert frontier.pop(now=0.0)[0] == "https://example.com/a"
+    assert frontier.pop(now=0.0) == (None, 0, None)
+
+
+def test_redirect_target_host_waits_for_its_delay():
+    frontier = Frontier(delay=5.0)
+    frontier.push("https://other.com/a")
+
+    # Redirection suivie vers other.com pendant le fetch d'une url d'un autre hôte
+    frontier.record_fetch("https://other.com/moved", now=0.0)
+
+    url, _, wait = frontier.pop(now=1.0)
+    assert url is None
+    assert wait == 4.0
+    assert frontier.pop(now=5.0)[0] == "https://other.com/a"
@@ -0,0 +1,48 @@
+import json
+import os
+
+import pytest
+
+import html_parser
+import tp1_benchmark as benchmark
+from crawler import Crawler
+from html_parser import PARSER_BACKENDS, parse_html
+
+# Pages enregistrées au format de web-scraping.dev, avec le dict sauvegardé par le crawl
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+PAGE_NAMES = sorted(name[:-len(".html")] for name in os.listdir(PAGES_DIR) if name.endswith(".html"))
+
+
+def load_page(name):
+    with open(os.path.join(PAGES_DIR, f"{name}.html"), "r", encoding="utf-8") as f:
+        page = f.read()
+    with open(os.path.join(PAGES_DIR, f"{name}.json"), "r", encoding="utf-8") as f:
+        return page, json.load(f)
+
+
+@pytest.mark.parametrize("backend", PARSER_BACKENDS)
+@pytest.mark.parametrize("name", PAGE_NAMES)
+def test_saved_pages(backend, name):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    page, expected = load_page(name)
+    assert parse_html(page, backend) == expected
+
+
+def test_lxml_backend_raises_without_lxml(monkeypatch):
+    monkeypatch.setattr(html_parser, "lxml", None)
+    with pytest.raises(ImportError):
+        parse_html("<title>t</title>", "lxml")
+    with pytest.raises(ImportError):
+        Crawler([], parser_backend="lxml")
+
+
+@pytest.mark.parametrize("page", benchmark.EDGE_CASE_PAGES)
+def test_fast_parser_matches_html_parser_tree_on_edge_cases(page):
+    assert parse_html(page, "fast") == parse_html(page, "html.parser")
+
+
+def test_check_parser_reports_mismatches(monkeypatch):
+    assert benchmark.check_parser()
+    monkeypatch.setattr(benchmark, "parse_html", lambda page, backend: {})
+    assert not benchmark.check_parser()
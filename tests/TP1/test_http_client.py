@@ -0,0 +1,81 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import Crawler
+from http_client import HttpClient, detect_charset, fetch_page
+from metrics import Metrics
+
+PAGES = {
+    "/hex-meta": ("text/html", '<html><head><meta charset="hex"><title>Hex</title></head></html>', None),
+    "/hex-header": ("text/html; charset=hex", "<html><head><title>Header</title></head></html>", None),
+}
+
+
+@pytest.fixture
+def server():
+    responses = dict(PAGES)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in responses:
+                self.send_error(404)
+                return
+            content_type, body, encoding = responses[self.path]
+            payload = body if isinstance(body, bytes) else body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", responses
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("charset", ["hex", "base64", "rot13"])
+def test_detect_charset_rejects_bytes_codecs(charset):
+    assert detect_charset(charset, f'<meta charset="{charset}">'.encode()) == "utf-8"
+
+
+def test_hostile_charsets_do_not_crash_the_crawl(server):
+    base_url, _ = server
+    results = Crawler([f"{base_url}/hex-meta", f"{base_url}/hex-header"], max_pages=5).run()
+    assert sorted(page["title"] for page in results) == ["Header", "Hex"]
+
+
+def test_brotli_bomb_is_capped(server):
+    brotli = pytest.importorskip("brotli")
+    base_url, responses = server
+    client = HttpClient(max_bytes=10_000)
+    if "br" not in client.accept_encoding:
+        pytest.skip("brotli sans output_buffer_limit")
+    responses["/bomb"] = ("text/html", brotli.compress(b"x" * 50_000_000), "br")
+    responses["/small"] = ("text/html", brotli.compress(b"<title>ok</title>"), "br")
+
+    assert client.try_get(f"{base_url}/bomb") is None
+    assert client.get_html(f"{base_url}/small") == (200, "<title>ok</title>")
+
+
+def test_fetch_page_reports_errors_in_metrics(server):
+    base_url, responses = server
+    responses["/bad-utf8"] = ("text/html", b"\xff\xfe<title>", None)
+    metrics = Metrics()
+
+    assert fetch_page(f"{base_url}/hex-meta", metrics=metrics)[0] == 200
+    assert fetch_page(f"{base_url}/missing", metrics=metrics) == (404, None)
+    # Corps non UTF-8 : erreur comptée au lieu d'une exception
+    assert fetch_page(f"{base_url}/bad-utf8", metrics=metrics) == (None, None)
+
+    assert metrics.counters[("responses", "2xx")] == 1
+    assert metrics.counters[("responses", "4xx")] == 1
+    assert metrics.counters[("errors", "UnicodeDecodeError")] == 1
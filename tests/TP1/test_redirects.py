@@ -0,0 +1,71 @@
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_crawler import AsyncCrawler
+from crawler import Crawler
+
+PAGES = {
+    "/robots.txt": (200, "User-agent: *\nDisallow: /private\n"),
+    "/start": (302, "/private/page"),
+    "/moved": (301, "/public/page"),
+    "/public/page": (200, "<html><head><title>Public</title></head><body></body></html>"),
+    "/private/page": (200, "<html><head><title>Private</title></head><body></body></html>"),
+}
+
+
+@pytest.fixture
+def server():
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            status, body = PAGES.get(self.path, (404, ""))
+            self.send_response(status)
+            if status in (301, 302):
+                self.send_header("Location", body)
+                body = ""
+            payload = body.encode("utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", requested
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_redirect_to_disallowed_path_is_not_followed(server):
+    base_url, requested = server
+    results = Crawler([f"{base_url}/start"], max_pages=5).run()
+
+    assert results == []
+    assert "/private/page" not in requested
+
+
+def test_redirect_to_allowed_path_is_followed(server):
+    base_url, requested = server
+    results = Crawler([f"{base_url}/moved"], max_pages=5).run()
+
+    assert [page["title"] for page in results] == ["Public"]
+    assert "/public/page" in requested
+
+
+@pytest.mark.parametrize("crawler_class", [Crawler, functools.partial(AsyncCrawler, concurrency=1)], ids=["sync", "async"])
+def test_redirect_target_is_marked_visited(server, crawler_class):
+    base_url, requested = server
+    crawler = crawler_class([f"{base_url}/moved", f"{base_url}/public/page"], max_pages=5)
+    results = crawler.run()
+
+    # La cible de /moved n'est pas retéléchargée depuis la frontière
+    assert requested.count("/public/page") == 1
+    assert f"{base_url}/public/page" in crawler.visited
+    assert [page["title"] for page in results] == ["Public"]
@@ -0,0 +1,45 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import Crawler
+from frontier import host_of
+
+PAGES = {
+    "/robots.txt": "User-agent: *\nCrawl-delay: 0.2\nDisallow: /private\n",
+    "/public": "<html><head><title>Public</title></head><body></body></html>",
+}
+
+
+@pytest.fixture
+def base_url():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = PAGES.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_disallowed_url_keeps_crawl_delay_of_host(base_url):
+    crawler = Crawler([f"{base_url}/public", f"{base_url}/private/a"], max_pages=10)
+    crawler.run()
+
+    assert f"{base_url}/private/a" in crawler.visited
+    assert crawler.frontier.hosts[host_of(base_url)]["crawl_delay"] == 0.2
+    assert crawler._check_robots(f"{base_url}/private/b") == (False, 0.2)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules du TP s'importent à plat, comme depuis le dossier du TP
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "TP2"))
@@ -0,0 +1,102 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from incremental import IncrementalIndex
+from index import IndexBuilder
+
+TP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "TP2")
+PRODUCTS_PATH = os.path.join(TP_DIR, "input", "products.jsonl")
+
+
+def load_products(n_products=60):
+    with open(PRODUCTS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in itertools.islice(f, n_products)]
+
+
+def normalized(indexes):
+    """Index comparables quel que soit l'ordre des segments : postings en listes triées"""
+
+    def postings(value):
+        if isinstance(value, list):
+            return sorted(value)
+        if isinstance(value, dict):
+            return {key: postings(v) for key, v in value.items()}
+        return value
+
+    return postings(json.loads(json.dumps(indexes, default=list)))
+
+
+def rebuilt(products):
+    """Index reconstruits depuis zéro, sur la dernière version de chaque url"""
+
+    latest = {product["url"]: product for product in products if product.get("url")}
+    builder = IndexBuilder()
+    builder.add_all(latest.values())
+    return normalized(builder.indexes())
+
+
+def updated(product, title):
+    return dict(product, title=title)
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_add_update_delete_match_full_rebuild(tmp_path, background):
+    products = load_products()
+    index = IncrementalIndex(str(tmp_path / "index"), max_buffered=7, merge_factor=2, background=background)
+
+    index.update(products[:40])
+    changed = [updated(p, f"renamed {i} chocolate") for i, p in enumerate(products[:10])]
+    index.update(changed + products[40:])
+    for product in products[10:15]:
+        assert index.delete(product["url"])
+    index.close()
+
+    assert index.stats["merges"] > 0
+    live = changed + products[15:]
+    assert normalized(index.indexes()) == rebuilt(live)
+
+
+def test_unchanged_products_are_not_reindexed(tmp_path):
+    products = load_products(20)
+    with IncrementalIndex(str(tmp_path / "index"), background=False) as index:
+        index.update(products)
+        flushes = index.stats["flushes"]
+        counts = index.update(products)
+
+    assert counts["unchanged"] == len({p["url"] for p in products})
+    assert counts["added"] == counts["updated"] == 0
+    assert index.stats["flushes"] == flushes
+
+
+def test_reopen_from_manifest(tmp_path):
+    products = load_products()
+    directory = str(tmp_path / "index")
+    with IncrementalIndex(directory, max_buffered=9, merge_factor=3, background=False) as index:
+        index.update(products[:30])
+        index.update([updated(p, "reopened") for p in products[:5]])
+        index.delete(products[5]["url"])
+
+    with IncrementalIndex(directory, background=False) as reopened:
+        assert normalized(reopened.indexes()) == normalized(index.indexes())
+        # Les empreintes du manifest évitent de réindexer le crawl déjà appliqué
+        counts = reopened.update(products[30:])
+        assert counts["added"] == len({p["url"] for p in products[30:]} - {p["url"] for p in products[:30]})
+
+    expected = [updated(p, "reopened") for p in products[:5]] + products[6:]
+    assert normalized(reopened.indexes()) == rebuilt(expected)
+
+
+def test_update_from_jsonl_with_delete_missing(tmp_path):
+    products = load_products()
+    crawl = tmp_path / "products.jsonl"
+    crawl.write_text("".join(json.dumps(p) + "\n" for p in products[20:]), encoding="utf-8")
+
+    with IncrementalIndex(str(tmp_path / "index"), max_buffered=10, background=False) as index:
+        index.update(products[:40])
+        counts = index.update_from_jsonl(str(crawl), delete_missing=True)
+
+    assert counts["deleted"] == len({p["url"] for p in products[:20]} - {p["url"] for p in products[20:]})
+    assert normalized(index.indexes()) == rebuilt(products[20:])
@@ -0,0 +1,79 @@
+import gzip
+import itertools
+import json
+import os
+
+import pytest
+
+from benchmark import check_outputs, quadratic_positions
+from index import (
+    IndexBuilder,
+    build_indexes_parallel,
+    create_description_index,
+    create_feature_index,
+    create_reviews_index,
+    create_title_index,
+    token_positions,
+)
+from json_parser import parse_json, rotated_paths
+
+TP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "TP2")
+PRODUCTS_PATH = os.path.join(TP_DIR, "input", "products.jsonl")
+OUTPUT_DIR = os.path.join(TP_DIR, "output")
+
+
+def as_json(index):
+    """Positions array('I') -> listes, comme dans les fichiers JSON"""
+    return json.loads(json.dumps(index, default=list))
+
+
+def small_catalogue(tmp_path, n_products=40):
+    path = tmp_path / "products.jsonl"
+    with open(PRODUCTS_PATH, "r", encoding="utf-8") as source:
+        path.write_text("".join(itertools.islice(source, n_products)), encoding="utf-8")
+    return str(path)
+
+
+def test_builder_matches_index_functions(tmp_path):
+    path = small_catalogue(tmp_path)
+    products = parse_json(path)
+    expected = {
+        "title": create_title_index(products),
+        "description": create_description_index(products),
+        "reviews": create_reviews_index(products),
+        "origin": create_feature_index(products, "made in"),
+        "brand": create_feature_index(products, "brand"),
+    }
+
+    assert as_json(IndexBuilder.from_jsonl(path).indexes()) == expected
+    assert as_json(build_indexes_parallel(path, n_workers=2, chunk_size=7).indexes()) == expected
+
+
+def test_single_pass_positions_match_quadratic_scan():
+    tokens = ["a", "b", "a", "c", "b", "a", "d"] * 10
+    assert {t: p.tolist() for t, p in token_positions(tokens).items()} == quadratic_positions(tokens)
+
+
+def test_builder_reproduces_committed_outputs():
+    assert check_outputs(OUTPUT_DIR, PRODUCTS_PATH)
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz"])
+def test_rotated_crawl_output_is_read_in_order(tmp_path, suffix):
+    path = small_catalogue(tmp_path)
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    expected = IndexBuilder.from_jsonl(path).indexes()
+
+    # Sortie du crawler en rotation : products.jsonl, products.1.jsonl, products.2.jsonl
+    opener = gzip.open if suffix.endswith(".gz") else open
+    parts = [tmp_path / f"rotated{suffix}", tmp_path / f"rotated.1{suffix}", tmp_path / f"rotated.2{suffix}"]
+    for part, start in zip(parts, (0, 15, 30)):
+        with opener(part, "wt", encoding="utf-8") as f:
+            f.writelines(lines[start:start + 15])
+
+    rotated = str(parts[0])
+    assert rotated_paths(rotated) == [str(part) for part in parts]
+    assert parse_json(rotated) == parse_json(path)
+    assert as_json(IndexBuilder.from_jsonl(rotated).indexes()) == as_json(expected)
+    assert as_json(build_indexes_parallel(rotated, n_workers=2, chunk_size=7).indexes()) == as_json(expected)
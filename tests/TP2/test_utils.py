@@ -0,0 +1,29 @@
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def without_wordnet(monkeypatch):
+    """WordNet introuvable (hors ligne), état mémorisé de utils restauré après le test"""
+
+    monkeypatch.setattr(utils, "_nltk_resource", lambda path, package: not path.endswith("wordnet"))
+    monkeypatch.setattr(utils, "_lemmatize", None)
+    monkeypatch.setattr(utils, "_wordnet_found", False)
+    monkeypatch.setattr(utils, "_fallback_warned", False)
+
+
+def test_normalize_without_wordnet_raises(without_wordnet):
+    with pytest.raises(LookupError):
+        utils.tokenize_text("red shoes", normalize=True)
+    with pytest.raises(LookupError):
+        utils.tokenize_many(["red shoes"], normalize=True)
+    # Sans normalisation, WordNet n'est pas nécessaire
+    assert utils.tokenize_text("red shoes") == ["red", "shoes"]
+
+
+def test_lemmatize_fallback_keeps_tokens_with_a_single_warning(without_wordnet):
+    with pytest.warns(RuntimeWarning, match="WordNet"):
+        assert utils.tokenize_text("red shoes", normalize=True, lemmatize_fallback=True) == ["red", "shoes"]
+    assert utils._fallback_warned
+    assert utils.tokenize_many(["red shoes"], normalize=True, lemmatize_fallback=True) == [["red", "shoes"]]
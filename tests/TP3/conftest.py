@@ -0,0 +1,15 @@
+import importlib.util
+import os
+import sys
+
+TP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "TP3")
+
+# Les modules du TP s'importent à plat, comme depuis le dossier du TP
+sys.path.insert(0, TP_DIR)
+
+# benchmark.py du TP3 (nom de module partagé avec les autres TP) : importable
+# par les tests sous le nom `tp3_benchmark`
+_spec = importlib.util.spec_from_file_location("tp3_benchmark", os.path.join(TP_DIR, "benchmark.py"))
+tp3_benchmark = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tp3_benchmark)
+sys.modules["tp3_benchmark"] = tp3_benchmark
@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+import tp3_benchmark as benchmark
+from config import PRODUCTS_PATH
+from product_store import ProductStore
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    """Copie du catalogue, avec une url en double et des lignes sans url ou vides"""
+
+    with open(PRODUCTS_PATH, "r", encoding="utf-8") as f:
+        products = [json.loads(line) for line in f if line.strip()]
+    updated = dict(products[0], title="Updated title")
+    lines = [json.dumps(p) for p in products] + ["", json.dumps({"title": "no url"}), json.dumps(updated)]
+    path = tmp_path / "products.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path), products
+
+
+def test_store_matches_scan(catalogue):
+    path, products = catalogue
+    urls = {p["url"] for p in products} | {"https://example.com/missing"}
+
+    with ProductStore(path) as store:
+        assert store.get_many(urls) == benchmark.load_products_scan(path, urls)
+        assert len(store) == len({p["url"] for p in products})
+
+
+def test_duplicate_url_keeps_last_line(catalogue):
+    path, products = catalogue
+    with ProductStore(path) as store:
+        assert store.get(products[0]["url"])["title"] == "Updated title"
+
+
+def test_offsets_saved_and_reused(catalogue):
+    path, products = catalogue
+    with ProductStore(path) as store:
+        offsets = store.offsets
+    assert os.path.exists(store.offsets_path)
+
+    with ProductStore(path) as reopened:
+        assert reopened.offsets == offsets
+        assert reopened.get(products[1]["url"]) == products[1]
+
+
+def test_stale_offsets_are_rebuilt(catalogue):
+    path, products = catalogue
+    ProductStore(path).close()
+
+    # Catalogue réécrit : mêmes urls à d'autres positions, offsets enregistrés périmés
+    rewritten = [dict(p, title=f"v2 {p['title']}") for p in reversed(products)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(p) + "\n" for p in rewritten)
+
+    urls = {p["url"] for p in products}
+    with ProductStore(path) as store:
+        assert store.get_many(urls) == benchmark.load_products_scan(path, urls)
+        assert store.get(products[0]["url"])["title"].startswith("v2 ")
+
+
+def test_stale_offsets_same_size_are_rebuilt(catalogue):
+    path, products = catalogue
+    ProductStore(path).close()
+    size = os.path.getsize(path)
+
+    # Même taille, contenu et date de modification différents
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content.replace(products[2]["url"], products[2]["url"][:-1] + "X", 1))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert os.path.getsize(path) == size
+
+    urls = {p["url"] for p in products} | {products[2]["url"][:-1] + "X"}
+    with ProductStore(path) as store:
+        assert store.get_many(urls) == benchmark.load_products_scan(path, urls)
+
+
+def test_lru_cache(catalogue):
+    path, products = catalogue
+    with ProductStore(path, cache_size=2) as store:
+        for product in products[:3]:
+            store.get(product["url"])
+        store.get(products[2]["url"])
+        store.get(products[0]["url"])
+        assert store.stats == {"hits": 1, "misses": 4}
@@ -0,0 +1,71 @@
+import pytest
+
+import tp3_benchmark as benchmark
+from config import INDEX_PATHS, JSON_INDEX_PATHS
+from quering import find_docs_with_any_token, load_index, prepare_query
+from ranking import FieldStats, field_statistics, linear_ranking_score, rank_documents
+
+FORMATS = {"json": JSON_INDEX_PATHS, "binary": INDEX_PATHS}
+
+
+@pytest.fixture(scope="module", params=sorted(FORMATS))
+def indexes(request):
+    loaded = {key: load_index(path) for key, path in FORMATS[request.param].items()}
+    yield loaded
+    for index in loaded.values():
+        if hasattr(index, "close"):
+            index.close()
+
+
+def sample_queries(indexes):
+    """(tokens, candidats) des requêtes exemples du benchmark"""
+
+    queries = []
+    for query in benchmark.QUERIES:
+        tokens = prepare_query(query, indexes["origin_synonyms"], lemmatize_fallback=True)
+        queries.append((tokens, find_docs_with_any_token(tokens, indexes)))
+    return queries
+
+
+def test_precomputed_statistics_give_recomputed_scores(indexes):
+    stats = field_statistics(indexes)
+    for tokens, docs in sample_queries(indexes):
+        for url in docs:
+            # field_stats={} : statistiques recalculées à chaque appel de bm25_score
+            recomputed = linear_ranking_score(url, tokens, indexes, field_stats={})
+            assert linear_ranking_score(url, tokens, indexes, field_stats=stats) == recomputed
+
+
+def test_binary_statistics_match_json_statistics():
+    for key in ("title", "description"):
+        json_index = load_index(JSON_INDEX_PATHS[key])
+        binary_index = load_index(INDEX_PATHS[key])
+        expected, stored = FieldStats.from_index(json_index), FieldStats.from_index(binary_index)
+
+        assert stored.total_docs == expected.total_docs
+        assert dict(stored.doc_lens) == expected.doc_lens
+        assert stored.avg_len == pytest.approx(expected.avg_len)
+        assert all(stored.doc_freq(token) == expected.doc_freq(token) for token in json_index)
+        binary_index.close()
+
+
+def test_binary_indexes_match_json_indexes():
+    assert benchmark.check_binary()
+
+
+@pytest.mark.parametrize("top_k", [None, 10, 1])
+@pytest.mark.parametrize("weights", [None, {"bm25_title": 1.0, "exact_match": 5.0, "reviews": 0.0}])
+def test_term_at_a_time_matches_document_at_a_time(indexes, top_k, weights):
+    stats = field_statistics(indexes)
+    for tokens, docs in sample_queries(indexes):
+        ranked = rank_documents(tokens, docs, indexes, ranking_weights=weights, top_k=top_k, field_stats=stats)
+        baseline = [
+            (url, linear_ranking_score(url, tokens, indexes, ranking_weights=weights, field_stats=stats))
+            for url in docs
+        ]
+        baseline.sort(key=lambda x: x[1], reverse=True)
+
+        # Mêmes scores dans le même ordre ; à score égal, l'ordre des urls est libre
+        assert [score for _, score in ranked] == [score for _, score in baseline[:top_k]]
+        expected = dict(baseline)
+        assert all(expected[url] == score for url, score in ranked)
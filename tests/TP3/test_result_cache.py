@@ -0,0 +1,103 @@
+import json
+import shutil
+
+import pytest
+
+import search_engine
+from config import INDEX_PATHS, INPUT_DIR
+from result_cache import ResultCache
+from search_engine import SearchEngine
+
+QUERY = "box of chocolate candy"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Moteur sur une copie des index et du catalogue, fichiers vérifiés à chaque recherche"""
+
+    input_dir = tmp_path / "input"
+    shutil.copytree(INPUT_DIR, input_dir, ignore=shutil.ignore_patterns("*.offsets.json"))
+    with SearchEngine(
+        index_paths={key: input_dir / path.name for key, path in INDEX_PATHS.items()},
+        products_path=input_dir / "products.jsonl",
+        reload_check_interval=0,
+        lemmatize_fallback=True,
+    ) as engine:
+        yield engine
+
+
+def test_same_normalized_query_hits_the_cache(engine):
+    first = engine.search(QUERY, top_k=5)
+    assert engine.search("Box of chocolate, candy!", top_k=5) == first
+    assert engine.search("candy chocolate box", top_k=5) == first
+    assert engine.cache_info()["hits"] == 2
+
+    # Autre top_k : autre entrée
+    engine.search(QUERY, top_k=3)
+    assert engine.cache_info()["misses"] == 2
+
+
+def test_results_are_isolated_from_the_cache(engine):
+    first = engine.search(QUERY, top_k=3)
+    expected = json.loads(json.dumps(first))
+    first[0]["title"] = "changed"
+    first[0]["product_reviews"].append({"rating": 0})
+
+    assert engine.search(QUERY, top_k=3) == expected
+    assert engine.search(QUERY, top_k=3)[0] is not engine.search(QUERY, top_k=3)[0]
+
+
+def test_changed_products_file_invalidates_the_cache(engine):
+    first = engine.search(QUERY, top_k=3)
+    with open(engine.products_path, "r", encoding="utf-8") as f:
+        products = [json.loads(line) for line in f if line.strip()]
+    with open(engine.products_path, "w", encoding="utf-8") as f:
+        for product in products:
+            if product["url"] == first[0]["url"]:
+                product = dict(product, title="Renamed product")
+            f.write(json.dumps(product) + "\n")
+
+    results = engine.search(QUERY, top_k=3)
+    assert results[0]["title"] == "Renamed product"
+    assert engine.cache_info()["invalidations"] == 1
+
+
+def test_files_checked_once_per_interval(engine, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_engine.time, "monotonic", lambda: now[0])
+    engine.reload_check_interval = 60
+    engine.search(QUERY, top_k=3)
+
+    calls = []
+    signature = engine._files_signature
+    monkeypatch.setattr(engine, "_files_signature", lambda: calls.append(1) or signature())
+    for _ in range(5):
+        engine.search(QUERY, top_k=3)
+    assert calls == []
+
+    now[0] += 60
+    engine.search(QUERY, top_k=3)
+    assert calls == [1]
+
+
+def test_replaced_indexes_invalidate_the_cache(engine):
+    engine.search(QUERY, top_k=3)
+    engine.indexes = dict(engine.indexes, title={})
+    engine.search(QUERY, top_k=3)
+    assert engine.cache_info()["misses"] == 2
+    assert engine.cache_info()["invalidations"] == 1
+
+
+def test_result_cache_lru_and_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("result_cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.info()["evictions"] == 1
+    assert cache.info()["expirations"] == 1
@@ -0,0 +1,47 @@
+import pytest
+
+import tp3_benchmark as benchmark
+from config import INDEX_PATHS, JSON_INDEX_PATHS
+from quering import find_docs_with_any_token, load_index, prepare_query
+from ranking import field_statistics, rank_documents
+
+np = pytest.importorskip("numpy")
+from vector_ranking import VectorScorer  # noqa: E402
+
+SYNTHETIC_QUERIES = (["w50", "w120", "brand7"], ["w5", "w300"], ["w1000", "w2000", "w3000", "country3"], ["w1"])
+
+
+def assert_same_ranking(indexes, queries, top_ks=(None, 10, 1)):
+    stats = field_statistics(indexes)
+    scorer = VectorScorer(indexes, stats)
+    for top_k in top_ks:
+        for tokens in queries:
+            docs = find_docs_with_any_token(tokens, indexes)
+            expected = rank_documents(tokens, docs, indexes, top_k=top_k, field_stats=stats)
+            assert scorer.rank(tokens, docs, top_k=top_k) == expected
+
+
+@pytest.mark.parametrize("paths", [JSON_INDEX_PATHS, INDEX_PATHS], ids=["json", "binary"])
+def test_numpy_matches_python_on_catalogue(paths):
+    indexes = {key: load_index(path) for key, path in paths.items()}
+    queries = [prepare_query(query, indexes["origin_synonyms"], lemmatize_fallback=True) for query in benchmark.QUERIES]
+    assert_same_ranking(indexes, queries)
+
+
+def test_numpy_matches_python_on_synthetic_indexes():
+    assert_same_ranking(benchmark.make_indexes(5_000), SYNTHETIC_QUERIES)
+
+
+def test_successive_queries_do_not_leak_candidates():
+    indexes = benchmark.make_indexes(2_000)
+    scorer = VectorScorer(indexes)
+    tokens = SYNTHETIC_QUERIES[0]
+    docs = find_docs_with_any_token(tokens, indexes)
+    first = scorer.rank(tokens, docs)
+
+    # Requête sur d'autres candidats, puis la première à nouveau
+    other = SYNTHETIC_QUERIES[1]
+    scorer.rank(other, find_docs_with_any_token(other, indexes))
+    assert scorer.rank(tokens, docs) == first
+    subset = set(list(docs)[:3])
+    assert scorer.rank(tokens, subset) == rank_documents(tokens, subset, indexes)